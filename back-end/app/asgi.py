@@ -3,6 +3,11 @@ ASGI config for app project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The live trip channel (``trips/<pk>/events/``) is a streaming async view, so
+it must be served through this entry point (e.g. ``uvicorn app.asgi:application``)
+for events to reach clients as they happen. The event hub lives in process
+memory, so run a single worker or pin a trip's clients to the same worker.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
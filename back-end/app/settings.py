@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+from datetime import timedelta
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,6 +47,7 @@ INSTALLED_APPS = [
     "polls",
     "admins",
     "trips",
+    "authentication",
     "corsheaders",
 ]
 
@@ -83,6 +85,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "app.wsgi.application"
+ASGI_APPLICATION = "app.asgi.application"
 
 
 # Database
@@ -101,6 +104,47 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Listas de alunos por parada (viagens e lista de embarque).
+    # Pode ser trocado por FileBasedCache para compartilhar entre processos.
+    "manifests": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "manifests",
+        "TIMEOUT": 60 * 60 * 24,
+        "OPTIONS": {"MAX_ENTRIES": 500},
+    },
+    # Permissões de cada usuário entre requisições. Os sinais de common
+    # invalidam só o processo atual; o TIMEOUT limita o atraso nos demais.
+    "permissions": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "permissions",
+        "TIMEOUT": 60 * 5,
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+    # Lista das universidades (students.universities). Como nas permissões,
+    # os sinais trocam a versão só no processo atual; o TIMEOUT limita o
+    # atraso nos demais.
+    "universities": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "universities",
+        "TIMEOUT": 60 * 5,
+        "OPTIONS": {"MAX_ENTRIES": 50},
+    },
+    # Baldes dos throttles de login e cadastro e contadores de recusas
+    "throttle": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "throttle",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -144,8 +188,26 @@ STATIC_URL = "static/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Quantas semanas à frente o agendador de enquetes gera por padrão
+POLL_SCHEDULE_WEEKS = 1
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
-    )
+        "authentication.authentication.StatelessJWTAuthentication",
+    ),
+    # Baldes de fichas do login e do cadastro (common.throttling): o balde
+    # comporta N fichas e reenche N por período
+    "DEFAULT_THROTTLE_RATES": {
+        "login_ip": "30/min",
+        "login_username": "10/min",
+        "registration_ip": "30/hour",
+        "registration_email": "5/hour",
+    },
+}
+
+# As leituras confiam nas claims do token sem consultar o banco, então o
+# access precisa ser curto: é o atraso máximo para uma mudança de papel valer
+SIMPLE_JWT = {
+    "ACCESS_TOKEN_LIFETIME": timedelta(minutes=5),
+    "TOKEN_REFRESH_SERIALIZER": "authentication.serializers.CustomTokenRefreshSerializer",
 }
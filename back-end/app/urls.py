@@ -2,10 +2,12 @@ from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from boarding_points.views import BoardingPointViewSet
+from students.views import UniversityViewSet
 
 router = DefaultRouter()
 
 router.register(r"boarding-points", BoardingPointViewSet, basename="boarding-point")
+router.register(r"universities", UniversityViewSet, basename="university")
 
 urlpatterns = [
     path("admin/", admin.site.urls),
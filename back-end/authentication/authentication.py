@@ -0,0 +1,49 @@
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+
+
+class ClaimsUser(TokenUser):
+    """
+    Usuário montado só com as claims assinadas do token de acesso, sem ler
+    a tabela de usuários. Vale pelo tempo de vida do token (curto).
+    """
+
+    @property
+    def role(self):
+        return self.token.get("role", "unknown")
+
+    @property
+    def student_id(self):
+        return self.token.get("student_id")
+
+    @property
+    def driver_id(self):
+        return self.token.get("driver_id")
+
+    @property
+    def admin_id(self):
+        return self.token.get("admin_id")
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    Autentica leituras pelas claims do token, sem consulta ao banco.
+
+    Escritas continuam carregando o usuário do banco (que confere se ele
+    ainda está ativo e traz as permissões atuais), exceto nas views que
+    declaram stateless_writes = True, como as de voto. Tokens emitidos sem
+    as claims de identidade também passam pelo banco.
+    """
+
+    def authenticate(self, request):
+        view = request.parser_context.get("view") if request.parser_context else None
+        self.verify_user = request.method not in SAFE_METHODS and not getattr(
+            view, "stateless_writes", False
+        )
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if self.verify_user or "role" not in validated_token:
+            return super().get_user(validated_token)
+        return ClaimsUser(validated_token)
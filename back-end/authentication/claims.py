@@ -0,0 +1,26 @@
+from .models import get_profile
+
+
+def identity_claims(user):
+    """
+    Claims que identificam o usuário sem consultar o banco: papel, id da
+    pessoa ligada a ele e as flags de administração. O papel vem do perfil
+    do usuário, em uma consulta (nenhuma se já veio com select_related).
+    """
+    profile = get_profile(user)
+    role = profile.role if profile else "unknown"
+    person_id = profile.person_id if profile else None
+    return {
+        "role": role,
+        "student_id": person_id if role == "student" else None,
+        "driver_id": person_id if role == "driver" else None,
+        "admin_id": person_id if role == "admin" else None,
+        "is_staff": user.is_staff,
+        "is_superuser": user.is_superuser,
+    }
+
+
+def add_identity_claims(token, user):
+    for claim, value in identity_claims(user).items():
+        token[claim] = value
+    return token
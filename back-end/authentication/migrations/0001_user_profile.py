@@ -0,0 +1,68 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_profiles(apps, schema_editor):
+    UserProfile = apps.get_model("authentication", "UserProfile")
+    # Mesma prioridade do login antigo (aluno, motorista, admin): quem tiver
+    # mais de uma pessoa fica com a última gravada aqui
+    profiles = {}
+    for app_label, model_name in (
+        ("admins", "Admin"),
+        ("drivers", "Driver"),
+        ("students", "Student"),
+    ):
+        Person = apps.get_model(app_label, model_name)
+        for user_id, role, person_id in Person.objects.values_list(
+            "user_id", "role", "pk"
+        ):
+            profiles[user_id] = UserProfile(
+                user_id=user_id, role=role, person_id=person_id
+            )
+    UserProfile.objects.bulk_create(profiles.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("admins", "0001_initial"),
+        ("drivers", "0001_initial"),
+        ("students", "0003_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserProfile",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="profile",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "role",
+                    models.CharField(
+                        choices=[
+                            ("student", "Student"),
+                            ("driver", "Driver"),
+                            ("admin", "Administrator"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("person_id", models.BigIntegerField()),
+            ],
+        ),
+        migrations.RunPython(create_profiles, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+from django.contrib.auth.models import User
+from django.db import models
+
+from common.models import ROLE_CHOICES
+
+
+class UserProfile(models.Model):
+    """
+    Papel do usuário e id da pessoa (aluno, motorista ou administrador) em
+    uma única linha, para o login e as requisições não precisarem tentar
+    cada relação um-para-um. Mantido pelos sinais de Student, Driver e Admin.
+    """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="profile"
+    )
+    role = models.CharField(max_length=20, choices=ROLE_CHOICES)
+    person_id = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.user} ({self.role})"
+
+    @classmethod
+    def record(cls, persons):
+        """Grava (ou atualiza) o perfil de cada pessoa com um único upsert."""
+        return cls.objects.bulk_create(
+            [
+                cls(user_id=person.user_id, role=person.role, person_id=person.pk)
+                for person in persons
+            ],
+            update_conflicts=True,
+            unique_fields=["user"],
+            update_fields=["role", "person_id"],
+        )
+
+
+def get_profile(user):
+    """Perfil do usuário, ou None para quem não é aluno, motorista nem admin."""
+    return getattr(user, "profile", None)
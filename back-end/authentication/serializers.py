@@ -1,4 +1,14 @@
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from django.contrib.auth.models import update_last_login
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenObtainSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+from django.contrib.auth.models import User
+
+from .claims import add_identity_claims
 
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
@@ -6,25 +16,37 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     def get_token(cls, user):
         token = super().get_token(user)
 
-        person = (
-            getattr(user, "student", None)
-            or getattr(user, "driver", None)
-            or getattr(user, "admin", None)
-        )
-
-        token["role"] = getattr(person, "role", "unknown")
+        # Papel e ids da pessoa vão assinados no token para que as requisições
+        # não precisem buscar o usuário no banco
+        add_identity_claims(token, user)
 
         return token
 
+    def validate(self, attrs):
+        # Autentica e monta o par como TokenObtainPairSerializer, mas o papel
+        # da resposta sai do token já gerado, sem consultar o perfil de novo
+        data = TokenObtainSerializer.validate(self, attrs)
+
+        refresh = self.get_token(self.user)
+        data["refresh"] = str(refresh)
+        data["access"] = str(refresh.access_token)
+        data["role"] = refresh["role"]
+
+        if api_settings.UPDATE_LAST_LOGIN:
+            update_last_login(None, self.user)
+
+        return data
+
+
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
     def validate(self, attrs):
         data = super().validate(attrs)
 
-        # ✅ CORREÇÃO: Adicionar busca por admin
-        person = (
-            getattr(self.user, "student", None)
-            or getattr(self.user, "driver", None)
-            or getattr(self.user, "admin", None)
+        # O access novo copiaria as claims do refresh, que podem ter horas;
+        # elas são refeitas do banco para valerem só pelo tempo do access
+        access = AccessToken(data["access"])
+        user = User.objects.select_related("profile").get(
+            pk=access[api_settings.USER_ID_CLAIM]
         )
-
-        data["role"] = getattr(person, "role", "unknown")
+        data["access"] = str(add_identity_claims(access, user))
         return data
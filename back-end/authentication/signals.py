@@ -0,0 +1,23 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from admins.models import Admin
+from drivers.models import Driver
+from students.models import Student
+from .models import UserProfile
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_save, sender=Driver)
+@receiver(post_save, sender=Admin)
+def record_profile(sender, instance, **kwargs):
+    UserProfile.record([instance])
+
+
+@receiver(post_delete, sender=Student)
+@receiver(post_delete, sender=Driver)
+@receiver(post_delete, sender=Admin)
+def remove_profile(sender, instance, **kwargs):
+    UserProfile.objects.filter(
+        user_id=instance.user_id, person_id=instance.pk, role=instance.role
+    ).delete()
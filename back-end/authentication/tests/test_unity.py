@@ -0,0 +1,294 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from unittest.mock import Mock, patch
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from admins.models import Admin
+from authentication.authentication import ClaimsUser, StatelessJWTAuthentication
+from authentication.models import UserProfile
+from boarding_points.models import BoardingPoint
+from common.throttling import (
+    LoginIPThrottle,
+    LoginUsernameThrottle,
+    TokenBucketThrottle,
+    rejection_counts,
+)
+from drivers.models import Driver
+from polls.models import Poll, Vote
+from students.models import Student
+
+
+def user_queries(ctx):
+    return [
+        query["sql"] for query in ctx.captured_queries if "auth_user" in query["sql"]
+    ]
+
+
+# Funcionalidade 1
+class StatelessAuthenticationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.bp = BoardingPoint.objects.create(name="Centro", route_order=0)
+        cls.student_user = User.objects.create_user(
+            username="aluno@teste.com", password="Senha123"
+        )
+        cls.student = Student.objects.create(
+            user=cls.student_user,
+            name="Aluno",
+            phone="86999999999",
+            class_shift="M",
+            university_id="UESPI",
+            boarding_point=cls.bp,
+        )
+        cls.admin_user = User.objects.create_user(
+            username="admin@teste.com", password="Senha123"
+        )
+        cls.admin = Admin.objects.create(
+            user=cls.admin_user, name="Admin", phone="86999999998"
+        )
+        cls.poll = Poll.objects.create(date=timezone.localdate() + timedelta(days=1))
+
+    def login(self, username):
+        client = APIClient()
+        response = client.post(
+            reverse("token_obtain_pair"),
+            {"username": username, "password": "Senha123"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        return client, response.data
+
+    def test_CT_1_token_carries_identity_claims(self):
+        _, data = self.login("aluno@teste.com")
+        token = AccessToken(data["access"])
+
+        self.assertEqual(data["role"], "student")
+        self.assertEqual(token["role"], "student")
+        self.assertEqual(token["student_id"], self.student.id)
+        self.assertIsNone(token["driver_id"])
+        self.assertIsNone(token["admin_id"])
+        self.assertFalse(token["is_staff"])
+
+        _, data = self.login("admin@teste.com")
+        token = AccessToken(data["access"])
+        self.assertEqual(token["admin_id"], self.admin.id)
+        self.assertTrue(token["is_superuser"])
+
+    def test_CT_2_reads_and_votes_skip_user_lookup(self):
+        client, _ = self.login("aluno@teste.com")
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(reverse("vote-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(user_queries(ctx), [])
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.put(
+                reverse("vote-batch"),
+                {"votes": [{"poll": self.poll.id, "option": "round_trip"}]},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(user_queries(ctx), [])
+        self.assertTrue(
+            Vote.objects.filter(student=self.student, poll=self.poll).exists()
+        )
+
+    def test_CT_3_admin_reads_use_staff_claims(self):
+        client, _ = self.login("admin@teste.com")
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(reverse("student-payment-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(user_queries(ctx), [])
+
+    def test_CT_4_critical_writes_verify_user_in_database(self):
+        client, _ = self.login("admin@teste.com")
+        User.objects.filter(pk=self.admin_user.pk).update(is_active=False)
+
+        # Leitura ainda vale pelo tempo do token; a escrita confere o banco
+        response = client.get(reverse("student-payment-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = client.post(
+            reverse("boarding-point-list"),
+            {"name": "Novo", "route_order": 5},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertFalse(BoardingPoint.objects.filter(name="Novo").exists())
+
+    def test_CT_5_token_without_claims_loads_user(self):
+        token = RefreshToken.for_user(self.student_user).access_token
+        authenticator = StatelessJWTAuthentication()
+        authenticator.verify_user = False
+
+        user = authenticator.get_user(token)
+        self.assertIsInstance(user, User)
+
+        token = AccessToken(self.login("aluno@teste.com")[1]["access"])
+        user = authenticator.get_user(token)
+        self.assertIsInstance(user, ClaimsUser)
+        self.assertEqual(user.student_id, self.student.id)
+
+    def test_CT_6_refresh_reissues_claims_from_database(self):
+        _, data = self.login("aluno@teste.com")
+        self.student.delete()
+
+        response = APIClient().post(
+            reverse("token_refresh"), {"refresh": data["refresh"]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        token = AccessToken(response.data["access"])
+        self.assertEqual(token["role"], "unknown")
+        self.assertIsNone(token["student_id"])
+
+    def test_CT_7_non_student_cannot_vote(self):
+        client, _ = self.login("admin@teste.com")
+        response = client.put(
+            reverse("vote-set"),
+            {"poll": self.poll.id, "option": "round_trip"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+# Funcionalidade 2
+class UserProfileTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.bp = BoardingPoint.objects.create(name="Centro", route_order=0)
+        cls.student_user = User.objects.create_user(
+            username="aluno@teste.com", password="Senha123"
+        )
+        cls.student = Student.objects.create(
+            user=cls.student_user,
+            name="Aluno",
+            phone="86999999999",
+            class_shift="M",
+            university_id="UESPI",
+            boarding_point=cls.bp,
+        )
+        cls.admin_user = User.objects.create_user(
+            username="admin@teste.com", password="Senha123"
+        )
+        Admin.objects.create(user=cls.admin_user, name="Admin", phone="86999999998")
+        User.objects.create_user(username="sem@teste.com", password="Senha123")
+
+    def test_CT_8_login_resolves_role_in_one_query(self):
+        for username, role in (
+            ("aluno@teste.com", "student"),
+            ("admin@teste.com", "admin"),
+            ("sem@teste.com", "unknown"),
+        ):
+            with CaptureQueriesContext(connection) as ctx:
+                response = APIClient().post(
+                    reverse("token_obtain_pair"),
+                    {"username": username, "password": "Senha123"},
+                    format="json",
+                )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data["role"], role)
+            # Uma consulta busca o usuário, outra o perfil
+            self.assertEqual(len(ctx.captured_queries), 2, username)
+
+    def test_CT_9_profile_follows_person_changes(self):
+        profile = UserProfile.objects.get(user=self.student_user)
+        self.assertEqual(
+            (profile.role, profile.person_id), ("student", self.student.id)
+        )
+
+        user = User.objects.create_user(username="motorista@teste.com")
+        driver = Driver.objects.create(
+            user=user,
+            name="Motorista",
+            phone="86999999997",
+            shift="M",
+            dailyPaymentCents=1000,
+        )
+        profile = UserProfile.objects.get(user=user)
+        self.assertEqual((profile.role, profile.person_id), ("driver", driver.id))
+
+        self.student.delete()
+        self.assertFalse(UserProfile.objects.filter(user=self.student_user).exists())
+
+    def test_CT_10_database_user_votes_through_profile(self):
+        poll = Poll.objects.create(date=timezone.localdate() + timedelta(days=1))
+        client = APIClient()
+        # Token sem as claims de identidade: o usuário vem do banco
+        token = RefreshToken.for_user(self.student_user).access_token
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        response = client.put(
+            reverse("vote-set"), {"poll": poll.id, "option": "absent"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["student"]["id"], self.student.id)
+
+
+# Funcionalidade 3
+class LoginThrottleTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser(
+            username="admin@teste.com", password="Senha123"
+        )
+
+    def setUp(self):
+        self.now = 1000.0
+        clock = patch.object(
+            TokenBucketThrottle, "timer", Mock(side_effect=lambda: self.now)
+        )
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def login(self, username, ip="10.0.0.1"):
+        return APIClient(REMOTE_ADDR=ip).post(
+            reverse("token_obtain_pair"),
+            {"username": username, "password": "errada"},
+            format="json",
+        )
+
+    @patch.object(LoginUsernameThrottle, "rate", "2/min", create=True)
+    def test_CT_11_username_bucket_rejects_before_password_check(self):
+        self.assertEqual(self.login("admin@teste.com").status_code, 401)
+        self.assertEqual(self.login("ADMIN@teste.com", ip="10.0.0.2").status_code, 401)
+
+        # Sem ficha: recusado sem nem buscar o usuário (e sem hash)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.login("admin@teste.com", ip="10.0.0.3")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertEqual(response["Retry-After"], "30")
+
+        # Meio minuto depois o balde tem uma ficha de novo
+        self.now += 30
+        self.assertEqual(self.login("admin@teste.com").status_code, 401)
+        self.assertEqual(self.login("admin@teste.com").status_code, 429)
+
+        self.assertEqual(rejection_counts()["login_username"], 2)
+
+    @patch.object(LoginIPThrottle, "rate", "3/min", create=True)
+    def test_CT_12_ip_bucket_spans_usernames(self):
+        for i in range(3):
+            self.assertEqual(self.login(f"user{i}").status_code, 401)
+        self.assertEqual(self.login("outro").status_code, 429)
+        self.assertEqual(self.login("outro", ip="10.0.0.9").status_code, 401)
+
+        client = APIClient()
+        client.force_authenticate(self.admin_user)
+        response = client.get(reverse("throttle-stats"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["rejected"]["login_ip"], 1)
+        self.assertEqual(response.data["rejected"]["login_username"], 0)
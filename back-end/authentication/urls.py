@@ -4,7 +4,7 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
     TokenVerifyView,
 )
-from authentication.views import CustomTokenObtainPairView
+from authentication.views import CustomTokenObtainPairView, ThrottleStatsView
 
 
 urlpatterns = [
@@ -23,4 +23,9 @@ urlpatterns = [
         TokenVerifyView.as_view(),
         name="token_verify",
     ),
+    path(
+        "authentication/throttles/",
+        ThrottleStatsView.as_view(),
+        name="throttle-stats",
+    ),
 ]
@@ -1,6 +1,22 @@
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView
+
+from common.throttling import LoginIPThrottle, LoginUsernameThrottle, rejection_counts
 from .serializers import CustomTokenObtainPairSerializer
 
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+    # Recusa antes do hash da senha quando o IP ou o usuário esgotam o balde
+    throttle_classes = [LoginIPThrottle, LoginUsernameThrottle]
+
+
+class ThrottleStatsView(APIView):
+    """Requisições recusadas pelos throttles de login e cadastro, por escopo."""
+
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        return Response({"rejected": rejection_counts()})
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-18 21:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("boarding_points", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="boardingpoint",
+            index=models.Index(
+                fields=["route_order", "id"], name="boarding_point_route_idx"
+            ),
+        ),
+    ]
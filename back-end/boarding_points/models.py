@@ -12,6 +12,10 @@ class BoardingPoint(models.Model):
 
     class Meta:
         ordering = ["route_order"]
+        indexes = [
+            # Ordem da rota e do cursor da listagem
+            models.Index(fields=["route_order", "id"], name="boarding_point_route_idx"),
+        ]
 
     def __str__(self):
         return f"{self.route_order}: {self.name}"
@@ -1,8 +1,12 @@
+from datetime import date
+from django.contrib.auth.models import User
 from django.test import TestCase
-from rest_framework.test import APIRequestFactory
+from rest_framework.test import APIRequestFactory, force_authenticate
 from boarding_points.models import BoardingPoint
 from boarding_points.views import BoardingPointViewSet
 from boarding_points.serializers import BoardingPointSerializer
+from polls.models import Poll
+from trips.models import Trip, TripStop
 
 
 class BoardingPointModelTests(TestCase):
@@ -114,3 +118,20 @@ class BoardingPointViewTests(TestCase):
 
     def test_CT_10_queryset(self):
         self.assertEqual(self.view.queryset.model, BoardingPoint)
+
+    def test_CT_11_point_in_a_stop_plan_is_not_deleted(self):
+        point = BoardingPoint.objects.create(name="Ponto", route_order=0)
+        trip = Trip.objects.create(
+            poll=Poll.objects.create(date=date.today()), trip_type="outbound"
+        )
+        TripStop.objects.create(trip=trip, position=0, boarding_point=point)
+        admin = User.objects.create_superuser(username="admin", password="x")
+
+        request = self.factory.delete(f"/boarding-points/{point.pk}/")
+        force_authenticate(request, user=admin)
+        response = BoardingPointViewSet.as_view({"delete": "destroy"})(
+            request, pk=point.pk
+        )
+
+        self.assertEqual(response.status_code, 409)
+        self.assertTrue(BoardingPoint.objects.filter(pk=point.pk).exists())
@@ -1,11 +1,15 @@
-from rest_framework import viewsets, permissions
+from django.db.models import ProtectedError
+from rest_framework import viewsets, permissions, status
+from rest_framework.response import Response
 from .models import BoardingPoint
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from .serializers import BoardingPointSerializer
 from common.permissions import GlobalDefaultPermission
+from common.pagination import KeysetCursorPagination
+from common.views import SparseFieldsetMixin
 
 
-class BoardingPointViewSet(viewsets.ModelViewSet):
+class BoardingPointViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows boarding points to be viewed or edited.
     """
@@ -13,8 +17,20 @@ class BoardingPointViewSet(viewsets.ModelViewSet):
     queryset = BoardingPoint.objects.all()
     serializer_class = BoardingPointSerializer
     permission_classes = (IsAuthenticated, GlobalDefaultPermission)
+    pagination_class = KeysetCursorPagination
+    cursor_ordering = ("route_order", "id")
 
     def get_permissions(self):
      if self.request.method in ["GET", "HEAD", "OPTIONS"]:
         return [AllowAny()]
      return [IsAuthenticated(), GlobalDefaultPermission()]
+
+    def destroy(self, request, *args, **kwargs):
+        # Pontos no plano de paradas de uma viagem ainda não arquivada ficam
+        try:
+            return super().destroy(request, *args, **kwargs)
+        except ProtectedError:
+            return Response(
+                {"error": "Boarding point is part of a trip stop plan."},
+                status=status.HTTP_409_CONFLICT,
+            )
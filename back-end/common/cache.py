@@ -0,0 +1,59 @@
+import threading
+
+from django.core.cache import caches
+
+
+_MISSING = object()
+
+
+class VersionedCache:
+    """
+    Cache de leitura cujas chaves já carregam a versão dos dados.
+
+    Quando os dados mudam a versão muda, e a entrada antiga simplesmente deixa
+    de ser consultada até ser descartada pelo MAX_ENTRIES do backend. Funciona
+    com os backends de memória local e de arquivo do Django.
+    """
+
+    def __init__(self, alias, prefix):
+        self.alias = alias
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def make_key(self, *parts):
+        return ":".join([self.prefix, *[str(part) for part in parts]])
+
+    def get_or_set(self, key_parts, builder):
+        key = self.make_key(*key_parts)
+        value = self.cache.get(key, _MISSING)
+
+        if value is not _MISSING:
+            self._count(hit=True)
+            return value
+
+        self._count(hit=False)
+        value = builder()
+        self.cache.set(key, value)
+        return value
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
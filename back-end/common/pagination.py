@@ -0,0 +1,30 @@
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Paginação por cursor (keyset) das listagens de alunos, pagamentos,
+    motoristas, pontos de embarque, enquetes, votos e viagens, ligada com
+    pagination_class na view; as demais listas continuam respondendo a lista
+    simples.
+
+    Cada view define `cursor_ordering` com uma ordenação estável e indexada;
+    sem ela é usado o id. Clientes antigos podem pedir a lista inteira, no
+    formato de antes, com ?paginate=false.
+    """
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    ordering = "id"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if request.query_params.get("paginate") in ("false", "0"):
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, "cursor_ordering", self.ordering)
+        if isinstance(ordering, str):
+            return (ordering,)
+        return tuple(ordering)
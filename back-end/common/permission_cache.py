@@ -0,0 +1,47 @@
+from uuid import uuid4
+
+from .cache import VersionedCache
+
+
+permission_cache = VersionedCache("permissions", "perms")
+
+VERSION_KEY = "perms:version"
+
+
+def permissions_version():
+    # Versão aleatória: se a chave for descartada, a nova nunca coincide com
+    # uma versão antiga que ainda tenha entradas guardadas
+    return permission_cache.cache.get_or_set(
+        VERSION_KEY, lambda: uuid4().hex, timeout=None
+    )
+
+
+def bump_permissions_version():
+    """Descarta as permissões guardadas de todos os usuários."""
+    permission_cache.cache.set(VERSION_KEY, uuid4().hex, timeout=None)
+
+
+def clear_user_permissions(*user_ids):
+    version = permissions_version()
+    permission_cache.cache.delete_many(
+        [permission_cache.make_key(version, user_id) for user_id in user_ids]
+    )
+
+
+def get_user_permissions(user):
+    """
+    Conjunto "app_label.codename" de permissões do usuário (dele e dos seus
+    grupos), guardado entre requisições pela versão das permissões.
+    """
+    return permission_cache.get_or_set(
+        (permissions_version(), user.pk), lambda: user.get_all_permissions()
+    )
+
+
+def has_cached_perm(user, perm):
+    """Mesmo resultado de user.has_perm(perm), sem ler o banco a cada requisição."""
+    if not user.is_active:
+        return False
+    if user.is_superuser:
+        return True
+    return perm in get_user_permissions(user)
@@ -1,7 +1,11 @@
 from rest_framework import permissions
 
+from .permission_cache import has_cached_perm
+
 
 class GlobalDefaultPermission(permissions.BasePermission):
+    # Codename por (classe da view, método), montado uma vez por processo
+    _codenames = {}
 
     def has_permission(self, request, view):
         if request.method in ["GET", "HEAD", "OPTIONS"]:
@@ -15,7 +19,7 @@ class GlobalDefaultPermission(permissions.BasePermission):
         if not model_permission_codename:
             return False
 
-        return request.user.has_perm(model_permission_codename)
+        return has_cached_perm(request.user, model_permission_codename)
 
     def has_object_permission(self, request, view, obj):
         if request.user.is_superuser:
@@ -27,6 +31,15 @@ class GlobalDefaultPermission(permissions.BasePermission):
         return True
 
     def __get_model_permission_codename(self, method, view):
+        key = (type(view), method)
+        if key not in self._codenames:
+            self._codenames[key] = self.__build_model_permission_codename(
+                method=method,
+                view=view,
+            )
+        return self._codenames[key]
+
+    def __build_model_permission_codename(self, method, view):
         try:
             model_name = view.queryset.model._meta.model_name
             app_label = view.queryset.model._meta.app_label
@@ -12,7 +12,13 @@ class PersonSerializer(serializers.ModelSerializer):
         return value
 
     def validate_email(self, value):
-        if User.objects.filter(email=value).exists():
+        # Importações em lote passam os e-mails já usados, lidos de uma vez
+        emails_in_use = self.context.get("emails_in_use")
+        if emails_in_use is not None:
+            in_use = value in emails_in_use
+        else:
+            in_use = User.objects.filter(email=value).exists()
+        if in_use:
             raise serializers.ValidationError("This email is already in use")
         return value
 
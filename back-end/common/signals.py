@@ -0,0 +1,32 @@
+from django.contrib.auth.models import Group, Permission, User
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .permission_cache import bump_permissions_version, clear_user_permissions
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def clear_permissions_on_user_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        clear_user_permissions(instance.pk)
+    elif pk_set:
+        # group.user_set.add(...) ou permission.user_set.add(...)
+        clear_user_permissions(*pk_set)
+    else:
+        # clear() pelo lado do grupo: os usuários afetados não vêm no sinal
+        bump_permissions_version()
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+@receiver(post_delete, sender=Group)
+def clear_permissions_on_permission_change(sender, **kwargs):
+    action = kwargs.get("action")
+    if action is None or action.startswith("post_"):
+        bump_permissions_version()
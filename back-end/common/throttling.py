@@ -0,0 +1,113 @@
+import threading
+
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+
+
+REJECTED_KEY = "throttle:rejected:%s"
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Throttle de balde de fichas sobre o cache "throttle" do Django.
+
+    A taxa segue o formato do DRF ("10/min"): o balde comporta 10 fichas e
+    reenche 10 por minuto. Cada requisição gasta uma ficha; sem ficha, ela é
+    recusada em check_throttles, antes de a view rodar (e de qualquer hash
+    de senha). Cada recusa soma no contador do escopo (rejection_counts).
+
+    O estado é só (fichas, instante), então funciona com o LocMemCache. A
+    trava serializa a leitura e a escrita do balde dentro do processo.
+    """
+
+    cache = caches["throttle"]
+    _lock = threading.Lock()
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        refill = self.num_requests / self.duration
+        with self._lock:
+            now = self.timer()
+            tokens, updated = self.cache.get(self.key, (self.num_requests, now))
+            tokens = min(self.num_requests, tokens + (now - updated) * refill)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            # Depois de duration segundos parado o balde está cheio de novo,
+            # que é o mesmo que não ter a chave
+            self.cache.set(self.key, (tokens, now), self.duration)
+
+        self.tokens = tokens
+        if not allowed:
+            record_rejection(self.scope)
+        return allowed
+
+    def wait(self):
+        return (1 - self.tokens) * self.duration / self.num_requests
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    """Um balde por IP de origem."""
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": self.get_ident(request),
+        }
+
+
+class UsernameTokenBucketThrottle(TokenBucketThrottle):
+    """Um balde por nome de usuário enviado no corpo, vindo de qualquer IP."""
+
+    username_field = "username"
+
+    def get_cache_key(self, request, view):
+        data = request.data
+        username = data.get(self.username_field) if hasattr(data, "get") else None
+        if not isinstance(username, str) or not username.strip():
+            return None
+        return self.cache_format % {
+            "scope": self.scope,
+            "ident": username.strip().lower(),
+        }
+
+
+class LoginIPThrottle(IPTokenBucketThrottle):
+    scope = "login_ip"
+
+
+class LoginUsernameThrottle(UsernameTokenBucketThrottle):
+    scope = "login_username"
+
+
+class RegistrationIPThrottle(IPTokenBucketThrottle):
+    scope = "registration_ip"
+
+
+class RegistrationEmailThrottle(UsernameTokenBucketThrottle):
+    scope = "registration_email"
+    username_field = "email"
+
+
+def record_rejection(scope):
+    cache = TokenBucketThrottle.cache
+    key = REJECTED_KEY % scope
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # A chave saiu do cache entre o add e o incr
+        cache.set(key, 1, timeout=None)
+
+
+def rejection_counts():
+    """Requisições recusadas por escopo desde que o cache foi iniciado."""
+    scopes = list(TokenBucketThrottle.THROTTLE_RATES)
+    counts = TokenBucketThrottle.cache.get_many([REJECTED_KEY % s for s in scopes])
+    return {scope: counts.get(REJECTED_KEY % scope, 0) for scope in scopes}
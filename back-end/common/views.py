@@ -0,0 +1,18 @@
+class SparseFieldsetMixin:
+    """
+    Permite que o cliente peça só as colunas que vai exibir: ?fields=id,name.
+    Campos não pedidos nem chegam a ser serializados.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+
+        requested = self.request.query_params.get("fields")
+        if self.request.method != "GET" or not requested:
+            return serializer
+
+        target = getattr(serializer, "child", serializer)
+        allowed = {field.strip() for field in requested.split(",")}
+        for name in set(target.fields) - allowed:
+            target.fields.pop(name)
+        return serializer
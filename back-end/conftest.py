@@ -0,0 +1,12 @@
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    # Os ids voltam a ser reutilizados entre testes, então nenhum cache pode
+    # sobreviver de um teste para o outro.
+    for alias in settings.CACHES:
+        caches[alias].clear()
+    yield
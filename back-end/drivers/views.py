@@ -3,11 +3,15 @@ from .models import Driver
 from .serializers import DriverSerializer, DriverCreateSerializer
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from common.permissions import GlobalDefaultPermission
+from common.pagination import KeysetCursorPagination
+from common.views import SparseFieldsetMixin
 
 
-class DriverListCreateView(ListCreateAPIView):
+class DriverListCreateView(SparseFieldsetMixin, ListCreateAPIView):
     permission_classes = (IsAuthenticated, GlobalDefaultPermission)
     queryset = Driver.objects.all()
+    pagination_class = KeysetCursorPagination
+    cursor_ordering = "id"
 
     def get_serializer_class(self):
         if self.request.method == "POST":
@@ -1,3 +1,11 @@
 from django.contrib import admin
+from .models import Holiday
 
-# Register your models here.
+
+class HolidayModelAdmin(admin.ModelAdmin):
+    list_display = ("name", "start_date", "end_date")
+    search_fields = ("name",)
+    date_hierarchy = "start_date"
+
+
+admin.site.register(Holiday, HolidayModelAdmin)
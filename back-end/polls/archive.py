@@ -0,0 +1,191 @@
+import time
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from trips.models import ArchivedTrip, Trip, TripStop
+from .models import (
+    OPTIONS,
+    ArchivedPoll,
+    ArchivedVote,
+    BoardingListSnapshot,
+    Poll,
+    PollOptionCounts,
+    Vote,
+)
+
+
+# Enquetes por lote e votos por transação
+ARCHIVE_CHUNK_SIZE = 50
+VOTE_BATCH_SIZE = 1000
+
+
+def _table(model):
+    return connection.ops.quote_name(model._meta.db_table)
+
+
+def _columns(*names):
+    # "date" e "option" são palavras reservadas em alguns bancos
+    return ", ".join(connection.ops.quote_name(name) for name in names)
+
+
+def _placeholders(values):
+    return ", ".join(["%s"] * len(values))
+
+
+def _snapshot_polls(cursor, poll_ids, archived_at):
+    """
+    Grava as enquetes do lote no histórico com a contagem por opção, antes de
+    qualquer voto sair. Enquetes já gravadas (execução interrompida e
+    retomada) são mantidas como estão.
+    """
+    ids = _placeholders(poll_ids)
+    option = connection.ops.quote_name("option")
+    counts = ", ".join(
+        f"SUM(CASE WHEN v.{option} = %s THEN 1 ELSE 0 END)" for _ in OPTIONS
+    )
+    options = [value for value, _ in OPTIONS]
+
+    cursor.execute(
+        f"INSERT INTO {_table(ArchivedPoll)} "
+        f"({_columns('id', 'date', 'status', *options, 'archived_at')}) "
+        f"SELECT p.id, p.{_columns('date')}, p.{_columns('status')}, {counts}, %s "
+        f"FROM {_table(Poll)} p LEFT JOIN {_table(Vote)} v ON v.poll_id = p.id "
+        f"WHERE p.id IN ({ids}) AND NOT EXISTS "
+        f"(SELECT 1 FROM {_table(ArchivedPoll)} a WHERE a.id = p.id) "
+        f"GROUP BY p.id, p.{_columns('date')}, p.{_columns('status')}",
+        [*options, archived_at, *poll_ids],
+    )
+
+
+def _move_votes(cursor, poll_ids, batch_size):
+    """Move até batch_size votos do lote, em ordem de chave primária."""
+    cursor.execute(
+        f"SELECT id FROM {_table(Vote)} WHERE poll_id IN ({_placeholders(poll_ids)}) "
+        f"ORDER BY id LIMIT %s",
+        [*poll_ids, batch_size],
+    )
+    vote_ids = [row[0] for row in cursor.fetchall()]
+    if not vote_ids:
+        return 0
+
+    ids = _placeholders(vote_ids)
+    cursor.execute(
+        f"INSERT INTO {_table(ArchivedVote)} "
+        f"({_columns('poll_id', 'poll_date', 'student_id', 'option', 'voted_at')}) "
+        f"SELECT v.poll_id, p.{_columns('date')}, v.student_id, "
+        f"v.{_columns('option')}, v.voted_at "
+        f"FROM {_table(Vote)} v JOIN {_table(Poll)} p ON p.id = v.poll_id "
+        f"WHERE v.id IN ({ids})",
+        vote_ids,
+    )
+    cursor.execute(f"DELETE FROM {_table(Vote)} WHERE id IN ({ids})", vote_ids)
+    return len(vote_ids)
+
+
+def _move_trips_and_polls(cursor, poll_ids):
+    """
+    Move as viagens do lote e remove paradas, contadores, listas congeladas e
+    enquetes.
+    """
+    ids = _placeholders(poll_ids)
+    trip_columns = _columns(
+        "id",
+        "poll_id",
+        "poll_date",
+        "trip_type",
+        "status",
+        "stop_count",
+        "started_at",
+        "completed_at",
+    )
+    cursor.execute(
+        f"INSERT INTO {_table(ArchivedTrip)} ({trip_columns}) "
+        f"SELECT t.id, t.poll_id, p.{_columns('date')}, t.trip_type, "
+        f"t.{_columns('status')}, "
+        f"(SELECT COUNT(*) FROM {_table(TripStop)} s WHERE s.trip_id = t.id), "
+        f"t.started_at, t.completed_at "
+        f"FROM {_table(Trip)} t JOIN {_table(Poll)} p ON p.id = t.poll_id "
+        f"WHERE t.poll_id IN ({ids})",
+        poll_ids,
+    )
+    trips = cursor.rowcount
+
+    cursor.execute(
+        f"DELETE FROM {_table(TripStop)} WHERE trip_id IN "
+        f"(SELECT id FROM {_table(Trip)} WHERE poll_id IN ({ids}))",
+        poll_ids,
+    )
+    for model in (Trip, PollOptionCounts, BoardingListSnapshot):
+        cursor.execute(
+            f"DELETE FROM {_table(model)} WHERE poll_id IN ({ids})", poll_ids
+        )
+    cursor.execute(f"DELETE FROM {_table(Poll)} WHERE id IN ({ids})", poll_ids)
+    return trips
+
+
+def archive_polls(
+    polls,
+    chunk_size=ARCHIVE_CHUNK_SIZE,
+    batch_size=VOTE_BATCH_SIZE,
+    time_budget=None,
+    progress=None,
+):
+    """
+    Move as enquetes do queryset (com votos e viagens) para as tabelas de
+    histórico e as remove das tabelas principais, sem o delete() em cascata
+    do Django, que carrega todos os votos e viagens em memória.
+
+    As enquetes são tratadas em lotes de chunk_size, em ordem de chave
+    primária; os votos de cada lote saem em transações curtas de até
+    batch_size linhas, para não segurar locks em polls_vote enquanto alunos
+    votam. Com time_budget (segundos), o trabalho para entre dois lotes
+    quando o tempo acaba e pode ser retomado depois com a mesma chamada.
+    progress, se informado, recebe uma linha de texto por lote concluído.
+
+    Retorna {"polls", "votes", "trips", "dates", "complete"}.
+    """
+    result = {"polls": 0, "votes": 0, "trips": 0, "dates": [], "complete": True}
+    archived_at = connection.ops.adapt_datetimefield_value(timezone.now())
+    started = time.monotonic()
+    total = polls.count() if progress else None
+
+    def out_of_time():
+        if time_budget is not None and time.monotonic() - started >= time_budget:
+            result["complete"] = False
+            return True
+        return False
+
+    while not out_of_time():
+        # O lote anterior já saiu da tabela: basta pegar os primeiros de novo
+        chunk = list(polls.order_by("id").values_list("id", "date")[:chunk_size])
+        if not chunk:
+            break
+
+        poll_ids = [poll_id for poll_id, _ in chunk]
+        with transaction.atomic(), connection.cursor() as cursor:
+            _snapshot_polls(cursor, poll_ids, archived_at)
+
+        while True:
+            if out_of_time():
+                return result
+            with transaction.atomic(), connection.cursor() as cursor:
+                moved = _move_votes(cursor, poll_ids, batch_size)
+            result["votes"] += moved
+            if moved < batch_size:
+                break
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            result["trips"] += _move_trips_and_polls(cursor, poll_ids)
+
+        result["polls"] += len(chunk)
+        result["dates"].extend(day for _, day in chunk)
+
+        if progress:
+            progress(
+                f"Archived {result['polls']}/{total} poll(s), "
+                f"{result['votes']} vote(s), {result['trips']} trip(s) "
+                f"in {time.monotonic() - started:.1f}s"
+            )
+
+    return result
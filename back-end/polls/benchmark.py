@@ -0,0 +1,154 @@
+import json
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from students.models import Student
+from trips.models import Trip
+from .models import Poll, Vote
+
+
+# Controle de transação do próprio medidor, fora da conta de consultas
+SAVEPOINT_SQL = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def benchmark_host():
+    # O APIClient passa pela validação de ALLOWED_HOSTS como uma requisição real
+    for host in settings.ALLOWED_HOSTS:
+        if host != "*":
+            return host.lstrip(".")
+    return "localhost"
+
+
+def endpoints():
+    """
+    Endpoints medidos: (nome, método, url, corpo, rollback). Usa a viagem de
+    ida em andamento mais recente do banco atual e a enquete dela.
+    """
+    trip = (
+        Trip.objects.filter(status="in_progress", trip_type="outbound")
+        .order_by("-id")
+        .first()
+    )
+    if trip is None:
+        return None
+
+    boarding_list = reverse("poll-boarding-list", args=[trip.poll_id])
+    summary = reverse("poll-list") + "?summary=true"
+    outbound = boarding_list + "?trip_type=outbound"
+    inbound = boarding_list + "?trip_type=return"
+    next_stop = reverse("trip-next-stop", args=[trip.pk])
+    return [
+        ("poll-list", "get", reverse("poll-list"), None, False),
+        ("poll-list-summary", "get", summary, None, False),
+        ("boarding-list-outbound", "get", outbound, None, False),
+        ("boarding-list-return", "get", inbound, None, False),
+        ("trip-detail", "get", reverse("trip-detail", args=[trip.pk]), None, False),
+        # Avança a viagem: cada chamada é desfeita para medir sempre o mesmo passo
+        ("trip-next-stop", "post", next_stop, {"version": trip.version}, True),
+        ("student-payment-list", "get", reverse("student-payment-list"), None, False),
+    ]
+
+
+def measure(client, method, url, data, iterations, rollback):
+    """
+    Chama o endpoint iterations vezes e devolve latências (a primeira chamada,
+    com caches frios, é informada à parte), consultas e tamanho da resposta.
+    """
+    latencies, queries, sizes, statuses = [], [], [], set()
+    for _ in range(iterations + 1):
+        with transaction.atomic(), CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            response = getattr(client, method)(url, data)
+            latencies.append(time.perf_counter() - started)
+            transaction.set_rollback(rollback)
+        queries.append(
+            sum(
+                1
+                for query in ctx.captured_queries
+                if not query["sql"].startswith(SAVEPOINT_SQL)
+            )
+        )
+        sizes.append(len(response.content))
+        statuses.add(response.status_code)
+
+    cold, warm = latencies[0], sorted(latencies[1:])
+    return {
+        "status": sorted(statuses),
+        "cold_ms": round(cold * 1000, 2),
+        "p50_ms": round(percentile(warm, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(warm, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(warm, 0.99) * 1000, 2),
+        "queries": max(queries[1:]),
+        "bytes": max(sizes[1:]),
+    }
+
+
+def run_benchmarks(user, iterations, only=None):
+    """Mede cada endpoint autenticado como user. Retorna {nome: métricas}."""
+    targets = endpoints()
+    if targets is None:
+        return None
+
+    client = APIClient(HTTP_HOST=benchmark_host())
+    client.force_authenticate(user=user)
+    results = {}
+    for name, method, url, data, rollback in targets:
+        if only and name not in only:
+            continue
+        results[name] = measure(client, method, url, data, iterations, rollback)
+    return results
+
+
+def dataset_size():
+    return {
+        "students": Student.objects.count(),
+        "polls": Poll.objects.count(),
+        "votes": Vote.objects.count(),
+        "trips": Trip.objects.count(),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compara com uma linha de base salva. Regressão: p95 acima da tolerância
+    (fração) ou mais consultas que antes. Retorna a lista de mensagens.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline["endpoints"].get(name)
+        if previous is None:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms"
+            )
+        if current["queries"] > previous["queries"]:
+            regressions.append(
+                f"{name}: queries {previous['queries']} -> {current['queries']}"
+            )
+    return regressions
+
+
+def load_baseline(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_baseline(path, results):
+    payload = {
+        "vendor": connection.vendor,
+        "dataset": dataset_size(),
+        "endpoints": results,
+    }
+    with open(path, "w") as file:
+        json.dump(payload, file, indent=2, sort_keys=True)
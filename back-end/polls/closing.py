@@ -0,0 +1,64 @@
+from django.db import transaction
+from django.utils import timezone
+
+from trips.manifest import freeze_poll_riders
+from trips.models import Trip
+from .models import OUTBOUND_DEADLINE, RETURN_DEADLINE, Poll
+
+
+def _freeze(poll, trip_type):
+    """
+    Congela a lista de embarque de um tipo de viagem e o plano de paradas da
+    viagem, se ela já foi criada. Viagens criadas depois do fechamento montam
+    o plano na criação (TripCreateView).
+    """
+    freeze_poll_riders(poll, trip_type)
+    trip = Trip.objects.filter(poll=poll, trip_type=trip_type, status="pending").first()
+    if trip is not None:
+        trip.build_stop_plan()
+
+
+def close_due_polls(now=None):
+    """
+    Fecha as fases das enquetes cujo prazo de voto já passou: a ida depois das
+    12h (status "outbound_closed") e a volta depois das 18h ("closed").
+    Enquetes de dias anteriores que ficaram abertas são fechadas por inteiro.
+
+    No fechamento de cada fase a lista de embarque e o plano de paradas da
+    viagem já criada são gravados, e as leituras seguintes não agregam mais
+    votos.
+
+    Retorna [(data, fase)] com as fases fechadas nesta chamada.
+    """
+    now = timezone.localtime(now or timezone.now())
+    today = now.date()
+    closed = []
+
+    outbound_due = Poll.objects.filter(status="open")
+    if now.time() > OUTBOUND_DEADLINE:
+        outbound_due = outbound_due.filter(date__lte=today)
+    else:
+        outbound_due = outbound_due.filter(date__lt=today)
+
+    return_due = Poll.objects.filter(status__in=["open", "outbound_closed"])
+    if now.time() > RETURN_DEADLINE:
+        return_due = return_due.filter(date__lte=today)
+    else:
+        return_due = return_due.filter(date__lt=today)
+
+    for poll in outbound_due.order_by("date"):
+        with transaction.atomic():
+            _freeze(poll, "outbound")
+            poll.status = "outbound_closed"
+            # O status faz parte do ETag: clientes recarregam a lista congelada
+            Poll.objects.filter(pk=poll.pk).update(status=poll.status)
+        closed.append((poll.date, "outbound"))
+
+    for poll in return_due.order_by("date"):
+        with transaction.atomic():
+            _freeze(poll, "return")
+            poll.status = "closed"
+            Poll.objects.filter(pk=poll.pk).update(status=poll.status)
+        closed.append((poll.date, "return"))
+
+    return closed
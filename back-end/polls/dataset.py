@@ -0,0 +1,190 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+from django.utils import timezone
+
+from authentication.models import UserProfile
+from boarding_points.models import BoardingPoint
+from students.models import Student
+from students.universities import get_universities
+from trips.manifest import freeze_poll_riders
+from trips.models import Trip, TripStop
+from .models import Poll, PollOptionCounts, Vote
+
+
+# Prefixo dos usuários e pontos gerados, para poder removê-los depois
+SYNTHETIC_PREFIX = "synthetic-"
+
+# Peso de cada opção nos votos gerados (maioria vai e volta)
+OPTION_WEIGHTS = {
+    "round_trip": 60,
+    "one_way_outbound": 10,
+    "one_way_return": 10,
+    "absent": 20,
+}
+
+SHIFTS = ["M", "A", "E", "M-A", "A-E"]
+
+
+def first_synthetic_day(weeks):
+    """Segunda-feira de weeks semanas atrás: o histórico termina na semana atual."""
+    today = timezone.localdate()
+    return today - timedelta(days=today.weekday(), weeks=weeks - 1)
+
+
+@transaction.atomic
+def generate_dataset(students, weeks, points=30, seed=0, start_date=None):
+    """
+    Gera um conjunto de dados sintético com inserções em lote: students alunos
+    espalhados pelas universidades cadastradas e por points pontos de
+    embarque, weeks semanas de enquetes (segunda a sexta) com votos de todos
+    os alunos e as duas viagens de cada enquete, em todos os estados: as de
+    dias passados concluídas, as de hoje em andamento e as futuras pendentes.
+
+    Enquetes que já existem nas datas são reaproveitadas. seed torna a
+    geração reproduzível.
+
+    Retorna a contagem do que foi criado por tabela.
+    """
+    rng = random.Random(seed)
+    start_date = start_date or first_synthetic_day(weeks)
+    today = timezone.localdate()
+    universities = [university["code"] for university in get_universities()]
+
+    last_order = BoardingPoint.objects.count()
+    bps = BoardingPoint.objects.bulk_create(
+        BoardingPoint(
+            name=f"{SYNTHETIC_PREFIX}ponto-{last_order + i}",
+            address_reference="Ponto gerado",
+            route_order=last_order + i,
+        )
+        for i in range(points)
+    )
+
+    first_user = User.objects.filter(username__startswith=SYNTHETIC_PREFIX).count()
+    users = User.objects.bulk_create(
+        User(username=f"{SYNTHETIC_PREFIX}{first_user + i}@example.com")
+        for i in range(students)
+    )
+    group, _ = Group.objects.get_or_create(name="students")
+    group.user_set.add(*users)
+
+    riders = Student.objects.bulk_create(
+        Student(
+            user=user,
+            name=f"Aluno Sintético {first_user + i:06d}",
+            phone=f"86{rng.randrange(10**9):09d}",
+            class_shift=rng.choice(SHIFTS),
+            university_id=rng.choice(universities),
+            boarding_point=rng.choice(bps),
+            role="student",
+        )
+        for i, user in enumerate(users)
+    )
+    # bulk_create não dispara os sinais que mantêm o perfil dos usuários
+    UserProfile.record(riders)
+
+    dates = [
+        start_date + timedelta(weeks=week, days=day)
+        for week in range(weeks)
+        for day in range(5)
+    ]
+    Poll.objects.bulk_create([Poll(date=day) for day in dates], ignore_conflicts=True)
+    polls = list(Poll.objects.filter(date__in=dates).order_by("date"))
+
+    options = list(OPTION_WEIGHTS)
+    weights = list(OPTION_WEIGHTS.values())
+    votes = 0
+    for poll in polls:
+        chosen = rng.choices(options, weights=weights, k=len(riders))
+        created = Vote.objects.bulk_create(
+            (
+                Vote(student=student, poll=poll, option=option)
+                for student, option in zip(riders, chosen)
+            ),
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+        votes += len(created)
+    poll_ids = [poll.id for poll in polls]
+    PollOptionCounts.rebuild(poll_ids)
+    Poll.bump_data_version(pk__in=poll_ids)
+
+    # Dias passados ficam fechados e com a lista congelada, como em close_polls
+    for poll in polls:
+        if poll.date < today:
+            for trip_type in ("outbound", "return"):
+                freeze_poll_riders(poll, trip_type)
+    Poll.objects.filter(pk__in=poll_ids, date__lt=today).update(status="closed")
+
+    trips = _create_trips(polls, today)
+    return {
+        "boarding_points": len(bps),
+        "students": len(riders),
+        "polls": len(polls),
+        "votes": votes,
+        "trips": trips,
+    }
+
+
+def _create_trips(polls, today):
+    # O último dia de serviço até hoje tem as viagens em andamento (no fim de
+    # semana, a sexta)
+    current = max((poll.date for poll in polls if poll.date <= today), default=None)
+    trips = []
+    for poll in polls:
+        if current and poll.date < current:
+            status = "completed"
+        elif poll.date == current:
+            status = "in_progress"
+        else:
+            status = "pending"
+        for trip_type in ("outbound", "return"):
+            trips.append(Trip(poll=poll, trip_type=trip_type, status=status))
+    Trip.objects.bulk_create(trips, ignore_conflicts=True)
+
+    # Viagens iniciadas têm o plano de paradas congelado, como em start_trip
+    now = timezone.now()
+    created = Trip.objects.filter(poll__in=polls).select_related("poll")
+    stops = []
+    for trip in created:
+        if trip.status == "pending" or trip.stops.exists():
+            continue
+        plan = trip._compute_stop_plan()
+        stops.extend(plan)
+        if trip.status == "in_progress" and plan:
+            Trip.objects.filter(pk=trip.pk).update(
+                current_stop_position=0,
+                current_boarding_point=plan[0].boarding_point_id,
+                current_university=plan[0].university,
+                started_at=now,
+            )
+        elif trip.status == "completed":
+            Trip.objects.filter(pk=trip.pk).update(started_at=now, completed_at=now)
+    TripStop.objects.bulk_create(stops, batch_size=1000)
+    return created.count()
+
+
+@transaction.atomic
+def clear_dataset():
+    """
+    Remove os alunos e pontos sintéticos (os votos saem em cascata) e refaz os
+    contadores das enquetes afetadas. Enquetes e viagens continuam.
+    """
+    poll_ids = list(
+        Vote.objects.filter(student__user__username__startswith=SYNTHETIC_PREFIX)
+        .values_list("poll_id", flat=True)
+        .distinct()
+    )
+    User.objects.filter(username__startswith=SYNTHETIC_PREFIX).delete()
+    # Planos que passam por pontos sintéticos saem inteiros: as viagens voltam
+    # a calcular as paradas pelos votos
+    TripStop.objects.filter(
+        trip__stops__boarding_point__name__startswith=SYNTHETIC_PREFIX
+    ).delete()
+    BoardingPoint.objects.filter(name__startswith=SYNTHETIC_PREFIX).delete()
+    PollOptionCounts.rebuild(poll_ids)
+    Poll.bump_data_version(pk__in=poll_ids)
+    return {"polls": len(poll_ids)}
@@ -0,0 +1,73 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from polls.archive import ARCHIVE_CHUNK_SIZE, VOTE_BATCH_SIZE, archive_polls
+from polls.models import Poll
+
+
+class Command(BaseCommand):
+    help = (
+        "Archive polls older than a date (with their votes and trips) in "
+        "primary-key-ordered batches"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--before",
+            help="Archive polls dated before this day (YYYY-MM-DD, default: today)",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=ARCHIVE_CHUNK_SIZE,
+            help="Polls per batch",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=VOTE_BATCH_SIZE,
+            help="Votes moved per transaction",
+        )
+        parser.add_argument(
+            "--time-budget",
+            type=float,
+            help="Stop after this many seconds; run again to resume",
+        )
+
+    def handle(self, *args, before, chunk_size, batch_size, time_budget, **kwargs):
+        if before:
+            try:
+                before = date.fromisoformat(before)
+            except ValueError:
+                raise CommandError("--before must be a date in YYYY-MM-DD format")
+        else:
+            before = timezone.localtime(timezone.now()).date()
+
+        if chunk_size < 1 or batch_size < 1:
+            raise CommandError("--chunk-size and --batch-size must be positive")
+
+        result = archive_polls(
+            Poll.objects.filter(date__lt=before),
+            chunk_size=chunk_size,
+            batch_size=batch_size,
+            time_budget=time_budget,
+            progress=self.stdout.write,
+        )
+
+        if not result["complete"]:
+            remaining = Poll.objects.filter(date__lt=before).count()
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Time budget reached with {remaining} poll(s) left; "
+                    f"run again to resume"
+                )
+            )
+            return
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Archived {result['polls']} poll(s) before {before}: "
+                f"{result['votes']} vote(s), {result['trips']} trip(s)"
+            )
+        )
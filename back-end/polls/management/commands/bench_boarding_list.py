@@ -0,0 +1,107 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from boarding_points.models import BoardingPoint
+from polls.models import Poll, Vote
+from students.models import Student
+from trips.manifest import aggregate_riders
+
+
+USERNAME_PREFIX = "bench-boarding-"
+UNIVERSITIES = ["IFPI", "CHRISFAPI", "UESPI", "ETC"]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the boarding list aggregation done in Python against the "
+        "database-side aggregation (PostgreSQL only). Synthetic data is rolled back"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--votes",
+            type=int,
+            nargs="+",
+            default=[100, 1000, 10000],
+            help="Vote counts to benchmark",
+        )
+        parser.add_argument("--points", type=int, default=30)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, votes, points, repeat, **kwargs):
+        in_db = connection.vendor == "postgresql"
+        if not in_db:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Database is {connection.vendor}: only the Python path runs"
+                )
+            )
+
+        for size in votes:
+            try:
+                with transaction.atomic():
+                    poll = self.create_dataset(size, points)
+                    for trip_type in ("outbound", "return"):
+                        self.report(size, poll, trip_type, repeat, in_db)
+                    raise Rollback
+            except Rollback:
+                pass
+
+    def create_dataset(self, size, points):
+        bps = BoardingPoint.objects.bulk_create(
+            BoardingPoint(name=f"Bench {i}", route_order=10000 + i)
+            for i in range(points)
+        )
+        users = User.objects.bulk_create(
+            User(username=f"{USERNAME_PREFIX}{i}") for i in range(size)
+        )
+        students = Student.objects.bulk_create(
+            Student(
+                user=user,
+                name=f"Bench {i:05d}",
+                phone="00000000000",
+                class_shift="M",
+                university_id=UNIVERSITIES[i % len(UNIVERSITIES)],
+                boarding_point=bps[i % len(bps)],
+            )
+            for i, user in enumerate(users)
+        )
+        # Uma data bem no futuro para não colidir com enquetes reais
+        poll = Poll.objects.create(
+            date=timezone.localdate() + timedelta(days=3650 + size)
+        )
+        Vote.objects.bulk_create(
+            Vote(student=student, poll=poll, option="round_trip")
+            for student in students
+        )
+        return poll
+
+    def measure(self, poll, trip_type, repeat, in_db):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            groups = aggregate_riders(poll.id, trip_type, in_db=in_db)
+            timings.append(time.perf_counter() - started)
+        return min(timings), groups
+
+    def report(self, size, poll, trip_type, repeat, in_db):
+        python_time, python_groups = self.measure(poll, trip_type, repeat, False)
+        line = f"{size} votes, {trip_type}: python {python_time * 1000:.1f}ms"
+
+        if in_db:
+            db_time, db_groups = self.measure(poll, trip_type, repeat, True)
+            speedup = python_time / db_time
+            line += f" | database {db_time * 1000:.1f}ms ({speedup:.1f}x)"
+            if db_groups != python_groups:
+                line += " | RESULTS DIFFER"
+
+        self.stdout.write(line)
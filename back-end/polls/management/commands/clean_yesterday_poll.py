@@ -1,11 +1,12 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
+from polls.archive import archive_polls
 from polls.models import Poll
 from datetime import timedelta
 
 
 class Command(BaseCommand):
-    help = "Remove yesterday's poll (runs Tuesday to Friday)"
+    help = "Archive yesterday's poll (runs Tuesday to Friday)"
 
     def handle(self, *args, **kwargs):
         today = timezone.localtime(timezone.now()).date()
@@ -21,13 +22,11 @@ class Command(BaseCommand):
 
         yesterday = today - timedelta(days=1)
         
-        deleted_polls = Poll.objects.filter(date=yesterday)
-        count = deleted_polls.count()
-        deleted_polls.delete()
+        archived = archive_polls(Poll.objects.filter(date=yesterday))
 
-        if count > 0:
+        if archived["polls"] > 0:
             self.stdout.write(
-                self.style.SUCCESS(f"Deleted poll for date: {yesterday}")
+                self.style.SUCCESS(f"Archived poll for date: {yesterday}")
             )
         else:
             self.stdout.write(
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+from polls.closing import close_due_polls
+
+
+class Command(BaseCommand):
+    help = (
+        "Close poll phases past their voting deadline (outbound at 12:00, "
+        "return at 18:00) and freeze their boarding lists and stop plans"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep running and check again every --interval seconds",
+        )
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=60,
+            help="Seconds between checks when running with --loop",
+        )
+
+    def handle(self, *args, loop=False, interval=60, **kwargs):
+        while True:
+            closed = close_due_polls()
+            for day, phase in closed:
+                self.stdout.write(
+                    self.style.SUCCESS(f"Closed {phase} voting for poll {day}")
+                )
+            if not loop:
+                if not closed:
+                    self.stdout.write("No poll phase due for closing")
+                return
+            time.sleep(interval)
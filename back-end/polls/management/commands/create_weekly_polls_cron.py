@@ -1,13 +1,26 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
+from polls.archive import archive_polls
 from polls.models import Poll
+from polls.scheduler import schedule_polls
 from datetime import timedelta
 
 
 class Command(BaseCommand):
     help = "Create polls for next week (Monday to Friday) and remove old polls"
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--weeks",
+            type=int,
+            default=None,
+            help="How many weeks ahead to generate (default: POLL_SCHEDULE_WEEKS)",
+        )
+
+    def handle(self, *args, weeks=None, **kwargs):
+        if weeks is not None and weeks < 1:
+            raise CommandError("--weeks must be a positive number")
+
         today = timezone.localtime(timezone.now()).date()
         
         if today.weekday() != 5:
@@ -18,16 +31,17 @@ class Command(BaseCommand):
 
         next_monday = today + timedelta(days=2)
         
-        Poll.objects.filter(date__lt=next_monday).delete()
+        archive_polls(
+            Poll.objects.filter(date__lt=next_monday), progress=self.stdout.write
+        )
         
-        created_polls = []
-        for i in range(5):
-            poll_date = next_monday + timedelta(days=i)
-            poll, created = Poll.objects.get_or_create(
-                date=poll_date, defaults={"status": "open"}
+        schedule = schedule_polls(next_monday, weeks)
+        created_polls = [str(day) for day in schedule["created"]]
+
+        if schedule["skipped"]:
+            self.stdout.write(
+                f"Skipped holidays: {', '.join(str(day) for day in schedule['skipped'])}"
             )
-            if created:
-                created_polls.append(str(poll_date))
 
         if created_polls:
             self.stdout.write(
@@ -35,7 +49,8 @@ class Command(BaseCommand):
                     f"Created polls for dates: {', '.join(created_polls)}"
                 )
             )
+            self.stdout.write(f"Applied {schedule['default_votes']} default vote(s)")
         else:
             self.stdout.write(
                 self.style.SUCCESS("All polls for next week already exist")
-            )
\ No newline at end of file
+            )
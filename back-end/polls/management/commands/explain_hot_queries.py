@@ -0,0 +1,175 @@
+import json
+import re
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from boarding_points.models import BoardingPoint
+from polls.dataset import SYNTHETIC_PREFIX, generate_dataset
+from polls.models import Poll, Vote
+from students.models import Student
+from students.universities import get_universities
+from trips.manifest import OUTBOUND_OPTIONS, RETURN_OPTIONS
+from trips.models import Trip
+
+
+def hot_queries(poll, point, university):
+    """
+    Formatos de consulta mais frequentes das listas de embarque e viagens:
+    (nome, queryset, tabelas que não podem ser lidas por inteiro).
+    """
+    return [
+        (
+            "boarding list (outbound)",
+            Vote.objects.filter(
+                poll=poll,
+                option__in=OUTBOUND_OPTIONS,
+                student__boarding_point__isnull=False,
+            ).values("student_id", "student__name", "student__boarding_point"),
+            ["polls_vote"],
+        ),
+        (
+            "boarding list (return)",
+            Vote.objects.filter(poll=poll, option__in=RETURN_OPTIONS).values(
+                "student_id", "student__name", "student__university"
+            ),
+            ["polls_vote"],
+        ),
+        (
+            "poll option counts",
+            Vote.objects.filter(poll=poll).values("option").annotate(total=Count("id")),
+            ["polls_vote"],
+        ),
+        (
+            "riders at university",
+            Vote.objects.filter(
+                poll=poll, option__in=RETURN_OPTIONS, student__university=university
+            ).values("student_id"),
+            ["polls_vote"],
+        ),
+        (
+            "students at boarding point",
+            Student.objects.filter(boarding_point=point)
+            .order_by("name")
+            .values("id", "name"),
+            ["students_student"],
+        ),
+        (
+            "trips of a poll",
+            Trip.objects.filter(poll=poll, trip_type="outbound"),
+            ["trips_trip"],
+        ),
+        (
+            "trips by status",
+            Trip.objects.filter(status="in_progress").order_by("-id")[:20],
+            ["trips_trip"],
+        ),
+        ("latest trips", Trip.objects.order_by("-created_at")[:20], ["trips_trip"]),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Run EXPLAIN (ANALYZE on PostgreSQL) on the hot vote, student and trip "
+        "queries over a seeded dataset and fail if any of them reads a whole "
+        "table. The dataset is rolled back at the end"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=2000)
+        parser.add_argument("--points", type=int, default=30)
+        parser.add_argument("--weeks", type=int, default=26)
+        parser.add_argument(
+            "--force-index",
+            action="store_true",
+            help=(
+                "PostgreSQL: disable sequential scans in the planner, so a scan "
+                "only shows up when no index can serve the query (small datasets)"
+            ),
+        )
+        parser.add_argument(
+            "--plans", action="store_true", help="Print the full query plans"
+        )
+
+    def handle(self, *args, students, points, weeks, force_index, plans, **kwargs):
+        postgres = connection.vendor == "postgresql"
+        failures = []
+
+        with transaction.atomic():
+            poll, point, university = self.seed(students, points, weeks)
+            with connection.cursor() as cursor:
+                if postgres:
+                    for table in ("polls_vote", "students_student", "trips_trip"):
+                        cursor.execute(f"ANALYZE {table}")
+                    if force_index:
+                        cursor.execute("SET LOCAL enable_seqscan = off")
+
+            for label, queryset, tables in hot_queries(poll, point, university):
+                if postgres:
+                    plan, elapsed, scanned = self.explain_postgres(queryset, tables)
+                else:
+                    plan, elapsed, scanned = self.explain_sqlite(queryset, tables)
+
+                status = "ok"
+                if scanned:
+                    status = f"FULL SCAN on {', '.join(scanned)}"
+                    failures.append(label)
+                self.stdout.write(f"{label}: {elapsed * 1000:.2f}ms | {status}")
+                if plans or scanned:
+                    self.stdout.write(plan)
+
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(
+                f"{len(failures)} hot query(ies) read a whole table: "
+                + ", ".join(failures)
+            )
+        self.stdout.write(self.style.SUCCESS("All hot queries use an index"))
+
+    def seed(self, students, points, weeks):
+        # Datas bem no futuro para não colidir com enquetes reais
+        start = timezone.localdate() + timedelta(days=3650)
+        start -= timedelta(days=start.weekday())
+        generate_dataset(students, weeks, points=points, start_date=start)
+
+        polls = Poll.objects.filter(date__gte=start).order_by("date")
+        poll = polls[polls.count() // 2]
+        point = BoardingPoint.objects.filter(name__startswith=SYNTHETIC_PREFIX).first()
+        return poll, point, get_universities()[0]["code"]
+
+    def explain_postgres(self, queryset, tables):
+        # O psycopg já decodifica o plano ([{...}]) e o Django reserializa cada
+        # item, então o texto costuma ser só o objeto; aceita as duas formas
+        plan = json.loads(queryset.explain(format="json", analyze=True))
+        if isinstance(plan, list):
+            plan = plan[0]
+
+        scanned = []
+        nodes = [plan["Plan"]]
+        while nodes:
+            node = nodes.pop()
+            nodes.extend(node.get("Plans", []))
+            if node["Node Type"] == "Seq Scan" and node["Relation Name"] in tables:
+                scanned.append(node["Relation Name"])
+
+        return json.dumps(plan, indent=2), plan["Execution Time"] / 1000, scanned
+
+    def explain_sqlite(self, queryset, tables):
+        plan = queryset.explain()
+        started = time.perf_counter()
+        list(queryset)
+        elapsed = time.perf_counter() - started
+
+        scanned = []
+        for line in plan.splitlines():
+            # "SCAN t" lê a tabela inteira; "SCAN t USING INDEX" segue um índice
+            match = re.search(r"\bSCAN (?:TABLE )?(\w+)(.*)$", line)
+            if match and match.group(1) in tables and "USING" not in match.group(2):
+                scanned.append(match.group(1))
+
+        return plan, elapsed, scanned
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from polls.models import PollOptionCounts
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-poll option counters from votes and verify them"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only verify the counters, without rewriting them",
+        )
+        parser.add_argument(
+            "--poll",
+            type=int,
+            action="append",
+            dest="poll_ids",
+            help="Restrict to the given poll id (repeatable)",
+        )
+
+    def handle(self, *args, check=False, poll_ids=None, **kwargs):
+        if not check:
+            rebuilt = PollOptionCounts.rebuild(poll_ids)
+            self.stdout.write(f"Rebuilt counters for {rebuilt} poll(s)")
+
+        mismatches = PollOptionCounts.find_mismatches(poll_ids)
+        for poll_id, counts in mismatches.items():
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Poll {poll_id}: stored {counts['stored']}, "
+                    f"expected {counts['expected']}"
+                )
+            )
+
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} poll(s) with wrong counters")
+
+        self.stdout.write(self.style.SUCCESS("Poll counters match the votes"))
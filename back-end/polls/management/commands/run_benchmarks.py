@@ -0,0 +1,68 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from polls.benchmark import compare, load_baseline, run_benchmarks, save_baseline
+from polls.dataset import SYNTHETIC_PREFIX
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure latency percentiles, query counts and payload sizes of the main "
+        "endpoints against the current database (see seed_dataset), and save or "
+        "compare JSON baselines"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=30)
+        parser.add_argument(
+            "--endpoint",
+            action="append",
+            dest="only",
+            help="Only measure the given endpoint (repeatable)",
+        )
+        parser.add_argument("--save", metavar="PATH", help="Write results as JSON")
+        parser.add_argument(
+            "--compare",
+            dest="baseline",
+            metavar="PATH",
+            help="Fail if results regress against this JSON baseline",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.2,
+            help="Allowed p95 increase over the baseline (fraction, default 0.2)",
+        )
+
+    def handle(self, *args, iterations, only, save, baseline, tolerance, **kwargs):
+        user, _ = User.objects.get_or_create(
+            username=f"{SYNTHETIC_PREFIX}benchmark-admin",
+            defaults={"is_staff": True},
+        )
+
+        results = run_benchmarks(user, iterations, only)
+        if results is None:
+            raise CommandError(
+                "No outbound trip in progress to measure; run seed_dataset first"
+            )
+
+        for name, metrics in results.items():
+            self.stdout.write(
+                f"{name}: p50 {metrics['p50_ms']}ms p95 {metrics['p95_ms']}ms "
+                f"p99 {metrics['p99_ms']}ms (cold {metrics['cold_ms']}ms) | "
+                f"{metrics['queries']} queries | {metrics['bytes']} bytes | "
+                f"HTTP {'/'.join(str(code) for code in metrics['status'])}"
+            )
+
+        if save:
+            save_baseline(save, results)
+            self.stdout.write(self.style.SUCCESS(f"Baseline saved to {save}"))
+
+        if baseline:
+            regressions = compare(results, load_baseline(baseline), tolerance)
+            for regression in regressions:
+                self.stdout.write(self.style.WARNING(regression))
+            if regressions:
+                raise CommandError(
+                    f"{len(regressions)} regression(s) against {baseline}"
+                )
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {baseline}"))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from polls.dataset import clear_dataset, generate_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic dataset with bulk inserts: students across "
+        "universities and boarding points, weeks of polls with votes, and trips "
+        "in every state"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", type=int, default=1000)
+        parser.add_argument("--weeks", type=int, default=8)
+        parser.add_argument("--points", type=int, default=30)
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Random seed, for reproducible data"
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Remove the previously generated students and boarding points first",
+        )
+
+    def handle(self, *args, students, weeks, points, seed, clear, **kwargs):
+        if clear:
+            cleared = clear_dataset()
+            self.stdout.write(f"Removed synthetic data from {cleared['polls']} poll(s)")
+
+        if students <= 0 or weeks <= 0:
+            return
+
+        created = generate_dataset(
+            students=students, weeks=weeks, points=points, seed=seed
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Generated "
+                + ", ".join(f"{count} {table}" for table, count in created.items())
+            )
+        )
@@ -0,0 +1,137 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib import error, request
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from authentication.serializers import CustomTokenObtainPairSerializer
+from polls.benchmark import percentile
+from polls.models import Poll, PollOptionCounts
+from students.models import Student
+
+
+USERNAME_PREFIX = "vote-burst-"
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test for the voting endpoints: many students vote and then change "
+        "their vote at the same time against a running server"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--base-url",
+            default="http://localhost:8000/api/v1/",
+            help="API root of the running server",
+        )
+        parser.add_argument("--voters", type=int, default=300)
+        parser.add_argument("--concurrency", type=int, default=100)
+        parser.add_argument(
+            "--mode",
+            choices=["set", "legacy"],
+            default="set",
+            help="set: PUT votes/set/; legacy: votes/create/ then votes/<pk>/update/",
+        )
+        parser.add_argument(
+            "--keep",
+            action="store_true",
+            help="Keep the generated students and poll after the run",
+        )
+
+    def handle(self, *args, base_url, voters, concurrency, mode, keep, **kwargs):
+        self.base_url = base_url.rstrip("/") + "/"
+        poll, poll_created = Poll.objects.get_or_create(
+            date=timezone.localdate() + timedelta(days=1)
+        )
+        tokens = self.create_voters(voters)
+
+        try:
+            vote = self.set_vote if mode == "set" else self.legacy_vote
+            for label, option in (("vote", "round_trip"), ("change", "absent")):
+                self.run_round(label, vote, tokens, poll.id, option, concurrency)
+        finally:
+            if not keep:
+                User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+                if poll_created:
+                    poll.delete()
+                else:
+                    PollOptionCounts.rebuild(poll_ids=[poll.id])
+
+    def create_voters(self, count):
+        User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+
+        tokens = []
+        for i in range(count):
+            user = User.objects.create_user(username=f"{USERNAME_PREFIX}{i}")
+            Student.objects.create(
+                user=user,
+                name=f"Vote Burst {i}",
+                phone="00000000000",
+                class_shift="M",
+                university_id="UESPI",
+            )
+            # Mesmo token do login: com os claims de aluno a API não lê o banco
+            refresh = CustomTokenObtainPairSerializer.get_token(user)
+            tokens.append(str(refresh.access_token))
+        return tokens
+
+    def run_round(self, label, vote, tokens, poll_id, option, concurrency):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(lambda token: vote(token, poll_id, option), tokens))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for latency, ok in results)
+        errors = sum(1 for _, ok in results if not ok)
+        self.stdout.write(
+            f"{label}: {len(results)} voters in {elapsed:.2f}s "
+            f"({len(results) / elapsed:.0f}/s), {errors} error(s) | "
+            f"p50 {percentile(latencies, 0.50) * 1000:.0f}ms "
+            f"p95 {percentile(latencies, 0.95) * 1000:.0f}ms "
+            f"p99 {percentile(latencies, 0.99) * 1000:.0f}ms "
+            f"max {latencies[-1] * 1000:.0f}ms"
+        )
+
+    def call(self, method, path, token, payload=None):
+        data = json.dumps(payload).encode() if payload is not None else None
+        req = request.Request(
+            self.base_url + path,
+            data=data,
+            method=method,
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Content-Type": "application/json",
+            },
+        )
+        try:
+            with request.urlopen(req, timeout=30) as response:
+                return response.status, json.loads(response.read() or b"null")
+        except error.HTTPError as exc:
+            return exc.code, None
+
+    def set_vote(self, token, poll_id, option):
+        started = time.perf_counter()
+        code, _ = self.call(
+            "PUT", "votes/set/", token, {"poll": poll_id, "option": option}
+        )
+        return time.perf_counter() - started, code in (200, 201)
+
+    def legacy_vote(self, token, poll_id, option):
+        # O cliente antigo tenta criar e, se já votou, procura o voto e atualiza
+        started = time.perf_counter()
+        code, _ = self.call(
+            "POST", "votes/create/", token, {"poll": poll_id, "option": option}
+        )
+        if code == 400:
+            code, page = self.call("GET", "votes/?paginate=false", token)
+            vote = next((v for v in page or [] if v["poll"] == poll_id), None)
+            if vote is not None:
+                code, _ = self.call(
+                    "PATCH", f"votes/{vote['id']}/update/", token, {"option": option}
+                )
+        return time.perf_counter() - started, code in (200, 201)
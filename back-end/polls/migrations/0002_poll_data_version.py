@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("polls", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="poll",
+            name="data_version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+OPTIONS = ("round_trip", "one_way_outbound", "one_way_return", "absent")
+
+
+def fill_option_counts(apps, schema_editor):
+    Poll = apps.get_model("polls", "Poll")
+    PollOptionCounts = apps.get_model("polls", "PollOptionCounts")
+
+    rows = Poll.objects.values("id").annotate(
+        **{option: Count("votes", filter=Q(votes__option=option)) for option in OPTIONS}
+    )
+    PollOptionCounts.objects.bulk_create(
+        [PollOptionCounts(poll_id=row.pop("id"), **row) for row in rows],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("polls", "0002_poll_data_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PollOptionCounts",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("round_trip", models.PositiveIntegerField(default=0)),
+                ("one_way_outbound", models.PositiveIntegerField(default=0)),
+                ("one_way_return", models.PositiveIntegerField(default=0)),
+                ("absent", models.PositiveIntegerField(default=0)),
+                (
+                    "poll",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="option_counts",
+                        to="polls.poll",
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(fill_option_counts, migrations.RunPython.noop),
+    ]
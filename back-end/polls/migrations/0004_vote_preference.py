@@ -0,0 +1,65 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("polls", "0003_poll_option_counts"),
+        ("students", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="VotePreference",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "weekday",
+                    models.PositiveSmallIntegerField(
+                        choices=[
+                            (0, "Monday"),
+                            (1, "Tuesday"),
+                            (2, "Wednesday"),
+                            (3, "Thursday"),
+                            (4, "Friday"),
+                        ]
+                    ),
+                ),
+                (
+                    "option",
+                    models.CharField(
+                        choices=[
+                            ("round_trip", "Round Trip"),
+                            ("one_way_outbound", "Only Outbound"),
+                            ("one_way_return", "Only Return"),
+                            ("absent", "Absent"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="vote_preferences",
+                        to="students.student",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["weekday"],
+                "unique_together": {("student", "weekday")},
+            },
+        ),
+    ]
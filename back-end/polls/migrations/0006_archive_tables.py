@@ -0,0 +1,75 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("polls", "0005_holiday"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedPoll",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("date", models.DateField(db_index=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("open", "Open"), ("closed", "Closed")], max_length=20
+                    ),
+                ),
+                ("round_trip", models.PositiveIntegerField(default=0)),
+                ("one_way_outbound", models.PositiveIntegerField(default=0)),
+                ("one_way_return", models.PositiveIntegerField(default=0)),
+                ("absent", models.PositiveIntegerField(default=0)),
+                ("archived_at", models.DateTimeField()),
+            ],
+            options={
+                "ordering": ["date"],
+            },
+        ),
+        migrations.CreateModel(
+            name="ArchivedVote",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("poll_id", models.BigIntegerField()),
+                ("poll_date", models.DateField()),
+                ("student_id", models.BigIntegerField()),
+                (
+                    "option",
+                    models.CharField(
+                        choices=[
+                            ("round_trip", "Round Trip"),
+                            ("one_way_outbound", "Only Outbound"),
+                            ("one_way_return", "Only Return"),
+                            ("absent", "Absent"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("voted_at", models.DateTimeField()),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["poll_date"], name="polls_archi_poll_da_a771a4_idx"
+                    ),
+                    models.Index(
+                        fields=["student_id", "poll_date"],
+                        name="polls_archi_student_e4634b_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
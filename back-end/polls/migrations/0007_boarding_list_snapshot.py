@@ -0,0 +1,67 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("polls", "0006_archive_tables"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="archivedpoll",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("open", "Open"),
+                    ("outbound_closed", "Outbound Closed"),
+                    ("closed", "Closed"),
+                ],
+                max_length=20,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="poll",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("open", "Open"),
+                    ("outbound_closed", "Outbound Closed"),
+                    ("closed", "Closed"),
+                ],
+                default="open",
+                max_length=20,
+            ),
+        ),
+        migrations.CreateModel(
+            name="BoardingListSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("trip_type", models.CharField(max_length=20)),
+                ("groups", models.JSONField(default=list)),
+                ("frozen_at", models.DateTimeField(auto_now=True)),
+                (
+                    "poll",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="boarding_snapshots",
+                        to="polls.poll",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("poll", "trip_type")},
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("polls", "0007_boarding_list_snapshot"),
+        ("students", "0002_university"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="vote",
+            index=models.Index(
+                fields=["poll", "option", "student"], name="polls_vote_poll_option_idx"
+            ),
+        ),
+    ]
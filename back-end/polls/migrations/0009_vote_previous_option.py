@@ -0,0 +1,29 @@
+# Generated by Django 5.2.5 on 2026-10-18 20:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("polls", "0008_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="vote",
+            name="previous_option",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("round_trip", "Round Trip"),
+                    ("one_way_outbound", "Only Outbound"),
+                    ("one_way_return", "Only Return"),
+                    ("absent", "Absent"),
+                ],
+                editable=False,
+                max_length=20,
+                null=True,
+            ),
+        ),
+    ]
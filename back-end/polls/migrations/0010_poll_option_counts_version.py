@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 20:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("polls", "0009_vote_previous_option"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="polloptioncounts",
+            name="version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-18 21:11
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("polls", "0010_poll_option_counts_version"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="vote",
+            name="previous_option",
+        ),
+    ]
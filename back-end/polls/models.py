@@ -1,26 +1,49 @@
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import Count, F, FilteredRelation, Q
 from django.utils import timezone
 from datetime import time
 from students.models import Student
 
 
-STATUS = (("open", "Open"), ("closed", "Closed"))
+STATUS = (
+    ("open", "Open"),
+    ("outbound_closed", "Outbound Closed"),
+    ("closed", "Closed"),
+)
+OUTBOUND_DEADLINE = time(12, 0)
+RETURN_DEADLINE = time(18, 0)
 OPTIONS = (
     ("round_trip", "Round Trip"),
     ("one_way_outbound", "Only Outbound"),
     ("one_way_return", "Only Return"),
     ("absent", "Absent"),
 )
+WEEKDAYS = (
+    (0, "Monday"),
+    (1, "Tuesday"),
+    (2, "Wednesday"),
+    (3, "Thursday"),
+    (4, "Friday"),
+)
 
 
 class Poll(models.Model):
     date = models.DateField(unique=True)
     status = models.CharField(max_length=20, choices=STATUS, default="open")
+    data_version = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return f"Poll for {self.date} ({self.status})"
 
     def can_vote_for_option(self, option):
+        # Fase já fechada pelo agendador: nem precisa olhar o relógio
+        if self.status == "closed":
+            return False
+        if self.status == "outbound_closed" and option in [
+            "round_trip",
+            "one_way_outbound",
+        ]:
+            return False
 
         now = timezone.localtime(timezone.now())
         poll_date = self.date
@@ -34,12 +57,48 @@ class Poll(models.Model):
         current_time = now.time()
 
         if option in ["round_trip", "one_way_outbound"]:
-            return current_time <= time(12, 0)
+            return current_time <= OUTBOUND_DEADLINE
         elif option in ["one_way_return", "absent"]:
-            return current_time <= time(18, 0)
+            return current_time <= RETURN_DEADLINE
 
         return False
 
+    def is_frozen(self, trip_type):
+        """Se a lista de embarque do tipo de viagem já foi congelada."""
+        if trip_type == "outbound":
+            return self.status in ("outbound_closed", "closed")
+        return self.status == "closed"
+
+    @classmethod
+    def bump_data_version(cls, **filters):
+        # Invalida as listas de alunos em cache das enquetes filtradas.
+        cls.objects.filter(**filters).update(data_version=models.F("data_version") + 1)
+
+
+class Holiday(models.Model):
+    """
+    Feriado ou recesso: nenhum dia entre start_date e end_date (inclusive)
+    recebe enquete. Para um único dia, as duas datas são iguais.
+    """
+
+    name = models.CharField(max_length=100)
+    start_date = models.DateField()
+    end_date = models.DateField()
+
+    class Meta:
+        ordering = ["start_date"]
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(end_date__gte=models.F("start_date")),
+                name="holiday_end_after_start",
+            )
+        ]
+
+    def __str__(self):
+        if self.start_date == self.end_date:
+            return f"{self.name} ({self.start_date})"
+        return f"{self.name} ({self.start_date} - {self.end_date})"
+
 
 class Vote(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
@@ -52,6 +111,407 @@ class Vote(models.Model):
 
     class Meta:
         unique_together = ("student", "poll")
+        indexes = [
+            # Listas de embarque, planos de parada e contagens filtram por
+            # (enquete, opção); com o aluno no índice a leitura nem toca a tabela
+            models.Index(
+                fields=["poll", "option", "student"],
+                name="polls_vote_poll_option_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.student} - {self.poll.date} - {self.option}"
+
+    @classmethod
+    def set_option(cls, student, poll, option):
+        """
+        Grava o voto do aluno na enquete com um INSERT ... ON CONFLICT DO
+        UPDATE, sem depender de o voto já existir.
+
+        Retorna (voto, opção anterior ou None).
+        """
+        return cls.set_options(student, {poll: option})[0]
+
+    @classmethod
+    def set_options(cls, student, choices):
+        """
+        Versão em lote de set_option: grava {enquete: opção} de uma vez.
+
+        No PostgreSQL é um único comando: um CTE lê as opções atuais, o upsert
+        grava os votos, outro CTE move os contadores das enquetes e a consulta
+        final devolve id e opção anterior de cada voto junto com o nome do
+        aluno. Nos demais bancos os mesmos passos rodam em três comandos na
+        mesma transação.
+
+        student pode vir só com o pk: nome e user_id são preenchidos pela
+        gravação. Student.DoesNotExist se o aluno não existe mais.
+
+        A opção anterior é a do início do comando. Dois pedidos simultâneos
+        do mesmo aluno na mesma enquete podem deixar um contador defasado,
+        que rebuild_poll_counts corrige.
+
+        Retorna uma lista de (voto, opção anterior ou None) na ordem recebida.
+        """
+        if not choices:
+            return []
+
+        voted_at = timezone.now()
+        votes = [
+            cls(student=student, poll=poll, option=option, voted_at=voted_at)
+            for poll, option in choices.items()
+        ]
+        with transaction.atomic():
+            if connection.vendor == "postgresql":
+                saved = cls._save_options_in_db(student, votes)
+            else:
+                saved = cls._save_options_in_steps(student, votes)
+
+        previous = {}
+        for vote in votes:
+            vote.pk, previous[vote.poll_id] = saved[vote.poll_id]
+        return [(vote, previous[vote.poll_id]) for vote in votes]
+
+    @classmethod
+    def _upsert_params(cls, student, votes):
+        voted_at = connection.ops.adapt_datetimefield_value(votes[0].voted_at)
+        return [
+            value
+            for vote in votes
+            for value in (student.pk, vote.poll_id, vote.option, voted_at)
+        ]
+
+    @classmethod
+    def _save_options_in_db(cls, student, votes):
+        poll_ids = [vote.poll_id for vote in votes]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                cls._set_options_sql(len(votes)),
+                [
+                    student.pk,
+                    *poll_ids,
+                    *cls._upsert_params(student, votes),
+                    student.pk,
+                ],
+            )
+            rows = cursor.fetchall()
+
+        # A chave do aluno só é conferida no commit: sem linha, ele não existe
+        if not rows:
+            raise Student.DoesNotExist("Student not found.")
+
+        saved, uncounted = {}, []
+        for pk, poll_id, previous, missing_counts, name, user_id in rows:
+            saved[poll_id] = (pk, previous)
+            if missing_counts:
+                uncounted.append(poll_id)
+        student.name, student.user_id = name, user_id
+
+        if uncounted:
+            # Enquete sem linha de contadores: recalcula a partir dos votos
+            PollOptionCounts.rebuild(poll_ids=uncounted)
+        return saved
+
+    @classmethod
+    def _save_options_in_steps(cls, student, votes):
+        poll_ids = [vote.poll_id for vote in votes]
+        rows = list(
+            Student.objects.filter(pk=student.pk)
+            .annotate(
+                current=FilteredRelation(
+                    "vote", condition=Q(vote__poll_id__in=poll_ids)
+                )
+            )
+            .values_list("name", "user_id", "current__poll_id", "current__option")
+        )
+        if not rows:
+            raise Student.DoesNotExist("Student not found.")
+
+        student.name, student.user_id = rows[0][:2]
+        current = {poll_id: option for _, _, poll_id, option in rows if poll_id}
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                cls._upsert_sql(len(votes)), cls._upsert_params(student, votes)
+            )
+            ids = {poll_id: pk for pk, poll_id in cursor}
+
+        PollOptionCounts.record_many(
+            (vote.poll_id, vote.option, current.get(vote.poll_id)) for vote in votes
+        )
+        return {
+            vote.poll_id: (ids[vote.poll_id], current.get(vote.poll_id))
+            for vote in votes
+        }
+
+    @classmethod
+    def _upsert_sql(cls, count):
+        table = connection.ops.quote_name(cls._meta.db_table)
+        option = connection.ops.quote_name("option")
+        rows = ", ".join(["(%s, %s, %s, %s)"] * count)
+        return (
+            f"INSERT INTO {table} (student_id, poll_id, {option}, voted_at) "
+            f"VALUES {rows} ON CONFLICT (student_id, poll_id) DO UPDATE SET "
+            f"{option} = EXCLUDED.{option} RETURNING id, poll_id"
+        )
+
+    @classmethod
+    def _set_options_sql(cls, count):
+        # Todos os CTEs usam o snapshot do início do comando: "old" vê as
+        # opções de antes do upsert, qualquer que seja a ordem de execução
+        qn = connection.ops.quote_name
+        votes = qn(cls._meta.db_table)
+        counts = qn(PollOptionCounts._meta.db_table)
+        students = qn(Student._meta.db_table)
+        option = qn("option")
+        polls = ", ".join(["%s"] * count)
+        deltas = ", ".join(
+            f"{qn(name)} = c.{qn(name)} + (ch.added = '{name}')::int "
+            f"- (ch.removed IS NOT DISTINCT FROM '{name}')::int"
+            for name, _ in OPTIONS
+        )
+        return (
+            f"WITH old AS ("
+            f"SELECT poll_id, {option} FROM {votes} "
+            f"WHERE student_id = %s AND poll_id IN ({polls})"
+            f"), saved AS ({cls._upsert_sql(count)}, {option}), "
+            f"changes AS ("
+            f"SELECT saved.id, saved.poll_id, saved.{option} AS added, "
+            f"old.{option} AS removed "
+            f"FROM saved LEFT JOIN old ON old.poll_id = saved.poll_id"
+            f"), counted AS ("
+            f"UPDATE {counts} AS c SET {deltas}, version = c.version + 1 "
+            f"FROM changes AS ch "
+            f"WHERE c.poll_id = ch.poll_id AND ch.added IS DISTINCT FROM ch.removed "
+            f"RETURNING c.poll_id"
+            f") "
+            f"SELECT ch.id, ch.poll_id, ch.removed, "
+            f"counted.poll_id IS NULL AND ch.added IS DISTINCT FROM ch.removed, "
+            f"s.name, s.user_id "
+            f"FROM changes AS ch "
+            f"JOIN {students} AS s ON s.id = %s "
+            f"LEFT JOIN counted ON counted.poll_id = ch.poll_id"
+        )
+
+
+class PollOptionCounts(models.Model):
+    """
+    Contagem de votos por opção de uma enquete, mantida a cada voto gravado
+    com expressões F para não precisar carregar os votos.
+
+    version sobe no mesmo UPDATE que move a contagem: junto com
+    Poll.data_version, identifica o estado dos votos da enquete para as
+    ETags e o cache das listas, sem outra escrita por voto.
+    """
+
+    poll = models.OneToOneField(
+        Poll, on_delete=models.CASCADE, related_name="option_counts"
+    )
+    round_trip = models.PositiveIntegerField(default=0)
+    one_way_outbound = models.PositiveIntegerField(default=0)
+    one_way_return = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+    version = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Counts for {self.poll_id}"
+
+    def as_dict(self):
+        return {option: getattr(self, option) for option, _ in OPTIONS}
+
+    @classmethod
+    def record(cls, poll_id, added=None, removed=None):
+        """Move um voto entre as opções da enquete."""
+        cls.record_many([(poll_id, added, removed)])
+
+    @classmethod
+    def record_many(cls, transitions):
+        """
+        Aplica vários (enquete, opção nova, opção anterior) com um UPDATE por
+        tipo de mudança, que também sobe version. Enquetes sem linha de
+        contadores são recalculadas a partir dos votos já gravados.
+        """
+        # Opção fora de OPTIONS (gravada sem validação) não tem contador
+        counted = {option for option, _ in OPTIONS}
+        groups = {}
+        for poll_id, added, removed in transitions:
+            added = added if added in counted else None
+            removed = removed if removed in counted else None
+            if added != removed:
+                groups.setdefault((added, removed), []).append(poll_id)
+
+        for (added, removed), poll_ids in groups.items():
+            changes = {"version": F("version") + 1}
+            if added:
+                changes[added] = F(added) + 1
+            if removed:
+                changes[removed] = F(removed) - 1
+
+            updated = cls.objects.filter(poll_id__in=poll_ids).update(**changes)
+            if updated < len(poll_ids):
+                cls.rebuild(poll_ids=poll_ids)
+
+    @classmethod
+    def count_votes(cls, poll_ids=None):
+        polls = Poll.objects.all()
+        if poll_ids is not None:
+            polls = polls.filter(pk__in=poll_ids)
+
+        return {
+            row.pop("id"): row
+            for row in polls.values("id").annotate(
+                **{
+                    option: Count("votes", filter=Q(votes__option=option))
+                    for option, _ in OPTIONS
+                }
+            )
+        }
+
+    @classmethod
+    def rebuild(cls, poll_ids=None):
+        """Recalcula os contadores a partir de Vote em uma única escrita."""
+        counts = cls.count_votes(poll_ids)
+        cls.objects.bulk_create(
+            [cls(poll_id=poll_id, **row) for poll_id, row in counts.items()],
+            update_conflicts=True,
+            unique_fields=["poll"],
+            update_fields=[option for option, _ in OPTIONS],
+        )
+        return len(counts)
+
+    @classmethod
+    def find_mismatches(cls, poll_ids=None):
+        """Enquetes cujos contadores gravados diferem da contagem dos votos."""
+        expected = cls.count_votes(poll_ids)
+        stored = {
+            counts.poll_id: counts.as_dict()
+            for counts in cls.objects.filter(poll_id__in=expected)
+        }
+        return {
+            poll_id: {"expected": row, "stored": stored.get(poll_id)}
+            for poll_id, row in expected.items()
+            if stored.get(poll_id) != row
+        }
+
+
+class VotePreference(models.Model):
+    """
+    Voto padrão do aluno para um dia da semana. Ao criar as enquetes, as
+    preferências viram votos; o aluno pode alterá-los normalmente depois.
+    """
+
+    student = models.ForeignKey(
+        Student, on_delete=models.CASCADE, related_name="vote_preferences"
+    )
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAYS)
+    option = models.CharField(max_length=20, choices=OPTIONS)
+
+    class Meta:
+        unique_together = ("student", "weekday")
+        ordering = ["weekday"]
+
+    def __str__(self):
+        return f"{self.student} - {self.get_weekday_display()} - {self.option}"
+
+    @classmethod
+    def materialize(cls, polls):
+        """
+        Transforma as preferências em votos das enquetes recém-criadas, com um
+        bulk_create(ignore_conflicts=True) por enquete: votos já existentes
+        (explícitos) não são tocados.
+
+        Retorna o número de votos padrão gravados.
+        """
+        polls = list(polls)
+        if not polls:
+            return 0
+
+        by_weekday = {}
+        for weekday, student_id, option in cls.objects.filter(
+            weekday__in={poll.date.weekday() for poll in polls}
+        ).values_list("weekday", "student_id", "option"):
+            by_weekday.setdefault(weekday, []).append((student_id, option))
+
+        poll_ids = [poll.pk for poll in polls]
+        with transaction.atomic():
+            existing = Vote.objects.filter(poll_id__in=poll_ids).count()
+            for poll in polls:
+                Vote.objects.bulk_create(
+                    [
+                        Vote(student_id=student_id, poll=poll, option=option)
+                        for student_id, option in by_weekday.get(
+                            poll.date.weekday(), []
+                        )
+                        if poll.can_vote_for_option(option)
+                    ],
+                    ignore_conflicts=True,
+                )
+
+            # bulk_create não dispara post_save: contadores e cache à parte
+            PollOptionCounts.rebuild(poll_ids=poll_ids)
+            Poll.bump_data_version(pk__in=poll_ids)
+            return Vote.objects.filter(poll_id__in=poll_ids).count() - existing
+
+
+class ArchivedPoll(models.Model):
+    """
+    Histórico compacto de uma enquete passada: mantém o id original e a
+    contagem por opção. Só recebe inserções do arquivamento.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    date = models.DateField(db_index=True)
+    status = models.CharField(max_length=20, choices=STATUS)
+    round_trip = models.PositiveIntegerField(default=0)
+    one_way_outbound = models.PositiveIntegerField(default=0)
+    one_way_return = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ["date"]
+
+    def __str__(self):
+        return f"Archived poll for {self.date}"
+
+
+class ArchivedVote(models.Model):
+    # Ids soltos, sem chave estrangeira: o histórico sobrevive à remoção
+    # do aluno
+    poll_id = models.BigIntegerField()
+    poll_date = models.DateField()
+    student_id = models.BigIntegerField()
+    option = models.CharField(max_length=20, choices=OPTIONS)
+    voted_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["poll_date"]),
+            models.Index(fields=["student_id", "poll_date"]),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} - {self.poll_date} - {self.option}"
+
+
+class BoardingListSnapshot(models.Model):
+    """
+    Lista de embarque congelada no fechamento da fase da enquete (ida às 12h,
+    volta às 18h). Depois disso as leituras vêm daqui, sem agregar votos.
+
+    groups: [{"stop": id do ponto ou universidade, "point": {...} (ida),
+    "students": [{"id", "name", "user_id"}]}] na ordem da rota.
+    """
+
+    poll = models.ForeignKey(
+        Poll, on_delete=models.CASCADE, related_name="boarding_snapshots"
+    )
+    trip_type = models.CharField(max_length=20)
+    groups = models.JSONField(default=list)
+    frozen_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("poll", "trip_type")
+
+    def __str__(self):
+        return f"Boarding list {self.trip_type} for poll {self.poll_id}"
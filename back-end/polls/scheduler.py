@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Holiday, Poll, VotePreference
+
+
+def first_service_day(day):
+    # Sábado e domingo passam para a segunda seguinte
+    if day.weekday() >= 5:
+        return day + timedelta(days=7 - day.weekday())
+    return day
+
+
+def schedule_polls(start_date, weeks=None):
+    """
+    Gera as enquetes de segunda a sexta a partir de start_date até a sexta da
+    última semana do horizonte, pulando feriados e recessos.
+
+    As datas existentes vêm de uma única consulta e as que faltam são criadas
+    em um único bulk_create(ignore_conflicts=True). Retorna um dict com as
+    datas criadas, existentes e puladas.
+    """
+    if weeks is None:
+        weeks = settings.POLL_SCHEDULE_WEEKS
+    if weeks < 1:
+        raise ValueError("weeks must be a positive number")
+    start_date = first_service_day(start_date)
+    end_date = start_date + timedelta(days=4 - start_date.weekday(), weeks=weeks - 1)
+
+    breaks = list(
+        Holiday.objects.filter(
+            start_date__lte=end_date, end_date__gte=start_date
+        ).values_list("start_date", "end_date")
+    )
+
+    candidates = []
+    skipped = []
+    day = start_date
+    while day <= end_date:
+        if day.weekday() < 5:
+            if any(first <= day <= last for first, last in breaks):
+                skipped.append(day)
+            else:
+                candidates.append(day)
+        day += timedelta(days=1)
+
+    existing = set(
+        Poll.objects.filter(date__in=candidates).values_list("date", flat=True)
+    )
+    missing = [day for day in candidates if day not in existing]
+
+    default_votes = 0
+    if missing:
+        with transaction.atomic():
+            Poll.objects.bulk_create(
+                [Poll(date=day, status="open") for day in missing],
+                ignore_conflicts=True,
+            )
+            # ignore_conflicts não devolve as chaves; as enquetes novas são
+            # relidas para receber os votos padrão e os contadores
+            created_polls = Poll.objects.filter(date__in=missing)
+            default_votes = VotePreference.materialize(created_polls)
+
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "created": missing,
+        "existing": sorted(existing),
+        "skipped": skipped,
+        "default_votes": default_votes,
+    }
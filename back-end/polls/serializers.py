@@ -1,11 +1,11 @@
 from rest_framework import serializers
-from .models import Poll, Vote
+from .models import Poll, PollOptionCounts, Vote, VotePreference, OPTIONS
 from students.models import Student
 from boarding_points.serializers import BoardingPointSerializer 
 
 
 class StudentNestedSerializer(serializers.ModelSerializer):
-    user_id = serializers.ReadOnlyField(source='user.id')
+    user_id = serializers.ReadOnlyField()
     
     class Meta:
         model = Student
@@ -21,6 +21,12 @@ class VoteSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "student"]
 
 
+class VoteUpdateSerializer(VoteSerializer):
+    # O voto não muda de enquete: só a opção é alterada
+    class Meta(VoteSerializer.Meta):
+        read_only_fields = ["id", "student", "poll"]
+
+
 class PollSerializer(serializers.ModelSerializer):
     votes = VoteSerializer(many=True, read_only=True)
 
@@ -29,6 +35,91 @@ class PollSerializer(serializers.ModelSerializer):
         fields = ["id", "date", "status", "votes"]
         read_only_fields = ["id", "votes"]
 
+class PollSummarySerializer(serializers.ModelSerializer):
+    counts = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Poll
+        fields = ["id", "date", "status", "counts"]
+
+    def get_counts(self, obj):
+        # Esperado em querysets com select_related("option_counts")
+        try:
+            return obj.option_counts.as_dict()
+        except PollOptionCounts.DoesNotExist:
+            return {option: 0 for option, _ in OPTIONS}
+
+
+class PollTodaySerializer(PollSummarySerializer):
+    trips = serializers.SerializerMethodField()
+
+    class Meta(PollSummarySerializer.Meta):
+        fields = PollSummarySerializer.Meta.fields + ["trips"]
+
+    def get_trips(self, obj):
+        return [
+            {
+                "id": trip.id,
+                "trip_type": trip.trip_type,
+                "status": trip.status,
+                "current_stop_index": trip.current_stop_position,
+                "version": trip.version,
+            }
+            for trip in obj.trips.all()
+        ]
+
+
+class VoteBatchItemSerializer(serializers.Serializer):
+    poll = serializers.IntegerField()
+    option = serializers.ChoiceField(choices=OPTIONS)
+
+
+class VoteBatchSerializer(serializers.Serializer):
+    """
+    Aceita uma lista de {poll, option} ou um intervalo de datas com uma
+    única opção para todas as enquetes do intervalo.
+    """
+
+    MAX_RANGE_DAYS = 31
+
+    votes = VoteBatchItemSerializer(many=True, required=False)
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    option = serializers.ChoiceField(choices=OPTIONS, required=False)
+
+    def validate(self, attrs):
+        if "votes" in attrs:
+            poll_ids = [item["poll"] for item in attrs["votes"]]
+            if not poll_ids:
+                raise serializers.ValidationError("Informe ao menos um voto.")
+            if len(set(poll_ids)) != len(poll_ids):
+                raise serializers.ValidationError("Cada enquete pode aparecer uma vez.")
+            return attrs
+
+        missing = [f for f in ("start_date", "end_date", "option") if f not in attrs]
+        if missing:
+            raise serializers.ValidationError(
+                "Informe 'votes' ou 'start_date', 'end_date' e 'option'."
+            )
+
+        span = (attrs["end_date"] - attrs["start_date"]).days
+        if span < 0:
+            raise serializers.ValidationError(
+                "'end_date' deve ser igual ou posterior a 'start_date'."
+            )
+        if span >= self.MAX_RANGE_DAYS:
+            raise serializers.ValidationError(
+                f"O intervalo pode ter no máximo {self.MAX_RANGE_DAYS} dias."
+            )
+        return attrs
+
+
+class VotePreferenceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = VotePreference
+        fields = ["weekday", "option"]
+
+
 class BoardingListStudentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Student
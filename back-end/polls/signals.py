@@ -0,0 +1,69 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from boarding_points.models import BoardingPoint
+from students.models import Student, University
+from .models import Poll, PollOptionCounts, Vote
+
+
+RIDER_LIST_FIELDS = ("boarding_point_id", "university_id", "name")
+
+
+@receiver(post_save, sender=Poll)
+def create_option_counts(sender, instance, created, **kwargs):
+    # Enquete nova ainda não tem votos: os contadores começam zerados
+    if created:
+        PollOptionCounts.objects.get_or_create(poll=instance)
+
+
+@receiver(post_save, sender=Vote)
+def count_saved_vote(sender, instance, created, raw=False, **kwargs):
+    # O UPDATE dos contadores já sobe a versão dos votos da enquete
+    if raw:
+        return
+    if created:
+        PollOptionCounts.record(instance.poll_id, added=instance.option)
+    else:
+        # A opção anterior é desconhecida; trocas de voto passam por
+        # Vote.set_options, que move os contadores sem este sinal
+        PollOptionCounts.rebuild(poll_ids=[instance.poll_id])
+        Poll.bump_data_version(pk=instance.poll_id)
+
+
+@receiver(post_delete, sender=Vote)
+def count_deleted_vote(sender, instance, origin=None, **kwargs):
+    # Enquete apagada leva os contadores junto
+    if isinstance(origin, Poll) or (
+        isinstance(origin, QuerySet) and origin.model is Poll
+    ):
+        return
+    PollOptionCounts.record(instance.poll_id, removed=instance.option)
+
+
+@receiver(pre_save, sender=Student)
+def bump_polls_on_student_change(sender, instance, **kwargs):
+    if not instance.pk:
+        return
+
+    old = Student.objects.filter(pk=instance.pk).values(*RIDER_LIST_FIELDS).first()
+    if old is None:
+        return
+
+    if any(old[field] != getattr(instance, field) for field in RIDER_LIST_FIELDS):
+        Poll.bump_data_version(votes__student_id=instance.pk)
+
+
+@receiver(post_save, sender=BoardingPoint)
+@receiver(post_delete, sender=BoardingPoint)
+def bump_polls_on_boarding_point_change(sender, instance, **kwargs):
+    today = timezone.localdate()
+    Poll.bump_data_version(date__gte=today)
+
+
+@receiver(post_save, sender=University)
+@receiver(post_delete, sender=University)
+def bump_polls_on_university_change(sender, instance, **kwargs):
+    # Nome e ordem da volta entram nas listas guardadas pela versão da enquete
+    today = timezone.localdate()
+    Poll.bump_data_version(date__gte=today)
@@ -1,10 +1,12 @@
 from django.test import TestCase
-from django.core.management import call_command
+from django.core.management import CommandError, call_command
 from django.utils import timezone
 from datetime import timedelta, date
 from unittest.mock import patch
 from io import StringIO
-from polls.models import Poll
+from django.contrib.auth.models import User
+from polls.models import Holiday, Poll, Vote, VotePreference
+from students.models import Student
 
 
 class CreateWeeklyPollsCronTests(TestCase):
@@ -67,6 +69,49 @@ class CreateWeeklyPollsCronTests(TestCase):
 
         self.assertIn("should only run on Saturdays", out.getvalue())
 
+    @patch("django.utils.timezone.now")
+    def test_skips_holidays_and_accepts_longer_horizon(self, mock_now):
+        saturday = date(2025, 11, 29)
+        mock_now.return_value = timezone.make_aware(
+            timezone.datetime.combine(saturday, timezone.datetime.min.time())
+        )
+        Holiday.objects.create(
+            name="Feriado", start_date=date(2025, 12, 8), end_date=date(2025, 12, 8)
+        )
+
+        out = StringIO()
+        call_command("create_weekly_polls_cron", "--weeks", "2", stdout=out)
+
+        self.assertEqual(Poll.objects.count(), 9)
+        self.assertFalse(Poll.objects.filter(date=date(2025, 12, 8)).exists())
+        self.assertIn("Skipped holidays: 2025-12-08", out.getvalue())
+
+    def test_rejects_non_positive_horizon(self):
+        with self.assertRaises(CommandError):
+            call_command("create_weekly_polls_cron", "--weeks", "0", stdout=StringIO())
+        self.assertFalse(Poll.objects.exists())
+
+    @patch("django.utils.timezone.now")
+    def test_applies_vote_preferences_to_created_polls(self, mock_now):
+        saturday = date(2025, 11, 29)
+        mock_now.return_value = timezone.make_aware(
+            timezone.datetime.combine(saturday, timezone.datetime.min.time())
+        )
+        student = Student.objects.create(
+            user=User.objects.create(username="aluno"),
+            name="Aluno",
+            university_id="UESPI",
+        )
+        VotePreference.objects.create(student=student, weekday=2, option="absent")
+
+        out = StringIO()
+        call_command("create_weekly_polls_cron", stdout=out)
+
+        vote = Vote.objects.get(student=student)
+        self.assertEqual(vote.poll.date, date(2025, 12, 3))
+        self.assertEqual(vote.option, "absent")
+        self.assertIn("Applied 1 default vote(s)", out.getvalue())
+
 
 class CleanYesterdayPollTests(TestCase):
 
@@ -84,7 +129,7 @@ class CleanYesterdayPollTests(TestCase):
         call_command("clean_yesterday_poll", stdout=out)
 
         self.assertFalse(Poll.objects.filter(id=monday_poll.id).exists())
-        self.assertIn(f"Deleted poll for date: {monday}", out.getvalue())
+        self.assertIn(f"Archived poll for date: {monday}", out.getvalue())
 
     @patch("django.utils.timezone.now")
     def test_removes_yesterday_poll_on_wednesday(self, mock_now):
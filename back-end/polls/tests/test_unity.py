@@ -1,25 +1,57 @@
 from django.test import TestCase
 from django.contrib.auth.models import User
 from django.utils import timezone
-from django.db import IntegrityError
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from datetime import date, timedelta, datetime, time
+import json
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import skipUnless
 from unittest.mock import patch, MagicMock
-from rest_framework.test import APIRequestFactory, force_authenticate
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
 from rest_framework import status
 
-from polls.models import Poll, Vote
+from polls.archive import archive_polls
+from polls.benchmark import SAVEPOINT_SQL
+from polls.closing import close_due_polls
+from polls.management.commands.explain_hot_queries import (
+    Command as ExplainHotQueries,
+)
+from polls.models import (
+    ArchivedPoll,
+    ArchivedVote,
+    BoardingListSnapshot,
+    Holiday,
+    Poll,
+    PollOptionCounts,
+    Vote,
+    VotePreference,
+)
+from polls.scheduler import schedule_polls
 from polls.views import (
     PollDetailView,
     PollListView,
     CreateWeeklyPollsView,
     CleanOldPollsView,
+    VoteCreateView,
+    VoteSetView,
+    VoteBatchView,
+    VotePreferenceView,
     VoteListView,
     VoteUpdateView,
     PollBoardingListView,
+    PollTodayView,
 )
-from students.models import Student
+from students.models import Student, University
 from polls.serializers import StudentNestedSerializer, PollSerializer
 from boarding_points.models import BoardingPoint
+from trips.manifest import aggregate_riders, manifest_cache
+from trips.models import ArchivedTrip, Trip
 
 
 class PollModelLogicTests(TestCase):
@@ -96,7 +128,7 @@ class VoteModelIntegrityTests(TestCase):
             user=self.user,
             boarding_point=bp,
             class_shift="M",
-            university="UESPI",
+            university_id="UESPI",
         )
         self.poll = Poll.objects.create(date=timezone.localdate())
 
@@ -125,7 +157,7 @@ class PollsSerializersTests(TestCase):
             user=self.user,
             boarding_point=bp,
             class_shift="M",
-            university="UESPI",
+            university_id="UESPI",
         )
 
     # Funcionalidade 4
@@ -160,16 +192,76 @@ class TestCreateWeeklyPollsView(TestCase):
         self.view = CreateWeeklyPollsView.as_view()
 
     @patch("polls.views.timezone.now")
-    @patch("polls.views.Poll.objects.get_or_create")
-    def test_CT_10_create_weekly_polls(self, mock_get_or_create, mock_now):
+    def test_CT_10_create_weekly_polls(self, mock_now):
 
         mock_now.return_value = timezone.make_aware(datetime(2025, 11, 26, 10, 0, 0))
-        mock_get_or_create.return_value = (MagicMock(), True)
         request = self.factory.post("/polls/create_weekly/")
         force_authenticate(request, user=MagicMock())
         response = self.view(request)
         self.assertEqual(response.status_code, 200)
         self.assertIn("created_polls", response.data)
+        self.assertEqual(
+            response.data["created_polls"], ["2025-11-26", "2025-11-27", "2025-11-28"]
+        )
+
+    @patch("polls.views.timezone.now")
+    def test_CT_10_1_create_polls_for_several_weeks(self, mock_now):
+        mock_now.return_value = timezone.make_aware(datetime(2025, 11, 29, 10, 0, 0))
+        Poll.objects.create(date=date(2025, 12, 2))
+        Holiday.objects.create(
+            name="Recesso", start_date=date(2025, 12, 8), end_date=date(2025, 12, 9)
+        )
+
+        request = self.factory.post("/polls/create_weekly/?weeks=2")
+        force_authenticate(request, user=MagicMock())
+        response = self.view(request)
+
+        self.assertEqual(response.data["start_date"], "2025-12-01")
+        self.assertEqual(response.data["end_date"], "2025-12-12")
+        self.assertEqual(response.data["existing_polls"], ["2025-12-02"])
+        self.assertEqual(response.data["skipped_dates"], ["2025-12-08", "2025-12-09"])
+        self.assertEqual(response.data["total_created"], 7)
+        self.assertEqual(Poll.objects.count(), 8)
+        self.assertEqual(PollOptionCounts.objects.count(), 8)
+
+    @patch("polls.views.timezone.now")
+    def test_CT_10_2_rejects_invalid_horizon(self, mock_now):
+        mock_now.return_value = timezone.make_aware(datetime(2025, 11, 26, 10, 0, 0))
+        for weeks in ("0", "abc", "100"):
+            request = self.factory.post(f"/polls/create_weekly/?weeks={weeks}")
+            force_authenticate(request, user=MagicMock())
+            self.assertEqual(self.view(request).status_code, 400)
+        for weeks in (0, -1, ""):
+            request = self.factory.post(
+                "/polls/create_weekly/", {"weeks": weeks}, format="json"
+            )
+            force_authenticate(request, user=MagicMock())
+            self.assertEqual(self.view(request).status_code, 400)
+        self.assertFalse(Poll.objects.exists())
+
+
+class PollSchedulerTests(TestCase):
+    def test_CT_42_query_count_does_not_grow_with_horizon(self):
+        monday = date(2030, 1, 7)
+
+        def queries_for(start, weeks):
+            with CaptureQueriesContext(connection) as ctx:
+                schedule_polls(start, weeks)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(
+            queries_for(monday, 1), queries_for(monday + timedelta(weeks=1), 6)
+        )
+
+    def test_CT_43_rerun_only_reports_existing(self):
+        monday = date(2030, 1, 7)
+        schedule_polls(monday, 1)
+
+        schedule = schedule_polls(monday, 1)
+
+        self.assertEqual(schedule["created"], [])
+        self.assertEqual(len(schedule["existing"]), 5)
+        self.assertEqual(Poll.objects.count(), 5)
 
 
 class TestCleanOldPollsView(TestCase):
@@ -178,14 +270,17 @@ class TestCleanOldPollsView(TestCase):
         self.view = CleanOldPollsView.as_view()
 
     @patch("polls.views.timezone.now")
-    @patch("polls.views.Poll.objects")
-    def test_CT_11_clean_old_polls(self, mock_objects, mock_now):
+    @patch("polls.views.archive_polls")
+    def test_CT_11_clean_old_polls(self, mock_archive, mock_now):
 
         mock_now.return_value = timezone.make_aware(datetime(2025, 12, 1, 10, 0, 0))
-        queryset = MagicMock()
-        queryset.count.return_value = 2
-        queryset.values_list.return_value = [date(2025, 11, 29), date(2025, 11, 30)]
-        mock_objects.filter.return_value = queryset
+        mock_archive.return_value = {
+            "polls": 2,
+            "votes": 0,
+            "trips": 0,
+            "dates": [date(2025, 11, 29), date(2025, 11, 30)],
+            "complete": True,
+        }
 
         request = self.factory.post("/polls/clean_old/")
         force_authenticate(request, user=MagicMock())
@@ -201,16 +296,17 @@ class TestVoteListView(TestCase):
 
     @patch("polls.views.Vote.objects")
     def test_CT_12_list_votes(self, mock_objects):
-        mock_student = MagicMock()
-        mock_student.id = 1
         mock_user = MagicMock()
-        mock_user.student = mock_student
+        # O aluno vem do perfil desnormalizado do usuário
+        mock_user.profile.role = "student"
+        mock_user.profile.person_id = 1
         mock_objects.filter.return_value = []
 
-        request = self.factory.get("/votes/")
+        request = self.factory.get("/votes/?paginate=false")
         force_authenticate(request, user=mock_user)
         response = self.view(request)
         self.assertEqual(response.status_code, 200)
+        mock_objects.filter.assert_called_once_with(student_id=1)
 
 
 class PollDetailViewTests(TestCase):
@@ -281,19 +377,19 @@ class BoardingListGenerationTests(TestCase):
             user=User.objects.create(username="jr"),
             name="Junior",
             boarding_point=self.bp1,
-            university="UESPI",
+            university_id="UESPI",
         )
         self.student2 = Student.objects.create(
             user=User.objects.create(username="paulo"),
             name="Paulo",
             boarding_point=self.bp2,
-            university="IFPI",
+            university_id="IFPI",
         )
         self.student3 = Student.objects.create(
             user=User.objects.create(username="carol"),
             name="Carol",
             boarding_point=self.bp1,
-            university="CHRISFAPI",
+            university_id="CHRISFAPI",
         )
 
         self.poll = Poll.objects.create(date=timezone.localdate(), status="open")
@@ -323,3 +419,1012 @@ class BoardingListGenerationTests(TestCase):
         self.assertIn("Junior", students_names)
         self.assertIn("Paulo", students_names)
         self.assertNotIn("Carol", students_names)
+
+
+class PollManifestCacheTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.view = PollBoardingListView.as_view()
+        self.user = User.objects.create(username="motorista")
+
+        self.bp1 = BoardingPoint.objects.create(name="Centro", route_order=0)
+        self.bp2 = BoardingPoint.objects.create(name="Bairro", route_order=1)
+        self.student = Student.objects.create(
+            user=User.objects.create(username="ana"),
+            name="Ana",
+            boarding_point=self.bp1,
+            university_id="UESPI",
+        )
+        self.poll = Poll.objects.create(date=timezone.localdate())
+        self.vote = Vote.objects.create(
+            student=self.student, poll=self.poll, option="round_trip"
+        )
+        manifest_cache.reset_stats()
+
+    def get_list(self, trip_type="outbound"):
+        request = self.factory.get(
+            f"/polls/{self.poll.id}/boarding_list/?trip_type={trip_type}"
+        )
+        force_authenticate(request, user=self.user)
+        return self.view(request, pk=self.poll.id)
+
+    def current_version(self):
+        return Poll.objects.get(pk=self.poll.pk).data_version
+
+    def votes_version(self):
+        return PollOptionCounts.objects.get(poll=self.poll).version
+
+    def test_CT_17_vote_writes_bump_version(self):
+        version = self.votes_version()
+
+        with CaptureQueriesContext(connection) as ctx:
+            Vote.set_option(self.student, self.poll, "absent")
+        self.assertEqual(self.votes_version(), version + 1)
+        # O contador sobe a versão dos votos; a enquete não é escrita
+        self.assertFalse(
+            any('UPDATE "polls_poll"' in q["sql"] for q in ctx.captured_queries)
+        )
+
+        self.vote.refresh_from_db()
+        self.vote.delete()
+        self.assertEqual(self.votes_version(), version + 2)
+        self.assertEqual(PollOptionCounts.objects.get(poll=self.poll).absent, 0)
+
+    def test_CT_18_boarding_point_change_bumps_version(self):
+        version = self.current_version()
+
+        self.student.phone = "86999999999"
+        self.student.save()
+        self.assertEqual(self.current_version(), version)
+
+        self.student.boarding_point = self.bp2
+        self.student.save()
+        self.assertEqual(self.current_version(), version + 1)
+
+    def test_CT_19_repeated_reads_hit_cache(self):
+        self.get_list()
+        # validação do ETag + leitura da enquete; nenhum voto é consultado
+        with self.assertNumQueries(2):
+            response = self.get_list()
+
+        self.assertEqual(response.data[0]["students"][0]["name"], "Ana")
+        self.assertEqual(manifest_cache.stats(), {"hits": 1, "misses": 1})
+
+    def test_CT_20_vote_change_refreshes_cached_list(self):
+        self.get_list()
+        self.vote.option = "one_way_return"
+        self.vote.save()
+
+        self.assertEqual(self.get_list().data, [])
+        self.assertEqual(len(self.get_list("return").data), 1)
+
+    def test_CT_20_1_university_reorder_refreshes_list_and_etag(self):
+        Vote.objects.create(
+            student=Student.objects.create(
+                user=User.objects.create(username="bia"),
+                name="Bia",
+                boarding_point=self.bp1,
+                university_id="IFPI",
+            ),
+            poll=self.poll,
+            option="round_trip",
+        )
+        first = self.get_list("return")
+        self.assertEqual(
+            [group["group_name"] for group in first.data], ["IFPI", "UESPI"]
+        )
+
+        ifpi = University.objects.get(code="IFPI")
+        ifpi.route_order = 10
+        ifpi.save()
+
+        second = self.get_list("return")
+        self.assertEqual(
+            [group["group_name"] for group in second.data], ["UESPI", "IFPI"]
+        )
+        self.assertNotEqual(second["ETag"], first["ETag"])
+
+
+class PollConditionalRequestTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.user = User.objects.create(username="aluno")
+        self.student = Student.objects.create(
+            user=self.user, name="Ana", university_id="UESPI"
+        )
+        self.poll = Poll.objects.create(date=timezone.localdate())
+
+    def get(self, view, url, etag=None):
+        headers = {"HTTP_IF_NONE_MATCH": etag} if etag else {}
+        request = self.factory.get(url, **headers)
+        force_authenticate(request, user=self.user)
+        return view.as_view()(request, pk=self.poll.id)
+
+    def test_CT_21_detail_returns_304_while_votes_unchanged(self):
+        url = f"/polls/{self.poll.id}/"
+        first = self.get(PollDetailView, url)
+        self.assertIn("ETag", first)
+
+        with self.assertNumQueries(1):
+            second = self.get(PollDetailView, url, first["ETag"])
+        self.assertEqual(second.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Vote.objects.create(student=self.student, poll=self.poll, option="absent")
+        third = self.get(PollDetailView, url, first["ETag"])
+        self.assertEqual(third.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(third["ETag"], first["ETag"])
+
+    def test_CT_22_boarding_list_etag_depends_on_trip_type(self):
+        base = f"/polls/{self.poll.id}/boarding_list/"
+        outbound = self.get(PollBoardingListView, f"{base}?trip_type=outbound")
+        response = self.get(
+            PollBoardingListView, f"{base}?trip_type=return", outbound["ETag"]
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class PollTodayAndSummaryTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.user = User.objects.create(username="aluno")
+        self.poll = Poll.objects.create(date=timezone.localdate())
+        Poll.objects.create(date=timezone.localdate() + timedelta(days=1))
+
+        options = ["round_trip", "round_trip", "one_way_return", "absent"]
+        for i, option in enumerate(options):
+            student = Student.objects.create(
+                user=User.objects.create(username=f"aluno{i}"),
+                name=f"Aluno {i}",
+                university_id="UESPI",
+            )
+            Vote.objects.create(student=student, poll=self.poll, option=option)
+        PollOptionCounts.rebuild()
+
+        Trip.objects.create(poll=self.poll, trip_type="outbound")
+        Trip.objects.create(poll=self.poll, trip_type="return")
+
+    def test_CT_23_today_returns_counts_and_trips(self):
+        request = self.factory.get("/polls/today/")
+        force_authenticate(request, user=self.user)
+
+        with self.assertNumQueries(2):
+            response = PollTodayView.as_view()(request)
+
+        self.assertEqual(response.data["id"], self.poll.id)
+        self.assertEqual(
+            response.data["counts"],
+            {
+                "round_trip": 2,
+                "one_way_outbound": 0,
+                "one_way_return": 1,
+                "absent": 1,
+            },
+        )
+        self.assertEqual(
+            sorted(t["trip_type"] for t in response.data["trips"]),
+            ["outbound", "return"],
+        )
+        self.assertNotIn("votes", response.data)
+
+    def test_CT_24_today_without_poll_returns_404(self):
+        self.poll.delete()
+        request = self.factory.get("/polls/today/")
+        force_authenticate(request, user=self.user)
+
+        response = PollTodayView.as_view()(request)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_CT_25_list_summary_mode_uses_counts(self):
+        request = self.factory.get("/polls/?summary=true")
+        force_authenticate(request, user=self.user)
+
+        with self.assertNumQueries(1):
+            response = PollListView.as_view()(request)
+
+        polls = response.data["results"]
+        self.assertEqual(len(polls), 2)
+        self.assertEqual(polls[0]["counts"]["round_trip"], 2)
+        self.assertNotIn("votes", polls[0])
+
+
+class PollOptionCountsTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.poll = Poll.objects.create(date=timezone.localdate() + timedelta(days=1))
+        self.students = [
+            Student.objects.create(
+                user=User.objects.create(username=f"aluno{i}"),
+                name=f"Aluno {i}",
+                university_id="UESPI",
+            )
+            for i in range(3)
+        ]
+
+    def vote(self, student, option):
+        request = self.factory.post(
+            "/votes/", {"poll": self.poll.id, "option": option}, format="json"
+        )
+        force_authenticate(request, user=student.user)
+        return VoteCreateView.as_view()(request)
+
+    def counts(self):
+        return PollOptionCounts.objects.get(poll=self.poll).as_dict()
+
+    def test_CT_26_vote_create_increments_counter(self):
+        self.vote(self.students[0], "round_trip")
+        self.vote(self.students[1], "round_trip")
+        self.vote(self.students[2], "absent")
+
+        self.assertEqual(
+            self.counts(),
+            {
+                "round_trip": 2,
+                "one_way_outbound": 0,
+                "one_way_return": 0,
+                "absent": 1,
+            },
+        )
+
+    def test_CT_27_vote_update_moves_count_between_options(self):
+        self.vote(self.students[0], "round_trip")
+        vote = Vote.objects.get(student=self.students[0])
+
+        request = self.factory.patch(
+            f"/votes/{vote.id}/", {"option": "one_way_return"}, format="json"
+        )
+        force_authenticate(request, user=self.students[0].user)
+        response = VoteUpdateView.as_view()(request, pk=vote.id)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.counts()["round_trip"], 0)
+        self.assertEqual(self.counts()["one_way_return"], 1)
+
+    def test_CT_27_1_vote_update_cannot_move_vote_to_another_poll(self):
+        self.vote(self.students[0], "round_trip")
+        vote = Vote.objects.get(student=self.students[0])
+        other = Poll.objects.create(date=self.poll.date + timedelta(days=1))
+
+        request = self.factory.put(
+            f"/votes/{vote.id}/",
+            {"poll": other.id, "option": "absent"},
+            format="json",
+        )
+        force_authenticate(request, user=self.students[0].user)
+        response = VoteUpdateView.as_view()(request, pk=vote.id)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["poll"], self.poll.id)
+        vote.refresh_from_db()
+        self.assertEqual((vote.poll_id, vote.option), (self.poll.id, "absent"))
+        self.assertEqual(self.counts()["round_trip"], 0)
+        self.assertEqual(self.counts()["absent"], 1)
+        self.assertEqual(
+            set(PollOptionCounts.objects.get(poll=other).as_dict().values()), {0}
+        )
+
+    def test_CT_28_duplicate_vote_does_not_count_twice(self):
+        self.vote(self.students[0], "round_trip")
+        response = self.vote(self.students[0], "absent")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.counts()["round_trip"], 1)
+        self.assertEqual(self.counts()["absent"], 0)
+
+    def test_CT_29_rebuild_command_fixes_drift(self):
+        for student in self.students:
+            Vote.objects.create(student=student, poll=self.poll, option="absent")
+        PollOptionCounts.objects.filter(poll=self.poll).update(round_trip=5)
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_poll_counts", "--check", stdout=StringIO())
+
+        out = StringIO()
+        call_command("rebuild_poll_counts", stdout=out)
+
+        self.assertIn("match", out.getvalue())
+        self.assertEqual(self.counts()["round_trip"], 0)
+        self.assertEqual(self.counts()["absent"], 3)
+
+
+class VoteSetViewTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.poll = Poll.objects.create(date=timezone.localdate() + timedelta(days=1))
+        self.student = Student.objects.create(
+            user=User.objects.create(username="aluno"),
+            name="Aluno",
+            university_id="UESPI",
+        )
+
+    def set_vote(self, option, poll=None):
+        poll = poll or self.poll
+        request = self.factory.put(
+            "/votes/set/", {"poll": poll.id, "option": option}, format="json"
+        )
+        force_authenticate(request, user=self.student.user)
+        return VoteSetView.as_view()(request)
+
+    def test_CT_30_first_call_creates_vote(self):
+        response = self.set_vote("round_trip")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        vote = Vote.objects.get(student=self.student, poll=self.poll)
+        self.assertEqual(response.data["id"], vote.id)
+        self.assertEqual(response.data["student"]["name"], "Aluno")
+        self.assertEqual(vote.option, "round_trip")
+        self.assertEqual(PollOptionCounts.objects.get(poll=self.poll).round_trip, 1)
+
+    def test_CT_31_repeated_calls_update_same_vote(self):
+        first = self.set_vote("round_trip")
+        version = PollOptionCounts.objects.get(poll=self.poll).version
+
+        second = self.set_vote("one_way_return")
+        third = self.set_vote("one_way_return")
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(third.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data["id"], first.data["id"])
+        self.assertEqual(Vote.objects.filter(student=self.student).count(), 1)
+
+        counts = PollOptionCounts.objects.get(poll=self.poll)
+        self.assertEqual((counts.round_trip, counts.one_way_return), (0, 1))
+        # Só a mudança real de opção invalida o cache da enquete
+        self.assertEqual(counts.version, version + 1)
+
+    def test_CT_31_1_change_reads_old_option_in_the_write(self):
+        Vote.set_option(self.student, self.poll, "round_trip")
+
+        student = Student(pk=self.student.pk)
+        with CaptureQueriesContext(connection) as ctx:
+            vote, previous = Vote.set_option(student, self.poll, "absent")
+
+        statements = [
+            query["sql"]
+            for query in ctx.captured_queries
+            if not query["sql"].startswith(SAVEPOINT_SQL)
+        ]
+        if connection.vendor == "postgresql":
+            # Opção anterior, upsert, contadores e aluno em um só comando
+            self.assertEqual(len(statements), 1)
+        else:
+            # Aluno com a opção atual, upsert e contadores
+            self.assertEqual(len(statements), 3)
+            self.assertIn("students_student", statements[0])
+            self.assertIn("polls_vote", statements[0])
+            self.assertIn("RETURNING", statements[1])
+        self.assertEqual(previous, "round_trip")
+        self.assertEqual(vote.pk, Vote.objects.get(student=self.student).pk)
+        self.assertEqual(
+            (student.name, student.user_id), ("Aluno", self.student.user_id)
+        )
+        counts = PollOptionCounts.objects.get(poll=self.poll)
+        self.assertEqual((counts.round_trip, counts.absent), (0, 1))
+
+    def test_CT_31_2_removed_student_cannot_vote(self):
+        student_id = self.student.pk
+        self.student.delete()
+
+        with self.assertRaises(Student.DoesNotExist):
+            Vote.set_option(Student(pk=student_id), self.poll, "absent")
+        self.assertFalse(Vote.objects.filter(poll=self.poll).exists())
+
+    def test_CT_32_deadline_still_applies(self):
+        past_poll = Poll.objects.create(date=timezone.localdate() - timedelta(days=1))
+
+        response = self.set_vote("absent", poll=past_poll)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Vote.objects.filter(poll=past_poll).exists())
+
+
+class VoteBatchViewTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.student = Student.objects.create(
+            user=User.objects.create(username="aluno"),
+            name="Aluno",
+            university_id="UESPI",
+        )
+        start = timezone.localdate() + timedelta(days=1)
+        self.polls = [
+            Poll.objects.create(date=start + timedelta(days=i)) for i in range(5)
+        ]
+
+    def batch(self, payload):
+        request = self.factory.put("/votes/batch/", payload, format="json")
+        force_authenticate(request, user=self.student.user)
+        return VoteBatchView.as_view()(request)
+
+    def test_CT_33_date_range_votes_whole_week(self):
+        Vote.set_option(self.student, self.polls[0], "one_way_return")
+
+        response = self.batch(
+            {
+                "start_date": str(self.polls[0].date),
+                "end_date": str(self.polls[-1].date),
+                "option": "round_trip",
+            }
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["saved"], 5)
+        self.assertEqual(
+            [r["status"] for r in response.data["results"]],
+            ["updated", "created", "created", "created", "created"],
+        )
+        self.assertEqual(
+            Vote.objects.filter(student=self.student, option="round_trip").count(), 5
+        )
+
+    def test_CT_34_rejects_past_deadline_and_keeps_the_rest(self):
+        past = Poll.objects.create(date=timezone.localdate() - timedelta(days=1))
+
+        response = self.batch(
+            {
+                "votes": [
+                    {"poll": past.id, "option": "absent"},
+                    {"poll": self.polls[0].id, "option": "absent"},
+                    {"poll": 999999, "option": "absent"},
+                ]
+            }
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [r["status"] for r in response.data["results"]],
+            ["rejected", "created", "rejected"],
+        )
+        self.assertEqual((response.data["saved"], response.data["rejected"]), (1, 2))
+        self.assertFalse(Vote.objects.filter(poll=past).exists())
+        self.assertEqual(PollOptionCounts.objects.get(poll=self.polls[0]).absent, 1)
+
+    def test_CT_35_write_queries_do_not_grow_with_batch_size(self):
+        other = Student.objects.create(
+            user=User.objects.create(username="outro"),
+            name="Outro",
+            university_id="UESPI",
+        )
+
+        def queries_for(student, polls):
+            request = self.factory.put(
+                "/votes/batch/",
+                {"votes": [{"poll": poll.id, "option": "absent"} for poll in polls]},
+                format="json",
+            )
+            force_authenticate(request, user=student.user)
+            with CaptureQueriesContext(connection) as ctx:
+                VoteBatchView.as_view()(request)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(
+            queries_for(other, self.polls[:2]), queries_for(self.student, self.polls)
+        )
+
+    def test_CT_36_invalid_payloads(self):
+        poll_id = self.polls[0].id
+        for payload in (
+            {},
+            {"votes": []},
+            {"votes": [{"poll": poll_id, "option": "absent"}] * 2},
+            {"start_date": "2030-01-10", "end_date": "2030-01-01", "option": "absent"},
+        ):
+            self.assertEqual(
+                self.batch(payload).status_code, status.HTTP_400_BAD_REQUEST
+            )
+
+
+class VotePreferenceTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.student = Student.objects.create(
+            user=User.objects.create(username="aluno"),
+            name="Aluno",
+            university_id="UESPI",
+        )
+        self.other = Student.objects.create(
+            user=User.objects.create(username="outro"),
+            name="Outro",
+            university_id="UESPI",
+        )
+        # Próxima semana, de segunda a sexta
+        today = timezone.localdate()
+        monday = today + timedelta(days=7 - today.weekday())
+        self.week = [monday + timedelta(days=i) for i in range(5)]
+
+    def put_preferences(self, student, payload):
+        request = self.factory.put("/votes/preferences/", payload, format="json")
+        force_authenticate(request, user=student.user)
+        return VotePreferenceView.as_view()(request)
+
+    def test_CT_37_put_replaces_pattern(self):
+        self.put_preferences(self.student, [{"weekday": 0, "option": "absent"}])
+        response = self.put_preferences(
+            self.student,
+            [
+                {"weekday": 4, "option": "absent"},
+                {"weekday": 0, "option": "round_trip"},
+            ],
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data,
+            [
+                {"weekday": 0, "option": "round_trip"},
+                {"weekday": 4, "option": "absent"},
+            ],
+        )
+        self.assertEqual(self.student.vote_preferences.count(), 2)
+
+    def test_CT_38_put_rejects_repeated_weekday(self):
+        response = self.put_preferences(
+            self.student,
+            [
+                {"weekday": 1, "option": "absent"},
+                {"weekday": 1, "option": "round_trip"},
+            ],
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_CT_39_materialize_creates_default_votes(self):
+        VotePreference.objects.create(
+            student=self.student, weekday=0, option="round_trip"
+        )
+        VotePreference.objects.create(student=self.student, weekday=4, option="absent")
+        VotePreference.objects.create(student=self.other, weekday=0, option="absent")
+        polls = [Poll.objects.create(date=day) for day in self.week]
+
+        created = VotePreference.materialize(polls)
+
+        self.assertEqual(created, 3)
+        monday, friday = polls[0], polls[4]
+        self.assertEqual(
+            dict(Vote.objects.filter(poll=monday).values_list("student", "option")),
+            {self.student.id: "round_trip", self.other.id: "absent"},
+        )
+        self.assertEqual(Vote.objects.get(poll=friday).option, "absent")
+        self.assertEqual(PollOptionCounts.objects.get(poll=monday).round_trip, 1)
+
+    def test_CT_40_explicit_vote_wins_over_default(self):
+        VotePreference.objects.create(
+            student=self.student, weekday=0, option="round_trip"
+        )
+        monday = Poll.objects.create(date=self.week[0])
+        Vote.set_option(self.student, monday, "one_way_return")
+
+        self.assertEqual(VotePreference.materialize([monday]), 0)
+        self.assertEqual(Vote.objects.get(poll=monday).option, "one_way_return")
+
+        # E o voto padrão pode ser trocado depois como qualquer voto
+        VotePreference.objects.create(student=self.other, weekday=0, option="absent")
+        tuesday = Poll.objects.create(date=self.week[1])
+        VotePreference.materialize([monday, tuesday])
+        Vote.set_option(self.other, monday, "round_trip")
+        self.assertEqual(
+            PollOptionCounts.objects.get(poll=monday).as_dict(),
+            {
+                "round_trip": 1,
+                "one_way_outbound": 0,
+                "one_way_return": 1,
+                "absent": 0,
+            },
+        )
+
+    def test_CT_41_materialize_skips_options_past_deadline(self):
+        VotePreference.objects.create(
+            student=self.student,
+            weekday=timezone.localdate().weekday(),
+            option="round_trip",
+        )
+        poll = Poll.objects.create(date=timezone.localdate())
+
+        with patch("polls.models.Poll.can_vote_for_option", return_value=False):
+            self.assertEqual(VotePreference.materialize([poll]), 0)
+        self.assertFalse(Vote.objects.filter(poll=poll).exists())
+
+
+class PollArchiveTests(TestCase):
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.student = Student.objects.create(
+            user=User.objects.create(username="aluno"),
+            name="Aluno",
+            university_id="UESPI",
+        )
+        self.other = Student.objects.create(
+            user=User.objects.create(username="outro"),
+            name="Outro",
+            university_id="UESPI",
+        )
+        self.old_polls = [
+            Poll.objects.create(date=self.today - timedelta(days=i)) for i in (3, 2, 1)
+        ]
+        for poll in self.old_polls:
+            Vote.objects.create(student=self.student, poll=poll, option="round_trip")
+            Vote.objects.create(student=self.other, poll=poll, option="absent")
+        self.trip = Trip.objects.create(poll=self.old_polls[0], trip_type="outbound")
+        self.current = Poll.objects.create(date=self.today)
+        Vote.objects.create(student=self.student, poll=self.current, option="absent")
+
+    def test_CT_44_moves_old_polls_to_history(self):
+        archived = archive_polls(Poll.objects.filter(date__lt=self.today), chunk_size=2)
+
+        self.assertEqual(
+            (archived["polls"], archived["votes"], archived["trips"]), (3, 6, 1)
+        )
+        self.assertEqual(archived["dates"], [poll.date for poll in self.old_polls])
+        self.assertEqual(list(Poll.objects.all()), [self.current])
+        self.assertEqual(Vote.objects.count(), 1)
+        self.assertFalse(Trip.objects.exists())
+
+        history = ArchivedPoll.objects.get(pk=self.old_polls[0].pk)
+        self.assertEqual((history.round_trip, history.absent), (1, 1))
+        self.assertEqual(
+            ArchivedVote.objects.filter(student_id=self.student.id).count(), 3
+        )
+        self.assertEqual(
+            ArchivedTrip.objects.get(pk=self.trip.pk).poll_date,
+            self.old_polls[0].date,
+        )
+
+    def test_CT_45_chunks_bound_the_work_per_transaction(self):
+        with CaptureQueriesContext(connection) as ctx:
+            archive_polls(Poll.objects.filter(date__lt=self.today), chunk_size=1)
+
+        inserts = [q["sql"] for q in ctx.captured_queries if "archivedpoll" in q["sql"]]
+        self.assertEqual(len(inserts), 3)
+        # Nenhum objeto é carregado: só ids e datas das enquetes do lote
+        self.assertFalse(
+            any(
+                q["sql"].startswith('SELECT "polls_vote"') for q in ctx.captured_queries
+            )
+        )
+
+    def test_CT_46_votes_leave_in_pk_ordered_batches(self):
+        with CaptureQueriesContext(connection) as ctx:
+            archived = archive_polls(
+                Poll.objects.filter(date__lt=self.today), chunk_size=3, batch_size=4
+            )
+
+        vote_deletes = [
+            q["sql"]
+            for q in ctx.captured_queries
+            if q["sql"].startswith('DELETE FROM "polls_vote"')
+        ]
+        self.assertEqual(len(vote_deletes), 2)
+        self.assertEqual(archived["votes"], 6)
+        self.assertEqual(
+            list(ArchivedVote.objects.order_by("id").values_list("poll_id", flat=True)),
+            sorted(ArchivedVote.objects.values_list("poll_id", flat=True)),
+        )
+
+    def test_CT_47_time_budget_stops_and_resume_finishes(self):
+        polls = Poll.objects.filter(date__lt=self.today)
+
+        stopped = archive_polls(polls, time_budget=0)
+        self.assertFalse(stopped["complete"])
+        self.assertEqual(stopped["polls"], 0)
+
+        # Interrompido depois do retrato das enquetes, no meio dos votos
+        with patch("polls.archive.time.monotonic", side_effect=[0, 0, 0, 99, 99]):
+            partial = archive_polls(polls, chunk_size=3, batch_size=2, time_budget=1)
+        self.assertFalse(partial["complete"])
+        self.assertEqual(partial["votes"], 2)
+        self.assertEqual(Poll.objects.count(), 4)
+
+        finished = archive_polls(polls)
+        self.assertTrue(finished["complete"])
+        self.assertEqual(ArchivedVote.objects.count(), 6)
+        history = ArchivedPoll.objects.get(pk=self.old_polls[0].pk)
+        self.assertEqual((history.round_trip, history.absent), (1, 1))
+        self.assertEqual(list(Poll.objects.all()), [self.current])
+
+    def test_CT_48_archive_command_reports_progress(self):
+        out = StringIO()
+        call_command(
+            "archive_old_polls",
+            "--before",
+            str(self.today),
+            "--chunk-size",
+            "2",
+            stdout=out,
+        )
+
+        output = out.getvalue()
+        self.assertIn("Archived 2/3 poll(s)", output)
+        self.assertIn("Archived 3 poll(s)", output)
+        self.assertEqual(list(Poll.objects.all()), [self.current])
+
+
+class PollClosingTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.user = User.objects.create(username="motorista")
+        self.today = timezone.localdate()
+        self.bp = BoardingPoint.objects.create(name="Centro", route_order=0)
+        self.student = Student.objects.create(
+            user=User.objects.create(username="ana"),
+            name="Ana",
+            boarding_point=self.bp,
+            university_id="UESPI",
+        )
+        self.poll = Poll.objects.create(date=self.today)
+        Vote.set_option(self.student, self.poll, "round_trip")
+
+    def at(self, hour, minute=0):
+        return timezone.make_aware(datetime.combine(self.today, time(hour, minute)))
+
+    def get_list(self, trip_type):
+        request = self.factory.get(
+            f"/polls/{self.poll.id}/boarding_list/?trip_type={trip_type}"
+        )
+        force_authenticate(request, user=self.user)
+        return PollBoardingListView.as_view()(request, pk=self.poll.id)
+
+    def test_CT_49_phases_close_at_the_deadlines(self):
+        trip = Trip.objects.create(poll=self.poll, trip_type="outbound")
+        self.assertEqual(close_due_polls(self.at(11, 59)), [])
+
+        self.assertEqual(close_due_polls(self.at(12, 1)), [(self.today, "outbound")])
+        self.poll.refresh_from_db()
+        self.assertEqual(self.poll.status, "outbound_closed")
+        self.assertTrue(
+            BoardingListSnapshot.objects.filter(
+                poll=self.poll, trip_type="outbound"
+            ).exists()
+        )
+        self.assertEqual(len(trip.get_stop_plan()), 1)
+
+        self.assertEqual(close_due_polls(self.at(18, 1)), [(self.today, "return")])
+        self.poll.refresh_from_db()
+        self.assertEqual(self.poll.status, "closed")
+        self.assertEqual(close_due_polls(self.at(18, 2)), [])
+
+    def test_CT_50_past_open_polls_close_entirely(self):
+        past = Poll.objects.create(date=self.today - timedelta(days=1))
+
+        closed = close_due_polls(self.at(8))
+
+        self.assertEqual(closed, [(past.date, "outbound"), (past.date, "return")])
+        past.refresh_from_db()
+        self.assertEqual(past.status, "closed")
+        self.poll.refresh_from_db()
+        self.assertEqual(self.poll.status, "open")
+        # O fechamento não cria viagens
+        self.assertFalse(Trip.objects.exists())
+
+    def test_CT_51_closed_poll_reads_frozen_list_without_votes(self):
+        close_due_polls(self.at(18, 1))
+        # Alterações depois do fechamento não mudam a lista congelada
+        Vote.objects.filter(poll=self.poll).update(option="absent")
+
+        with CaptureQueriesContext(connection) as ctx:
+            outbound = self.get_list("outbound")
+            back = self.get_list("return")
+
+        self.assertFalse(any("polls_vote" in q["sql"] for q in ctx.captured_queries))
+        self.assertEqual(outbound.data[0]["point"]["name"], "Centro")
+        self.assertEqual(
+            outbound.data[0]["students"], [{"id": self.student.id, "name": "Ana"}]
+        )
+        self.assertEqual(back.data[0]["group_name"], "UESPI")
+
+    def test_CT_52_closed_phase_rejects_votes_without_clock(self):
+        Poll.objects.filter(pk=self.poll.pk).update(status="outbound_closed")
+        self.poll.refresh_from_db()
+
+        with patch("polls.models.timezone.now") as now:
+            self.assertFalse(self.poll.can_vote_for_option("round_trip"))
+            self.assertFalse(self.poll.can_vote_for_option("one_way_outbound"))
+            now.assert_not_called()
+
+    def test_CT_53_start_trip_reuses_frozen_plan(self):
+        trip = Trip.objects.create(poll=self.poll, trip_type="outbound")
+        close_due_polls(self.at(12, 1))
+        planned = [stop.pk for stop in trip.get_stop_plan()]
+
+        stop = trip.start_trip()
+
+        self.assertEqual(stop, self.bp)
+        self.assertEqual([stop.pk for stop in trip.get_stop_plan()], planned)
+
+    def test_CT_54_close_command(self):
+        out = StringIO()
+        with patch("django.utils.timezone.now", return_value=self.at(12, 1)):
+            call_command("close_polls", stdout=out)
+
+        self.assertIn(f"Closed outbound voting for poll {self.today}", out.getvalue())
+
+    def test_CT_54_1_trip_created_after_closing_gets_frozen_plan(self):
+        close_due_polls(self.at(12, 1))
+        client = APIClient()
+        client.force_authenticate(self.user)
+        payload = {"poll": self.poll.id, "trip_type": "outbound"}
+
+        response = client.post(reverse("trip-create"), payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        trip = Trip.objects.get(pk=response.data["id"])
+        self.assertEqual(
+            [stop.boarding_point for stop in trip.get_stop_plan()], [self.bp]
+        )
+
+        response = client.post(reverse("trip-create"), payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BoardingListAggregationTests(TestCase):
+    def setUp(self):
+        self.poll = Poll.objects.create(date=timezone.localdate())
+        self.centro = BoardingPoint.objects.create(name="Centro", route_order=0)
+        self.bairro = BoardingPoint.objects.create(name="Bairro", route_order=1)
+        riders = [
+            ("bia", self.bairro, "UESPI", "round_trip"),
+            ("ana", self.bairro, "IFPI", "one_way_outbound"),
+            ("caio", self.centro, "UESPI", "one_way_return"),
+            ("davi", self.centro, "UESPI", "absent"),
+        ]
+        self.students = {}
+        for name, point, university, option in riders:
+            student = Student.objects.create(
+                user=User.objects.create(username=name),
+                name=name.title(),
+                boarding_point=point,
+                university_id=university,
+            )
+            Vote.objects.create(student=student, poll=self.poll, option=option)
+            self.students[name] = student
+
+    def rider(self, name):
+        student = self.students[name]
+        return {"id": student.id, "name": student.name, "user_id": student.user_id}
+
+    def test_CT_55_python_path_groups_in_route_order(self):
+        outbound = aggregate_riders(self.poll.id, "outbound", in_db=False)
+        back = aggregate_riders(self.poll.id, "return", in_db=False)
+
+        self.assertEqual(
+            outbound,
+            [
+                {
+                    "stop": self.bairro.id,
+                    "point": {
+                        "id": self.bairro.id,
+                        "name": "Bairro",
+                        "address_reference": None,
+                        "route_order": 1,
+                    },
+                    "students": [self.rider("ana"), self.rider("bia")],
+                }
+            ],
+        )
+        self.assertEqual(
+            back,
+            [{"stop": "UESPI", "students": [self.rider("bia"), self.rider("caio")]}],
+        )
+
+    @skipUnless(connection.vendor == "postgresql", "agregação no banco é do Postgres")
+    def test_CT_56_database_path_matches_python_path(self):
+        for trip_type in ("outbound", "return"):
+            self.assertEqual(
+                aggregate_riders(self.poll.id, trip_type, in_db=True),
+                aggregate_riders(self.poll.id, trip_type, in_db=False),
+            )
+
+    def test_CT_57_benchmark_command(self):
+        out = StringIO()
+        call_command(
+            "bench_boarding_list", "--votes", "20", "--repeat", "1", stdout=out
+        )
+
+        self.assertIn("20 votes, outbound", out.getvalue())
+        self.assertIn("20 votes, return", out.getvalue())
+        self.assertEqual(Vote.objects.count(), 4)
+
+
+class HotQueryIndexTests(TestCase):
+    def test_CT_58_hot_queries_use_indexes(self):
+        out = StringIO()
+        call_command(
+            "explain_hot_queries", "--students", "40", "--weeks", "1", stdout=out
+        )
+
+        self.assertIn("All hot queries use an index", out.getvalue())
+        self.assertNotIn("FULL SCAN", out.getvalue())
+        # O conjunto de dados semeado é desfeito no fim
+        self.assertFalse(Poll.objects.exists())
+        self.assertFalse(Student.objects.exists())
+
+    @skipUnless(connection.vendor == "postgresql", "EXPLAIN ANALYZE do PostgreSQL")
+    def test_CT_58_1_postgres_plans_have_no_sequential_scans(self):
+        out = StringIO()
+        call_command(
+            "explain_hot_queries",
+            "--students",
+            "200",
+            "--weeks",
+            "2",
+            "--force-index",
+            stdout=out,
+        )
+
+        self.assertIn("All hot queries use an index", out.getvalue())
+        self.assertNotIn("FULL SCAN", out.getvalue())
+
+    def test_CT_58_2_postgres_plan_text_is_parsed_as_object(self):
+        plan = {
+            "Plan": {
+                "Node Type": "Nested Loop",
+                "Plans": [
+                    {"Node Type": "Seq Scan", "Relation Name": "polls_vote"},
+                    {"Node Type": "Index Scan", "Relation Name": "trips_trip"},
+                ],
+            },
+            "Execution Time": 2.5,
+        }
+        queryset = MagicMock()
+        # Formato do Django no PostgreSQL: cada item da lista vira um json.dumps
+        queryset.explain.return_value = json.dumps(plan)
+
+        _, elapsed, scanned = ExplainHotQueries().explain_postgres(
+            queryset, ["polls_vote"]
+        )
+
+        self.assertEqual(scanned, ["polls_vote"])
+        self.assertEqual(elapsed, 0.0025)
+
+
+class SyntheticDatasetTests(TestCase):
+    def test_CT_59_seed_dataset_creates_trips_in_every_state(self):
+        out = StringIO()
+        call_command(
+            "seed_dataset",
+            "--students",
+            "30",
+            "--weeks",
+            "2",
+            "--points",
+            "3",
+            stdout=out,
+        )
+
+        self.assertIn("30 students", out.getvalue())
+        self.assertEqual(Vote.objects.count(), 30 * Poll.objects.count())
+        self.assertEqual(PollOptionCounts.find_mismatches(), {})
+        self.assertTrue(Trip.objects.filter(status="in_progress").exists())
+        self.assertTrue(Trip.objects.exclude(status="in_progress").exists())
+
+        call_command("seed_dataset", "--clear", "--students", "0", stdout=StringIO())
+        self.assertFalse(Student.objects.exists())
+        self.assertFalse(BoardingPoint.objects.exists())
+
+    def test_CT_60_benchmarks_save_and_compare_baseline(self):
+        call_command(
+            "seed_dataset", "--students", "20", "--weeks", "1", stdout=StringIO()
+        )
+        baseline = Path(self.enterContext(TemporaryDirectory())) / "baseline.json"
+
+        out = StringIO()
+        call_command(
+            "run_benchmarks", "--iterations", "2", "--save", str(baseline), stdout=out
+        )
+        saved = json.loads(baseline.read_text())
+        self.assertEqual(saved["dataset"]["students"], 20)
+        for metrics in saved["endpoints"].values():
+            self.assertEqual(metrics["status"], [200])
+            self.assertGreater(metrics["bytes"], 0)
+
+        # Uma linha de base com menos consultas acusa regressão
+        saved["endpoints"]["trip-detail"]["queries"] = 0
+        baseline.write_text(json.dumps(saved))
+        with self.assertRaises(CommandError):
+            call_command(
+                "run_benchmarks",
+                "--iterations",
+                "2",
+                "--compare",
+                str(baseline),
+                "--tolerance",
+                "100",
+                stdout=StringIO(),
+            )
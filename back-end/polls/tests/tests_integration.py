@@ -29,7 +29,7 @@ class PollsAPITestCase(APITestCase):
             name="Ana Silva",
             phone="111111111",
             class_shift="M",
-            university="UESPI",
+            university_id="UESPI",
             boarding_point=self.ponto_a,
         )
         self.student_user_2 = User.objects.create_user(
@@ -40,7 +40,7 @@ class PollsAPITestCase(APITestCase):
             name="Bruno Costa",
             phone="222222222",
             class_shift="E",
-            university="IFPI",
+            university_id="IFPI",
             boarding_point=self.ponto_a,
         )
         self.poll = Poll.objects.create(date=date.today())
@@ -94,8 +94,10 @@ class PollsAPITestCase(APITestCase):
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["student"]["name"], self.student_1.name)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(
+            response.data["results"][0]["student"]["name"], self.student_1.name
+        )
 
     def test_get_boarding_list_grouped_by_point(self):
         Vote.objects.create(student=self.student_1, poll=self.poll, option="round_trip")
@@ -2,16 +2,21 @@ from django.urls import path
 from .views import (
     PollListView,
     PollDetailView,
+    PollTodayView,
     PollBoardingListView,
     CreateWeeklyPollsView,
     CleanOldPollsView,
     VoteCreateView,
+    VoteSetView,
+    VoteBatchView,
+    VotePreferenceView,
     VoteListView,
     VoteUpdateView,
 )
 
 urlpatterns = [
     path("polls/", PollListView.as_view(), name="poll-list"),
+    path("polls/today/", PollTodayView.as_view(), name="poll-today"),
     path("polls/<int:pk>/", PollDetailView.as_view(), name="poll-detail"),
     path(
         "polls/<int:pk>/boarding_list/",
@@ -29,6 +34,13 @@ urlpatterns = [
         name="clean-old-polls",
     ),
     path("votes/", VoteListView.as_view(), name="vote-list"),
+    path("votes/set/", VoteSetView.as_view(), name="vote-set"),
+    path("votes/batch/", VoteBatchView.as_view(), name="vote-batch"),
+    path(
+        "votes/preferences/",
+        VotePreferenceView.as_view(),
+        name="vote-preferences",
+    ),
     path("votes/create/", VoteCreateView.as_view(), name="vote-create"),
     path("votes/<int:pk>/update/", VoteUpdateView.as_view(), name="vote-update"),
 ]
@@ -1,32 +1,130 @@
 from rest_framework import generics, permissions, status, serializers
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.db import IntegrityError, transaction
 from django.utils import timezone
-from .models import Poll, Vote
-from .serializers import PollSerializer, VoteSerializer, BoardingListSerializer
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from .models import Poll, Vote, VotePreference
+from .archive import archive_polls
+from .scheduler import schedule_polls
+from .serializers import (
+    PollSerializer,
+    PollSummarySerializer,
+    PollTodaySerializer,
+    VoteSerializer,
+    VoteBatchSerializer,
+    VoteUpdateSerializer,
+    VotePreferenceSerializer,
+    BoardingListSerializer,
+)
 from boarding_points.models import BoardingPoint
+from authentication.authentication import ClaimsUser
+from authentication.models import get_profile
+from common.pagination import KeysetCursorPagination
+from common.views import SparseFieldsetMixin
+from students.models import Student
+from trips.manifest import get_poll_riders
+
+
+def poll_etag(request, pk):
+    # Uma consulta indexada: as versões mudam a cada voto ou aluno alterado
+    state = (
+        Poll.objects.filter(pk=pk)
+        .values("data_version", "option_counts__version", "status")
+        .first()
+    )
+    if state is None:
+        return None
+    trip_type = request.GET.get("trip_type", "")
+    return (
+        f"{request.path}-{state['data_version']}-"
+        f"{state['option_counts__version']}-{state['status']}-{trip_type}"
+    )
+
+
+MAX_SCHEDULE_WEEKS = 8
+CLEANUP_TIME_BUDGET = 20  # segundos
+
+revalidate_with_poll_etag = [
+    cache_control(private=True, no_cache=True),
+    condition(etag_func=poll_etag),
+]
+
+
+class PollListView(SparseFieldsetMixin, generics.ListAPIView):
+    """
+    Lista as enquetes. Com ?summary=true cada enquete traz apenas a contagem
+    por opção em vez de todos os votos aninhados.
+    """
 
-from datetime import date, timedelta
-
-
-class PollListView(generics.ListAPIView):
     queryset = Poll.objects.all().order_by("date")
     serializer_class = PollSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetCursorPagination
+    cursor_ordering = "date"
+
+    def is_summary(self):
+        return self.request.query_params.get("summary") in ("1", "true")
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.is_summary():
+            return queryset.select_related("option_counts")
+        return queryset.prefetch_related("votes__student")
+
+    def get_serializer_class(self):
+        if self.is_summary():
+            return PollSummarySerializer
+        return PollSerializer
+
+
+class PollTodayView(APIView):
+    """
+    Enquete do dia com as duas viagens e a contagem por opção, sem votos
+    aninhados. Busca pela data (única) em duas consultas fixas.
+    """
+
     permission_classes = [permissions.IsAuthenticated]
 
+    def get(self, request):
+        today = timezone.localtime(timezone.now()).date()
+        poll = (
+            Poll.objects.filter(date=today)
+            .select_related("option_counts")
+            .prefetch_related("trips")
+            .first()
+        )
+
+        if poll is None:
+            return Response(
+                {"detail": "Não há enquete para hoje."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        return Response(PollTodaySerializer(poll).data)
+
 
 class PollDetailView(generics.RetrieveAPIView):
     queryset = Poll.objects.all()
     serializer_class = PollSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    @method_decorator(revalidate_with_poll_etag)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
 
 class PollBoardingListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    @method_decorator(revalidate_with_poll_etag)
     def get(self, request, pk):
-        poll = generics.get_object_or_404(Poll, pk=pk)
+        poll = generics.get_object_or_404(
+            Poll.objects.select_related("option_counts"), pk=pk
+        )
 
         trip_type = request.query_params.get("trip_type")
         if not trip_type:
@@ -37,153 +135,87 @@ class PollBoardingListView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        valid_options = []
-        if "outbound" in trip_type:
-            valid_options = ["round_trip", "one_way_outbound"]
-        elif "return" in trip_type:
-            valid_options = ["round_trip", "one_way_return"]
-
-        votes = poll.votes.filter(option__in=valid_options).select_related(
-            "student", "student__boarding_point"
-        )
-
         if "return" in trip_type:
-            # Para VOLTA: agrupar por universidade
-            university_order = {
-                "IFPI": 0,
-                "CHRISFAPI": 1,
-                "UESPI": 2,
-                "ETC": 3,
-            }
-
-            university_data = {}
-            for vote in votes:
-                student = vote.student
-                university = student.university
-
-                if university not in university_data:
-                    university_data[university] = {
-                        "university": university,
-                        "students": [],
-                    }
-                university_data[university]["students"].append(student)
-
-            # Ordenar universidades
-            sorted_universities = sorted(
-                university_data.values(),
-                key=lambda u: university_order.get(u["university"], 999),
-            )
-
-            # Ordenar estudantes dentro de cada universidade por nome
-            for uni_data in sorted_universities:
-                uni_data["students"].sort(key=lambda s: s.name)
-
-            # Serializar de forma consistente
-            result = []
-            for uni_data in sorted_universities:
-                result.append(
-                    {
-                        "group_name": uni_data["university"],
-                        "students": [
-                            {"id": s.id, "name": s.name} for s in uni_data["students"]
-                        ],
-                    }
-                )
-
-            return Response(result)
+            # Para VOLTA: agrupado por universidade
+            groups = get_poll_riders(poll, "return")
+            result = [
+                {
+                    "group_name": group["stop"],
+                    "students": [
+                        {"id": s.id, "name": s.name} for s in group["students"]
+                    ],
+                }
+                for group in groups
+            ]
+        elif "outbound" in trip_type:
+            # Para IDA: agrupado por ponto de embarque
+            groups = get_poll_riders(poll, "outbound")
+            result = [
+                {
+                    "point": {
+                        "id": group["stop"].id,
+                        "name": group["stop"].name,
+                        "address_reference": group["stop"].address_reference,
+                    },
+                    "students": [
+                        {"id": s.id, "name": s.name} for s in group["students"]
+                    ],
+                }
+                for group in groups
+            ]
         else:
-            # Para IDA: agrupar por ponto de embarque
-            points_data = {}
-            for vote in votes:
-                point = vote.student.boarding_point
-                if point:
-                    if point.id not in points_data:
-                        points_data[point.id] = {
-                            "boarding_point": point,
-                            "students": [],
-                        }
-                    points_data[point.id]["students"].append(vote.student)
-
-            sorted_points = sorted(
-                points_data.values(), key=lambda p: p["boarding_point"].route_order
-            )
-
-            # Serializar de forma consistente com a volta
             result = []
-            for point_data in sorted_points:
-                point = point_data["boarding_point"]
-                result.append(
-                    {
-                        "point": {
-                            "id": point.id,
-                            "name": point.name,
-                            "address_reference": point.address_reference,
-                        },
-                        "students": [
-                            {"id": s.id, "name": s.name} for s in point_data["students"]
-                        ],
-                    }
-                )
-
-            return Response(result)
+
+        return Response(result)
 
 
 class CreateWeeklyPollsView(APIView):
     """
-    Cria enquetes para os dias restantes da semana atual.
+    Cria enquetes a partir de hoje até a sexta da última semana do horizonte.
     - Se chamado na segunda: cria segunda a sexta
     - Se chamado na quarta: cria quarta, quinta e sexta
-    - Se chamado no sábado: cria segunda a sexta da próxima semana
-    - Se chamado no domingo: cria segunda a sexta da próxima semana
+    - Se chamado no sábado ou domingo: começa na próxima segunda
+    - ?weeks=N (ou "weeks" no corpo) estende o horizonte para N semanas
+    - Feriados e recessos cadastrados são pulados
     """
 
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
-        created_polls = []
-        existing_polls = []
         today = timezone.localtime(timezone.now()).date()
 
-        weekday = today.weekday()  # 0=Monday, 6=Sunday
-
-        # Determinar data de início baseado no dia da semana
-        if weekday == 5:  # Sábado
-            start_date = today + timedelta(days=2)  # Próxima segunda
-        elif weekday == 6:  # Domingo
-            start_date = today + timedelta(days=1)  # Próxima segunda
-        else:  # Segunda a sexta
-            start_date = today  # Começa hoje
-
-        # Determinar data de fim (sexta-feira da mesma semana)
-        end_date = start_date
-        while end_date.weekday() < 4:  # Avançar até sexta (weekday = 4)
-            end_date += timedelta(days=1)
-
-        # Criar enquetes do start_date até end_date
-        current_date = start_date
-        while current_date <= end_date:
-            poll, created = Poll.objects.get_or_create(
-                date=current_date, defaults={"status": "open"}
+        # 0 e "" são valores enviados (e inválidos), não ausência do parâmetro
+        weeks = request.data.get("weeks")
+        if weeks is None:
+            weeks = request.query_params.get("weeks")
+        if weeks is not None:
+            try:
+                weeks = int(weeks)
+            except (TypeError, ValueError):
+                weeks = 0
+        if weeks is not None and not 1 <= weeks <= MAX_SCHEDULE_WEEKS:
+            return Response(
+                {
+                    "error": f"'weeks' deve ser um número entre 1 e {MAX_SCHEDULE_WEEKS}."
+                },
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
-            if created:
-                created_polls.append(str(current_date))
-            else:
-                existing_polls.append(str(current_date))
-
-            current_date += timedelta(days=1)
+        schedule = schedule_polls(today, weeks)
 
         return Response(
             {
                 "message": "Processo de criação de enquetes concluído",
-                "created_polls": created_polls,
-                "existing_polls": existing_polls,
-                "total_created": len(created_polls),
-                "total_existing": len(existing_polls),
-                "start_date": str(start_date),
-                "end_date": str(end_date),
+                "created_polls": [str(day) for day in schedule["created"]],
+                "existing_polls": [str(day) for day in schedule["existing"]],
+                "skipped_dates": [str(day) for day in schedule["skipped"]],
+                "total_created": len(schedule["created"]),
+                "default_votes": schedule["default_votes"],
+                "total_existing": len(schedule["existing"]),
+                "start_date": str(schedule["start_date"]),
+                "end_date": str(schedule["end_date"]),
                 "today": str(today),
-                "weekday": weekday,
+                "weekday": today.weekday(),
             }
         )
 
@@ -195,40 +227,222 @@ class CleanOldPollsView(APIView):
     def post(self, request):
         today = timezone.localtime(timezone.now()).date()
 
-        deleted_polls = Poll.objects.filter(date__lt=today)
-        count = deleted_polls.count()
-        deleted_dates = list(deleted_polls.values_list("date", flat=True))
-        deleted_polls.delete()
+        # Enquetes, votos e viagens passadas vão para o histórico; o que não
+        # couber no tempo da requisição fica para a próxima chamada
+        archived = archive_polls(
+            Poll.objects.filter(date__lt=today), time_budget=CLEANUP_TIME_BUDGET
+        )
 
         return Response(
             {
                 "message": "Enquetes antigas removidas com sucesso",
-                "deleted_count": count,
-                "deleted_dates": [str(d) for d in deleted_dates],
+                "deleted_count": archived["polls"],
+                "deleted_dates": [str(d) for d in archived["dates"]],
+                "archived_votes": archived["votes"],
+                "archived_trips": archived["trips"],
+                "complete": archived["complete"],
+            }
+        )
+
+
+def deadline_message(option):
+    if option in ["round_trip", "one_way_outbound"]:
+        return "O prazo para votar em 'Ida e Volta' ou 'Apenas Ida' é até 12:00 do dia da enquete."
+    return "O prazo para votar em 'Apenas Volta' ou 'Não Vou' é até 18:00 do dia da enquete."
+
+
+def request_student_id(request):
+    """
+    Id do aluno autenticado. Com o usuário montado pelas claims do token,
+    vem do id assinado, sem consultar o banco; senão, do perfil do usuário.
+    """
+    if isinstance(request.user, ClaimsUser):
+        student_id = request.user.student_id
+    else:
+        profile = get_profile(request.user)
+        student_id = (
+            profile.person_id if profile and profile.role == "student" else None
+        )
+    if not student_id:
+        raise PermissionDenied("Apenas alunos podem votar.")
+    return student_id
+
+
+def request_student(request):
+    """Aluno autenticado carregado do banco, para respostas que trazem seus dados."""
+    student = Student.objects.filter(pk=request_student_id(request)).first()
+    if student is None:
+        raise PermissionDenied("Apenas alunos podem votar.")
+    return student
+
+
+def set_request_votes(request, choices):
+    """
+    Grava {enquete: opção} do aluno autenticado sem carregá-lo antes: nome e
+    user_id voltam da própria gravação.
+    """
+    try:
+        return Vote.set_options(Student(pk=request_student_id(request)), choices)
+    except Student.DoesNotExist:
+        raise PermissionDenied("Apenas alunos podem votar.")
+
+
+def ensure_can_vote(poll, option):
+    # Valida se o horário permite votar na opção escolhida
+    if not poll.can_vote_for_option(option):
+        raise serializers.ValidationError(deadline_message(option))
+
+
+class VoteSetView(APIView):
+    """
+    Define o voto do aluno na enquete, criando ou atualizando conforme o
+    caso. Repetir a mesma requisição tem o mesmo efeito.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    stateless_writes = True
+
+    def put(self, request):
+        serializer = VoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        poll = serializer.validated_data["poll"]
+        option = serializer.validated_data["option"]
+        ensure_can_vote(poll, option)
+
+        [(vote, previous)] = set_request_votes(request, {poll: option})
+        return Response(
+            VoteSerializer(vote).data,
+            status=status.HTTP_200_OK if previous else status.HTTP_201_CREATED,
+        )
+
+
+class VoteBatchView(APIView):
+    """
+    Vota em várias enquetes de uma vez (ex.: a semana inteira).
+
+    Os prazos são conferidos em uma passada; os votos aceitos são gravados
+    com um único upsert e a resposta traz o resultado de cada enquete.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    stateless_writes = True
+
+    def put(self, request):
+        serializer = VoteBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        if "votes" in data:
+            requested = [(item["poll"], item["option"]) for item in data["votes"]]
+            polls = Poll.objects.in_bulk([poll_id for poll_id, _ in requested])
+        else:
+            polls = {
+                poll.id: poll
+                for poll in Poll.objects.filter(
+                    date__range=(data["start_date"], data["end_date"])
+                ).order_by("date")
             }
+            requested = [(poll_id, data["option"]) for poll_id in polls]
+
+        results = {}
+        choices = {}
+        for poll_id, option in requested:
+            poll = polls.get(poll_id)
+            if poll is None:
+                results[poll_id] = {
+                    "poll": poll_id,
+                    "option": option,
+                    "status": "rejected",
+                    "detail": "Enquete não encontrada.",
+                }
+            elif not poll.can_vote_for_option(option):
+                results[poll_id] = {
+                    "poll": poll_id,
+                    "date": str(poll.date),
+                    "option": option,
+                    "status": "rejected",
+                    "detail": deadline_message(option),
+                }
+            else:
+                choices[poll] = option
+
+        for vote, previous in set_request_votes(request, choices):
+            if previous is None:
+                outcome = "created"
+            elif previous == vote.option:
+                outcome = "unchanged"
+            else:
+                outcome = "updated"
+            results[vote.poll_id] = {
+                "poll": vote.poll_id,
+                "date": str(vote.poll.date),
+                "vote": vote.id,
+                "option": vote.option,
+                "status": outcome,
+            }
+
+        ordered = [results[poll_id] for poll_id, _ in requested]
+        return Response(
+            {
+                "results": ordered,
+                "saved": len(choices),
+                "rejected": len(ordered) - len(choices),
+            }
+        )
+
+
+class VotePreferenceView(APIView):
+    """
+    Padrão semanal de votos do aluno. O PUT substitui o padrão inteiro; os
+    dias omitidos ficam sem voto padrão.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    stateless_writes = True
+
+    def get(self, request):
+        preferences = VotePreference.objects.filter(
+            student_id=request_student_id(request)
         )
+        return Response(VotePreferenceSerializer(preferences, many=True).data)
+
+    def put(self, request):
+        serializer = VotePreferenceSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+
+        weekdays = [item["weekday"] for item in serializer.validated_data]
+        if len(set(weekdays)) != len(weekdays):
+            return Response(
+                {"detail": "Cada dia da semana pode aparecer uma vez."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        student_id = request_student_id(request)
+        with transaction.atomic():
+            VotePreference.objects.filter(student_id=student_id).delete()
+            preferences = VotePreference.objects.bulk_create(
+                VotePreference(student_id=student_id, **item)
+                for item in serializer.validated_data
+            )
+
+        preferences.sort(key=lambda preference: preference.weekday)
+        return Response(VotePreferenceSerializer(preferences, many=True).data)
 
 
 class VoteCreateView(generics.CreateAPIView):
     serializer_class = VoteSerializer
     permission_classes = [permissions.IsAuthenticated]
+    stateless_writes = True
 
     def perform_create(self, serializer):
-        # Valida se o horário permite votar na opção escolhida
         poll = serializer.validated_data["poll"]
         option = serializer.validated_data["option"]
 
-        if not poll.can_vote_for_option(option):
-            if option in ["round_trip", "one_way_outbound"]:
-                raise serializers.ValidationError(
-                    "O prazo para votar em 'Ida e Volta' ou 'Apenas Ida' é até 12:00 do dia da enquete."
-                )
-            else:
-                raise serializers.ValidationError(
-                    "O prazo para votar em 'Apenas Volta' ou 'Não Vou' é até 18:00 do dia da enquete."
-                )
+        ensure_can_vote(poll, option)
 
-        serializer.save(student=self.request.user.student)
+        # Os contadores são atualizados pelo post_save do voto
+        serializer.save(student=request_student(self.request))
 
     def create(self, request, *args, **kwargs):
         try:
@@ -241,33 +455,31 @@ class VoteCreateView(generics.CreateAPIView):
             )
 
 
-class VoteListView(generics.ListAPIView):
+class VoteListView(SparseFieldsetMixin, generics.ListAPIView):
     serializer_class = VoteSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetCursorPagination
+    cursor_ordering = "id"
 
     def get_queryset(self):
-        return Vote.objects.filter(student=self.request.user.student)
+        return Vote.objects.filter(student_id=request_student_id(self.request))
 
 
 class VoteUpdateView(generics.UpdateAPIView):
-    serializer_class = VoteSerializer
+    serializer_class = VoteUpdateSerializer
     permission_classes = [permissions.IsAuthenticated]
+    stateless_writes = True
 
     def get_queryset(self):
-        return Vote.objects.filter(student=self.request.user.student)
+        return Vote.objects.select_related("poll").filter(
+            student_id=request_student_id(self.request)
+        )
 
     def perform_update(self, serializer):
         poll = serializer.instance.poll
         option = serializer.validated_data.get("option", serializer.instance.option)
 
-        if not poll.can_vote_for_option(option):
-            if option in ["round_trip", "one_way_outbound"]:
-                raise serializers.ValidationError(
-                    "O prazo para votar em 'Ida e Volta' ou 'Apenas Ida' é até 12:00 do dia da enquete."
-                )
-            else:
-                raise serializers.ValidationError(
-                    "O prazo para votar em 'Apenas Volta' ou 'Não Vou' é até 18:00 do dia da enquete."
-                )
+        ensure_can_vote(poll, option)
 
-        serializer.save()
+        # Mesmo caminho do PUT /votes/: a opção anterior sai do próprio upsert
+        [(serializer.instance, _)] = set_request_votes(self.request, {poll: option})
@@ -1,3 +1,13 @@
 from django.contrib import admin
 
 # Register your models here.
+from .models import University
+
+
+class UniversityModelAdmin(admin.ModelAdmin):
+    list_display = ("code", "name", "route_order")
+    list_editable = ("route_order",)
+    search_fields = ("code", "name")
+
+
+admin.site.register(University, UniversityModelAdmin)
@@ -0,0 +1,169 @@
+import csv
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from authentication.models import UserProfile
+from boarding_points.models import BoardingPoint
+from .models import Student
+from .serializers import StudentCreateSerializer
+
+
+CSV_FIELDS = StudentCreateSerializer.Meta.fields
+
+BATCH_SIZE = 500
+
+
+def _init_hash_worker():
+    # Processos iniciados por spawn/forkserver não herdam o Django carregado
+    django.setup()
+
+
+def read_rows(file):
+    """Lê o CSV linha a linha: (número da linha no arquivo, dados da linha)."""
+    reader = csv.DictReader(file)
+    missing = {"name", "email", "password"} - set(reader.fieldnames or [])
+    if missing:
+        raise ValueError(f"Missing CSV columns: {', '.join(sorted(missing))}")
+    for row in reader:
+        yield reader.line_num, {
+            field: value.strip() if isinstance(value, str) else value
+            for field, value in row.items()
+            if field in CSV_FIELDS
+        }
+
+
+def validate_batch(rows, seen_emails):
+    """
+    Valida um lote com as regras do cadastro (StudentCreateSerializer). Os
+    e-mails já usados e os pontos de embarque citados são lidos com uma
+    consulta cada para o lote inteiro.
+    Retorna (linhas válidas, erros por linha).
+    """
+    emails = [data.get("email") for _, data in rows if data.get("email")]
+    emails_in_use = set(seen_emails)
+    for username, email in User.objects.filter(
+        Q(email__in=emails) | Q(username__in=emails)
+    ).values_list("username", "email"):
+        emails_in_use.update((username, email))
+
+    boarding_points = BoardingPoint.objects.in_bulk(
+        {
+            int(data["boarding_point"])
+            for _, data in rows
+            if str(data.get("boarding_point") or "").isdigit()
+        }
+    )
+
+    valid, errors = [], []
+    for line, data in rows:
+        serializer = StudentCreateSerializer(
+            data=data,
+            context={
+                "emails_in_use": emails_in_use,
+                "boarding_points": boarding_points,
+            },
+        )
+        if serializer.is_valid():
+            valid.append((line, serializer.validated_data))
+            # Repetido mais abaixo no arquivo conta como e-mail em uso
+            emails_in_use.add(serializer.validated_data["email"])
+            seen_emails.add(serializer.validated_data["email"])
+        else:
+            errors.append({"row": line, "errors": serializer.errors})
+    return valid, errors
+
+
+def integrity_errors(error):
+    """
+    Erro por campo para uma falha de integridade na gravação do lote, no
+    lugar do texto do banco.
+    """
+    message = str(error).lower()
+    if "username" in message or "email" in message:
+        return {"email": ["This email is already in use"]}
+    if "boarding_point" in message or "foreign key" in message:
+        return {"boarding_point": ["Boarding point no longer exists."]}
+    return {"non_field_errors": ["The row could not be saved."]}
+
+
+def save_batch(rows, hashes, group):
+    """Grava usuários, participações no grupo e alunos com inserções em lote."""
+    with transaction.atomic():
+        users = User.objects.bulk_create(
+            User(username=data["email"], email=data["email"], password=password)
+            for (_, data), password in zip(rows, hashes)
+        )
+        User.groups.through.objects.bulk_create(
+            User.groups.through(user_id=user.pk, group_id=group.pk) for user in users
+        )
+        students = Student.objects.bulk_create(
+            Student(
+                user=user,
+                role="student",
+                **{
+                    field: value
+                    for field, value in data.items()
+                    if field not in ("email", "password")
+                },
+            )
+            for user, (_, data) in zip(users, rows)
+        )
+        # bulk_create não dispara os sinais que mantêm o perfil dos usuários
+        UserProfile.record(students)
+    return students
+
+
+def import_students(file, workers=None, batch_size=BATCH_SIZE):
+    """
+    Importa alunos de um CSV (colunas de StudentCreateSerializer) em lotes
+    de batch_size linhas, sem carregar o arquivo inteiro. Os hashes de senha
+    (PBKDF2) são calculados em um pool de workers processos; com workers=0
+    no próprio processo.
+
+    Retorna {"created": total, "errors": [{"row", "errors"}]}, com a linha
+    do arquivo (o cabeçalho é a linha 1) e os erros no formato do DRF.
+    """
+    group, _ = Group.objects.get_or_create(name="students")
+    rows = read_rows(file)
+    report = {"created": 0, "errors": []}
+    seen_emails = set()
+
+    pool = None
+    if workers != 0:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_hash_worker)
+    try:
+        while batch := list(islice(rows, batch_size)):
+            valid, errors = validate_batch(batch, seen_emails)
+            report["errors"].extend(errors)
+            if not valid:
+                continue
+
+            passwords = [data["password"] for _, data in valid]
+            if pool is None:
+                hashes = [make_password(password) for password in passwords]
+            else:
+                hashes = list(pool.map(make_password, passwords, chunksize=16))
+
+            try:
+                save_batch(valid, hashes, group)
+            except IntegrityError as error:
+                # Outro cadastro usou um dos e-mails (ou um ponto foi apagado)
+                # entre a validação e a gravação
+                report["errors"].extend(
+                    {"row": line, "errors": integrity_errors(error)}
+                    for line, _ in valid
+                )
+            else:
+                report["created"] += len(valid)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    report["errors"].sort(key=lambda error: error["row"])
+    return report
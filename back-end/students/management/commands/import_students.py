@@ -0,0 +1,54 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from students.importer import BATCH_SIZE, import_students
+
+
+class Command(BaseCommand):
+    help = (
+        "Register students in bulk from a CSV file with the registration columns "
+        "(name, phone, class_shift, university, email, password, boarding_point). "
+        "Rows are validated like the registration endpoint, passwords are hashed "
+        "in a process pool and valid rows are inserted in batches"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_file")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Hashing processes (default: one per CPU; 0 hashes in this process)",
+        )
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            "--report", metavar="PATH", help="Write the per-row report as JSON"
+        )
+        parser.add_argument("--encoding", default="utf-8-sig")
+
+    def handle(self, *args, csv_file, workers, batch_size, report, encoding, **kwargs):
+        try:
+            with open(csv_file, newline="", encoding=encoding) as file:
+                result = import_students(file, workers=workers, batch_size=batch_size)
+        except (OSError, ValueError) as error:
+            raise CommandError(str(error))
+
+        for error in result["errors"]:
+            details = "; ".join(
+                f"{field}: {' '.join(str(message) for message in messages)}"
+                for field, messages in error["errors"].items()
+            )
+            self.stdout.write(f"row {error['row']}: {details}")
+
+        if report:
+            with open(report, "w") as file:
+                json.dump(result, file, indent=2)
+
+        message = (
+            f"Created {result['created']} student(s), "
+            f"{len(result['errors'])} row(s) with errors"
+        )
+        if result["errors"]:
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
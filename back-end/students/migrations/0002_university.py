@@ -0,0 +1,80 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:40
+
+from django.db import migrations, models
+
+
+# Ordem da volta e nomes que antes estavam fixos no código (os mesmos que a
+# API de viagens já devolvia)
+UNIVERSITIES = (
+    ("IFPI", "Instituto Federal do Piaui"),
+    ("CHRISFAPI", "Christus Faculdade do Piaui"),
+    ("UESPI", "Universidade Estadual do Piaui"),
+    ("ETC", "Other"),
+)
+
+
+def create_universities(apps, schema_editor):
+    University = apps.get_model("students", "University")
+    Student = apps.get_model("students", "Student")
+
+    codes = [code for code, _ in UNIVERSITIES]
+    # Códigos já usados por alunos e fora da lista vão para o fim da rota
+    codes += sorted(
+        set(Student.objects.values_list("university", flat=True)) - set(codes)
+    )
+    names = dict(UNIVERSITIES)
+    University.objects.bulk_create(
+        [
+            University(code=code, name=names.get(code, code), route_order=position)
+            for position, code in enumerate(codes)
+        ]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("students", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="University",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "code",
+                    models.CharField(
+                        help_text="Ex: UESPI, IFPI", max_length=50, unique=True
+                    ),
+                ),
+                ("name", models.CharField(max_length=255)),
+                (
+                    "route_order",
+                    models.PositiveIntegerField(
+                        db_index=True,
+                        default=0,
+                        help_text="Ordem em que o motorista passa na universidade na volta (0, 1, 2...)",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "universities",
+                "ordering": ["route_order", "code"],
+            },
+        ),
+        migrations.AlterField(
+            model_name="student",
+            name="university",
+            field=models.CharField(),
+        ),
+        migrations.RunPython(create_universities, migrations.RunPython.noop),
+    ]
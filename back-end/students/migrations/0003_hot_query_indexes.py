@@ -0,0 +1,28 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("boarding_points", "0001_initial"),
+        ("students", "0002_university"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(
+                fields=["boarding_point", "name"], name="students_point_name_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(
+                fields=["university", "name"], name="students_university_name_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-18 20:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("students", "0003_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="student",
+            name="university",
+            field=models.ForeignKey(
+                db_column="university",
+                db_index=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="students",
+                to="students.university",
+                to_field="code",
+            ),
+        ),
+    ]
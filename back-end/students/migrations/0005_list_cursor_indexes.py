@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-18 21:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("boarding_points", "0002_list_cursor_indexes"),
+        ("students", "0004_student_university_fk"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="student",
+            index=models.Index(fields=["name", "id"], name="students_name_id_idx"),
+        ),
+    ]
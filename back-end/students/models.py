@@ -4,18 +4,37 @@ from common.constants import SHIFT_CHOICES
 from common.models import Person
 from boarding_points.models import BoardingPoint
 
-UNIVERSITY_CHOICES = (
-    ("UESPI", "Universidade Estadual do Piauí"),
-    ("CHRISFAPI", "Christus Faculdade do Piauí"),
-    ("IFPI", "Instituto Federal do Piauí"),
-    ("ETC", "Outro"),
-)
+
+class University(models.Model):
+    code = models.CharField(max_length=50, unique=True, help_text="Ex: UESPI, IFPI")
+    name = models.CharField(max_length=255)
+    route_order = models.PositiveIntegerField(
+        default=0,
+        db_index=True,
+        help_text="Ordem em que o motorista passa na universidade na volta (0, 1, 2...)",
+    )
+
+    class Meta:
+        ordering = ["route_order", "code"]
+        verbose_name_plural = "universities"
+
+    def __str__(self):
+        return f"{self.route_order}: {self.code}"
 
 
 class Student(Person):
     registration_date = models.DateField(auto_now_add=True)
     class_shift = models.CharField(choices=SHIFT_CHOICES, blank=False, null=False)
-    university = models.CharField(choices=UNIVERSITY_CHOICES)
+    # A coluna continua guardando o código da universidade; o índice
+    # (university, name) já cobre as buscas pela chave
+    university = models.ForeignKey(
+        University,
+        to_field="code",
+        db_column="university",
+        db_index=False,
+        on_delete=models.PROTECT,
+        related_name="students",
+    )
 
     boarding_point = models.ForeignKey(
         BoardingPoint,
@@ -28,6 +47,19 @@ class Student(Person):
     monthly_payment_cents = models.IntegerField(default=33000, null=True, blank=True)
     last_payment_date = models.DateField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Alunos de um ponto ou de uma universidade, já na ordem da lista
+            models.Index(
+                fields=["boarding_point", "name"], name="students_point_name_idx"
+            ),
+            models.Index(
+                fields=["university", "name"], name="students_university_name_idx"
+            ),
+            # Cursor da listagem de pagamentos
+            models.Index(fields=["name", "id"], name="students_name_id_idx"),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.role:
             self.role = "student"
@@ -1,11 +1,70 @@
 from rest_framework import serializers
 from django.contrib.auth.models import Group, User
-from .models import Student
+from boarding_points.models import BoardingPoint
+from .models import Student, University
+from .universities import find_university
 from common.serializer import PersonSerializer
 import re
 
 
+class UniversityField(serializers.SlugRelatedField):
+    """
+    Código de uma University cadastrada. Confere o código na lista em cache
+    e lê o valor direto da coluna do aluno, sem consultar a universidade.
+    """
+
+    default_error_messages = {"does_not_exist": '"{value}" is not a valid choice.'}
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("queryset", University.objects.all())
+        super().__init__(slug_field="code", **kwargs)
+
+    def use_pk_only_optimization(self):
+        return True
+
+    def to_internal_value(self, data):
+        university = find_university(str(data))
+        if university is None:
+            self.fail("does_not_exist", slug_name=self.slug_field, value=data)
+        return University(**university)
+
+    def to_representation(self, value):
+        return value.pk
+
+
+class BoardingPointField(serializers.PrimaryKeyRelatedField):
+    """
+    Id de um ponto de embarque. Importações em lote passam em
+    context["boarding_points"] os pontos do lote, lidos com um só in_bulk.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("queryset", BoardingPoint.objects.all())
+        kwargs.setdefault("allow_null", True)
+        kwargs.setdefault("required", False)
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        boarding_points = self.context.get("boarding_points")
+        if boarding_points is None:
+            return super().to_internal_value(data)
+        try:
+            return boarding_points[int(data)]
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+
+
+class UniversitySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = University
+        fields = ["id", "code", "name", "route_order"]
+
+
 class StudentCreateSerializer(PersonSerializer):
+    university = UniversityField()
+    boarding_point = BoardingPointField()
     email = serializers.EmailField(write_only=True)
     password = serializers.CharField(write_only=True)
 
@@ -31,10 +90,9 @@ class StudentCreateSerializer(PersonSerializer):
         student = Student.objects.create(user=user, **validated_data)
         return student
 
-    
-
 
 class StudentSerializer(serializers.ModelSerializer):
+    university = UniversityField()
     monthly_payment_cents = serializers.SerializerMethodField()
     last_payment_date = serializers.SerializerMethodField()
 
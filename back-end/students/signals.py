@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import University
+from .universities import bump_universities_version
+
+
+@receiver(post_save, sender=University)
+@receiver(post_delete, sender=University)
+def clear_universities_on_change(sender, **kwargs):
+    bump_universities_version()
@@ -1,10 +1,20 @@
+import json
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from django.core.management import call_command
+from django.db import IntegrityError, connection
 from django.test import TestCase
-from django.contrib.auth.models import User, Group
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User, Group, Permission
 from rest_framework import status
 from rest_framework.exceptions import ValidationError
 from unittest.mock import Mock, patch
 from datetime import date
 from django.http import HttpRequest
+from django.urls import reverse
+from rest_framework.test import APIClient
 
 from students.serializers import (
     StudentCreateSerializer,
@@ -15,9 +25,18 @@ from students.views import (
     StudentPaymentListView,
     StudentPaymentBulkUpdateView,
 )
-from students.models import Student
+from students.importer import import_students
+from students.models import Student, University
+from students.universities import get_universities
 from common.permissions import GlobalDefaultPermission
+from common.permission_cache import permissions_version
+from common.throttling import (
+    RegistrationEmailThrottle,
+    RegistrationIPThrottle,
+    rejection_counts,
+)
 from boarding_points.models import BoardingPoint
+from boarding_points.views import BoardingPointViewSet
 
 
 # Tabela 1
@@ -161,7 +180,7 @@ class StudentCreateSerializerCreateTests(TestCase):
             "name": "Aluno Criado",
             "phone": "86999887766",
             "class_shift": "M",
-            "university": "UESPI",
+            "university": University.objects.get(code="UESPI"),
             "boarding_point": self.boarding_point,
         }
 
@@ -183,7 +202,7 @@ class StudentSerializerGetMethodsTests(TestCase):
             user=user_a,
             name="Aluno A",
             class_shift="M",
-            university="UESPI",
+            university_id="UESPI",
             monthly_payment_cents=None,
             last_payment_date=None,
         )
@@ -192,7 +211,7 @@ class StudentSerializerGetMethodsTests(TestCase):
             user=user_b,
             name="Aluno B",
             class_shift="N",
-            university="IFPI",
+            university_id="IFPI",
             monthly_payment_cents=33000,
             last_payment_date=date(2025, 10, 10),
         )
@@ -226,7 +245,7 @@ class StudentPaymentListViewGetQuerysetTests(TestCase):
             user=user_a,
             name="Aluno A",
             class_shift="M",
-            university="UESPI",
+            university_id="UESPI",
             monthly_payment_cents=33000,
             last_payment_date=date.today(),
         )
@@ -234,7 +253,7 @@ class StudentPaymentListViewGetQuerysetTests(TestCase):
             user=user_b,
             name="Aluno B",
             class_shift="N",
-            university="IFPI",
+            university_id="IFPI",
             monthly_payment_cents=None,
             last_payment_date=date.today(),
         )
@@ -242,7 +261,7 @@ class StudentPaymentListViewGetQuerysetTests(TestCase):
             user=user_c,
             name="Aluno C",
             class_shift="M",
-            university="UESPI",
+            university_id="UESPI",
             monthly_payment_cents=33000,
             last_payment_date=None,
         )
@@ -290,10 +309,10 @@ class StudentPaymentBulkUpdateViewTests(TestCase):
         user_b = User.objects.create_user("aluno_b", "b@b.com", "pass123")
 
         self.student_1 = Student.objects.create(
-            user=user_a, name="Aluno A", class_shift="M", university="UESPI"
+            user=user_a, name="Aluno A", class_shift="M", university_id="UESPI"
         )
         self.student_2 = Student.objects.create(
-            user=user_b, name="Aluno B", class_shift="N", university="IFPI"
+            user=user_b, name="Aluno B", class_shift="N", university_id="IFPI"
         )
 
         self.view = StudentPaymentBulkUpdateView()
@@ -351,7 +370,7 @@ class GlobalDefaultPermissionTests(TestCase):
 
         user_a = User.objects.create_user("aluno_a", "a@a.com", "pass123")
         self.aluno_a_obj = Student.objects.create(
-            user=user_a, name="Aluno A", class_shift="M", university="UESPI"
+            user=user_a, name="Aluno A", class_shift="M", university_id="UESPI"
         )
         self.aluno_a_user = user_a
 
@@ -414,3 +433,278 @@ class GlobalDefaultPermissionTests(TestCase):
         )
 
         self.assertFalse(has_perm)
+
+
+class GlobalDefaultPermissionCacheTests(TestCase):
+
+    def setUp(self):
+        self.group = Group.objects.create(name="gestores")
+        self.add_point = Permission.objects.get(codename="add_boardingpoint")
+        self.group.permissions.add(self.add_point)
+        self.user = User.objects.create_user("gestor", "g@g.com", "pass123")
+        self.user.groups.add(self.group)
+
+        self.permission = GlobalDefaultPermission()
+        self.view = BoardingPointViewSet()
+
+    def allowed(self, method="POST"):
+        # Um usuário novo a cada chamada, como em requisições diferentes
+        request = Mock()
+        request.user = User.objects.get(pk=self.user.pk)
+        request.method = method
+        return self.permission.has_permission(request, self.view)
+
+    def test_CT_6_6_permissions_are_reused_across_requests(self):
+        self.assertTrue(self.allowed())
+
+        user = User.objects.get(pk=self.user.pk)
+        request = Mock(user=user, method="POST")
+        with self.assertNumQueries(0):
+            self.assertTrue(self.permission.has_permission(request, self.view))
+        with self.assertNumQueries(0):
+            request.method = "DELETE"
+            self.assertFalse(self.permission.has_permission(request, self.view))
+
+    def test_CT_6_7_membership_changes_invalidate_the_user(self):
+        self.assertTrue(self.allowed())
+
+        self.user.groups.remove(self.group)
+        self.assertFalse(self.allowed())
+
+        self.group.user_set.add(self.user)
+        self.assertTrue(self.allowed())
+
+    def test_CT_6_8_permission_changes_invalidate_everyone(self):
+        self.assertFalse(self.allowed("DELETE"))
+
+        version = permissions_version()
+        self.group.permissions.add(
+            Permission.objects.get(codename="delete_boardingpoint")
+        )
+        self.assertNotEqual(permissions_version(), version)
+        self.assertTrue(self.allowed("DELETE"))
+
+        version = permissions_version()
+        self.add_point.name = "Pode cadastrar ponto"
+        self.add_point.save()
+        self.assertNotEqual(permissions_version(), version)
+
+    def test_CT_6_9_inactive_and_superusers_checked_live(self):
+        self.assertTrue(self.allowed())
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertFalse(self.allowed())
+
+        User.objects.filter(pk=self.user.pk).update(is_active=True, is_superuser=True)
+        self.assertTrue(self.allowed("DELETE"))
+
+
+class StudentListPaginationTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser("admin", "admin@a.com", "pass123")
+        for name in ["Carla", "Ana", "Bruno"]:
+            Student.objects.create(
+                user=User.objects.create(username=name.lower()),
+                name=name,
+                class_shift="M",
+                university_id="UESPI",
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def test_CT_7_1_cursor_pages_follow_payment_order(self):
+        url = reverse("student-payment-list")
+        first = self.client.get(url, {"page_size": 2}).json()
+        second = self.client.get(first["next"]).json()
+
+        names = [s["name"] for s in first["results"] + second["results"]]
+        self.assertEqual(names, ["Ana", "Bruno", "Carla"])
+        self.assertIsNone(second["next"])
+
+    def test_CT_7_2_fields_limits_serialized_columns(self):
+        response = self.client.get(
+            reverse("students-create-list"), {"fields": "id,name"}
+        ).json()
+
+        self.assertEqual(set(response["results"][0]), {"id", "name"})
+
+    def test_CT_7_3_paginate_false_keeps_plain_list(self):
+        response = self.client.get(
+            reverse("students-create-list"), {"paginate": "false"}
+        ).json()
+
+        self.assertIsInstance(response, list)
+        self.assertEqual(len(response), 3)
+
+    def test_CT_7_4_named_lists_paginate_and_admins_keep_plain_shape(self):
+        for name in ("boarding-point-list", "poll-list", "drivers-create-list"):
+            response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, status.HTTP_200_OK, name)
+            self.assertIn("results", response.json(), name)
+
+        response = self.client.get(reverse("admins-create-list"))
+        self.assertIsInstance(response.json(), list)
+
+
+class UniversityTests(TestCase):
+    def test_CT_8_1_universities_are_listed_in_route_order(self):
+        response = APIClient().get("/api/v1/universities/", {"paginate": "false"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [u["code"] for u in response.json()], ["IFPI", "CHRISFAPI", "UESPI", "ETC"]
+        )
+
+    def test_CT_8_2_cache_serves_reads_and_is_cleared_on_save(self):
+        get_universities()
+        with self.assertNumQueries(0):
+            get_universities()
+
+        University.objects.create(
+            code="UFPI", name="Universidade Federal", route_order=9
+        )
+
+        serializer = StudentSerializer(data={"university": "UFPI"}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(get_universities()[-1]["code"], "UFPI")
+
+    def test_CT_8_3_unknown_university_is_rejected(self):
+        serializer = StudentSerializer(data={"university": "XYZ"}, partial=True)
+
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("university", serializer.errors)
+
+
+class RegistrationThrottleTests(TestCase):
+    def setUp(self):
+        self.bp = BoardingPoint.objects.create(name="Ponto", route_order=1)
+
+    def register(self, email, ip="10.0.0.1"):
+        return APIClient(REMOTE_ADDR=ip).post(
+            reverse("students-create-list"),
+            {
+                "name": "Aluno Novo",
+                "phone": "86999887766",
+                "class_shift": "M",
+                "university": "UESPI",
+                "email": email,
+                "password": "Password123",
+                "boarding_point": self.bp.id,
+            },
+            format="json",
+        )
+
+    @patch.object(RegistrationIPThrottle, "rate", "2/hour", create=True)
+    def test_CT_9_1_registration_is_throttled_per_ip(self):
+        self.assertEqual(self.register("a@email.com").status_code, 201)
+        self.assertEqual(self.register("b@email.com").status_code, 201)
+
+        with self.assertNumQueries(0):
+            response = self.register("c@email.com")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(rejection_counts()["registration_ip"], 1)
+
+        self.assertEqual(self.register("c@email.com", ip="10.0.0.2").status_code, 201)
+
+    @patch.object(RegistrationEmailThrottle, "rate", "1/hour", create=True)
+    def test_CT_9_2_registration_is_throttled_per_email(self):
+        self.assertEqual(self.register("a@email.com").status_code, 201)
+        response = self.register("A@email.com", ip="10.0.0.2")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        # A listagem (GET) não passa pelos baldes do cadastro
+        self.assertEqual(
+            APIClient().get(reverse("students-create-list")).status_code, 401
+        )
+
+
+class StudentImportTests(TestCase):
+    HEADER = "name,phone,class_shift,university,email,password,boarding_point\n"
+
+    def setUp(self):
+        self.bp = BoardingPoint.objects.create(name="Ponto", route_order=1)
+        User.objects.create_user("existente@email.com", "existente@email.com", "x")
+
+    def csv(self, count, start=0, boarding_point=""):
+        lines = [
+            f"Aluno {i},86999887766,M,UESPI,aluno{i}@email.com,Password123,"
+            f"{boarding_point}\n"
+            for i in range(start, start + count)
+        ]
+        return StringIO(self.HEADER + "".join(lines))
+
+    def test_CT_10_1_valid_rows_are_saved_and_invalid_reported(self):
+        file = StringIO(
+            self.HEADER
+            + f"Ana,86999887766,M,UESPI,ana@email.com,Password123,{self.bp.id}\n"
+            + "Bia,86999887766,M,UESPI,existente@email.com,Password123,\n"
+            + "Caio,123,M,XYZ,caio@email.com,curta,\n"
+            + "Ana 2,86999887766,A,IFPI,ana@email.com,Password123,\n"
+            + "Davi,8699988776,E,IFPI,davi@email.com,Password123,\n"
+        )
+
+        report = import_students(file, workers=0, batch_size=2)
+
+        self.assertEqual(report["created"], 2)
+        self.assertEqual([error["row"] for error in report["errors"]], [3, 4, 5])
+        self.assertIn("email", report["errors"][0]["errors"])
+        self.assertEqual(
+            set(report["errors"][1]["errors"]), {"phone", "university", "password"}
+        )
+        self.assertIn("email", report["errors"][2]["errors"])
+
+        ana = Student.objects.get(user__username="ana@email.com")
+        self.assertEqual((ana.role, ana.boarding_point), ("student", self.bp))
+        self.assertTrue(ana.user.check_password("Password123"))
+        self.assertTrue(ana.user.groups.filter(name="students").exists())
+        self.assertEqual(ana.user.profile.person_id, ana.id)
+
+    def test_CT_10_2_queries_do_not_grow_with_rows(self):
+        # Cria o grupo e carrega as universidades antes de medir
+        import_students(self.csv(1, start=100), workers=0)
+
+        with CaptureQueriesContext(connection) as small:
+            import_students(self.csv(3, boarding_point=self.bp.id), workers=0)
+        with CaptureQueriesContext(connection) as large:
+            import_students(self.csv(10, start=3, boarding_point=self.bp.id), workers=0)
+
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+        self.assertEqual(Student.objects.count(), 14)
+        self.assertEqual(Student.objects.filter(boarding_point=self.bp).count(), 13)
+
+    def test_CT_10_2_1_unknown_boarding_point_is_a_field_error(self):
+        report = import_students(self.csv(1, boarding_point=999), workers=0)
+
+        self.assertEqual(report["created"], 0)
+        self.assertEqual(list(report["errors"][0]["errors"]), ["boarding_point"])
+
+    def test_CT_10_2_2_integrity_error_becomes_field_error(self):
+        error = IntegrityError("UNIQUE constraint failed: auth_user.username")
+        with patch("students.importer.save_batch", side_effect=error):
+            report = import_students(self.csv(2), workers=0)
+
+        self.assertEqual(report["created"], 0)
+        self.assertEqual(
+            [entry["errors"] for entry in report["errors"]],
+            [{"email": ["This email is already in use"]}] * 2,
+        )
+
+    def test_CT_10_3_command_hashes_in_a_process_pool(self):
+        with TemporaryDirectory() as directory:
+            source = Path(directory) / "alunos.csv"
+            source.write_text(self.csv(4).getvalue() + "X,1,M,UESPI,x@x.com,1,\n")
+            report = Path(directory) / "report.json"
+            out = StringIO()
+
+            call_command(
+                "import_students",
+                str(source),
+                workers=2,
+                report=str(report),
+                stdout=out,
+            )
+
+            self.assertEqual(json.loads(report.read_text())["created"], 4)
+        self.assertIn("row 6: phone", out.getvalue())
+        self.assertIn("Created 4 student(s), 1 row(s) with errors", out.getvalue())
+        user = User.objects.get(username="aluno3@email.com")
+        self.assertTrue(user.check_password("Password123"))
@@ -34,7 +34,7 @@ class StudentAPITestCase(APITestCase):
             name="Existing Student",
             phone="0987654321",
             class_shift="E",
-            university="IFPI",
+            university_id="IFPI",
         )
 
     def get_jwt_token(self, user):
@@ -105,7 +105,7 @@ class StudentPaymentAPITestCase(APITestCase):
             name="Student One",
             phone="1111111111",
             class_shift="M",
-            university="UESPI",
+            university_id="UESPI",
         )
 
         self.student2 = Student.objects.create(
@@ -115,7 +115,7 @@ class StudentPaymentAPITestCase(APITestCase):
             name="Student Two",
             phone="2222222222",
             class_shift="A",
-            university="IFPI",
+            university_id="IFPI",
             monthly_payment_cents=50000,
             last_payment_date=date.today() - timedelta(days=15),
         )
@@ -182,7 +182,7 @@ class StudentPaymentAPITestCase(APITestCase):
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data["results"]), 2)
 
     def test_admin_can_filter_paid_students(self):
         self.authenticate_admin()
@@ -191,8 +191,8 @@ class StudentPaymentAPITestCase(APITestCase):
         response = self.client.get(url, {"payment_status": "paid"})
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["name"], "Student Two")
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["name"], "Student Two")
 
     def test_admin_can_filter_unpaid_students(self):
         self.authenticate_admin()
@@ -201,8 +201,8 @@ class StudentPaymentAPITestCase(APITestCase):
         response = self.client.get(url, {"payment_status": "not_paid"})
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["name"], "Student One")
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["name"], "Student One")
 
     def test_admin_can_bulk_update_payments(self):
         self.authenticate_admin()
@@ -0,0 +1,47 @@
+from uuid import uuid4
+
+from common.cache import VersionedCache
+from .models import University
+
+
+# Lista das universidades na ordem da rota. É pequena e quase nunca muda: os
+# sinais de University trocam a versão a cada alteração.
+university_cache = VersionedCache("universities", "universities")
+
+VERSION_KEY = "universities:version"
+
+
+def universities_version():
+    # Versão aleatória, como a das permissões: uma chave descartada nunca
+    # volta a apontar para uma lista antiga
+    return university_cache.cache.get_or_set(
+        VERSION_KEY, lambda: uuid4().hex, timeout=None
+    )
+
+
+def bump_universities_version():
+    """Descarta a lista guardada de universidades."""
+    university_cache.cache.set(VERSION_KEY, uuid4().hex, timeout=None)
+
+
+def get_universities():
+    """
+    Universidades cadastradas [{"id", "code", "name", "route_order"}] na
+    ordem da rota.
+    """
+    return university_cache.get_or_set(
+        (universities_version(),),
+        lambda: list(University.objects.values("id", "code", "name", "route_order")),
+    )
+
+
+def find_university(code):
+    for university in get_universities():
+        if university["code"] == code:
+            return university
+    return None
+
+
+def university_name(code):
+    university = find_university(code)
+    return university["name"] if university else code
@@ -5,20 +5,27 @@ from rest_framework.generics import (
     ListAPIView,
 )
 from rest_framework.views import APIView
+from rest_framework import viewsets
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Student
+from .models import Student, University
 from .serializers import (
     StudentSerializer,
     StudentCreateSerializer,
     StudentPaymentSerializer,
+    UniversitySerializer,
 )
 from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from common.permissions import GlobalDefaultPermission
+from common.pagination import KeysetCursorPagination
+from common.throttling import RegistrationEmailThrottle, RegistrationIPThrottle
+from common.views import SparseFieldsetMixin
 
 
-class StudentListCreateView(ListCreateAPIView):
+class StudentListCreateView(SparseFieldsetMixin, ListCreateAPIView):
     queryset = Student.objects.all()
+    pagination_class = KeysetCursorPagination
+    cursor_ordering = "id"
 
     def get_serializer_class(self):
         if self.request.method == "POST":
@@ -30,6 +37,12 @@ class StudentListCreateView(ListCreateAPIView):
             return [AllowAny()]
         return [IsAuthenticated(), GlobalDefaultPermission()]
 
+    def get_throttles(self):
+        # O cadastro é aberto e faz o hash da senha: limitado por IP e e-mail
+        if self.request.method == "POST":
+            return [RegistrationIPThrottle(), RegistrationEmailThrottle()]
+        return super().get_throttles()
+
 
 class StudentRetrieveUpdateDestroyView(RetrieveUpdateDestroyAPIView):
     permission_classes = (IsAuthenticated, GlobalDefaultPermission)
@@ -43,10 +56,12 @@ class StudentPaymentUpdateView(UpdateAPIView):
     serializer_class = StudentPaymentSerializer
 
 
-class StudentPaymentListView(ListAPIView):
+class StudentPaymentListView(SparseFieldsetMixin, ListAPIView):
     permission_classes = [IsAuthenticated, IsAdminUser]
     queryset = Student.objects.all()
     serializer_class = StudentPaymentSerializer
+    pagination_class = KeysetCursorPagination
+    cursor_ordering = ("name", "id")
 
     def get_queryset(self):
         queryset = Student.objects.all()
@@ -106,3 +121,18 @@ class StudentPaymentBulkUpdateView(APIView):
                 "updated_data": update_data,
             }
         )
+
+
+class UniversityViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
+    """
+    Universidades atendidas, na ordem em que a volta passa por elas.
+    A leitura é pública (o cadastro de aluno lista as opções).
+    """
+
+    queryset = University.objects.all()
+    serializer_class = UniversitySerializer
+
+    def get_permissions(self):
+        if self.request.method in ["GET", "HEAD", "OPTIONS"]:
+            return [AllowAny()]
+        return [IsAuthenticated(), GlobalDefaultPermission()]
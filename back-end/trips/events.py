@@ -0,0 +1,76 @@
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.db import transaction
+
+
+class TripEventHub:
+    """
+    Distribui eventos de viagem para os clientes conectados neste processo.
+
+    Cada assinante recebe uma fila limitada no seu próprio event loop. As views
+    síncronas publicam a partir de threads, então a entrega passa por
+    call_soon_threadsafe. Se um cliente lento enche a fila, o evento mais
+    antigo é descartado: o próximo evento sempre traz o estado completo.
+    """
+
+    def __init__(self, max_queue_size=20):
+        self.max_queue_size = max_queue_size
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, trip_id):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.max_queue_size)
+        with self._lock:
+            self._subscribers[trip_id].add((loop, queue))
+        return queue
+
+    def unsubscribe(self, trip_id, queue):
+        with self._lock:
+            subscribers = self._subscribers.get(trip_id, set())
+            subscribers.difference_update({s for s in subscribers if s[1] is queue})
+            if not subscribers:
+                self._subscribers.pop(trip_id, None)
+
+    def subscriber_count(self, trip_id):
+        with self._lock:
+            return len(self._subscribers.get(trip_id, ()))
+
+    def publish(self, trip_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(trip_id, ()))
+
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, event)
+            except RuntimeError:
+                # Event loop já encerrado: o cliente foi embora.
+                self.unsubscribe(trip_id, queue)
+
+    @staticmethod
+    def _offer(queue, event):
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(event)
+
+
+hub = TripEventHub()
+
+
+def build_trip_event(trip, event):
+    return {
+        "event": event,
+        "trip": trip.id,
+        "status": trip.status,
+        "version": trip.version,
+        "current_stop_index": trip.current_stop_position,
+        "current_boarding_point": trip.current_boarding_point_id,
+        "current_university": trip.current_university,
+    }
+
+
+def publish_trip_event(trip, event):
+    payload = build_trip_event(trip, event)
+    transaction.on_commit(lambda: hub.publish(trip.id, payload))
@@ -0,0 +1,244 @@
+from django.contrib.postgres.aggregates import JSONBAgg
+from django.db import connection
+from django.db.models import F
+from django.db.models.functions import JSONObject
+from boarding_points.models import BoardingPoint
+from common.cache import VersionedCache
+from polls.models import BoardingListSnapshot, PollOptionCounts, Vote
+from students.models import Student
+
+
+OUTBOUND_OPTIONS = ["round_trip", "one_way_outbound"]
+RETURN_OPTIONS = ["round_trip", "one_way_return"]
+
+manifest_cache = VersionedCache("manifests", "riders")
+
+
+def get_poll_riders(poll, trip_type):
+    """
+    Alunos da enquete agrupados por parada, na ordem da rota.
+
+    O resultado fica em cache pela chave (enquete, versão dos dados, versão
+    dos votos, tipo de viagem): mudanças de aluno, ponto ou universidade
+    sobem a primeira e cada voto gravado sobe a dos contadores da enquete.
+    Depois do fechamento da fase, a lista vem da cópia congelada.
+
+    Retorna uma lista de dicts: {"stop": BoardingPoint | str, "students": [...]}.
+    """
+    if poll.is_frozen(trip_type):
+        groups = (
+            BoardingListSnapshot.objects.filter(poll_id=poll.id, trip_type=trip_type)
+            .values_list("groups", flat=True)
+            .first()
+        )
+        if groups is not None:
+            return _groups_from_rows(groups, trip_type)
+
+    return manifest_cache.get_or_set(
+        (poll.id, poll.data_version, _votes_version(poll), trip_type),
+        lambda: _group_riders(poll.id, trip_type),
+    )
+
+
+def _votes_version(poll):
+    # Vem do select_related das views; sem a linha de contadores, None
+    try:
+        return poll.option_counts.version
+    except PollOptionCounts.DoesNotExist:
+        return None
+
+
+def _group_riders(poll_id, trip_type):
+    return _groups_from_rows(aggregate_riders(poll_id, trip_type), trip_type)
+
+
+def aggregate_riders(poll_id, trip_type, in_db=None):
+    """
+    Agrupa os alunos da enquete por parada, em formato JSON:
+    [{"stop": id do ponto ou universidade, "point": {...} (só na ida),
+    "students": [{"id", "name", "user_id"}]}], paradas na ordem da rota e
+    alunos por nome. É o mesmo formato gravado na lista congelada.
+
+    No PostgreSQL o agrupamento é feito pelo banco (GROUP BY + jsonb_agg);
+    nos demais bancos, em Python. in_db força um dos caminhos.
+    """
+    if in_db is None:
+        in_db = connection.vendor == "postgresql"
+
+    if in_db:
+        return _riders_in_db(poll_id, trip_type)
+    return _riders_in_python(poll_id, trip_type)
+
+
+def _rider_votes(poll_id, trip_type):
+    if trip_type == "outbound":
+        return Vote.objects.filter(
+            poll_id=poll_id,
+            option__in=OUTBOUND_OPTIONS,
+            student__boarding_point__isnull=False,
+        )
+    return Vote.objects.filter(poll_id=poll_id, option__in=RETURN_OPTIONS)
+
+
+UNIVERSITY_ORDERING = ("student__university__route_order", "student__university")
+
+
+def _riders_in_db(poll_id, trip_type):
+    students = JSONBAgg(
+        JSONObject(id="student_id", name="student__name", user_id="student__user_id"),
+        order_by=("student__name", "student_id"),
+    )
+    votes = _rider_votes(poll_id, trip_type)
+
+    if trip_type != "outbound":
+        rows = (
+            votes.values(
+                "student__university__route_order", stop=F("student__university")
+            )
+            .annotate(students=students)
+            .order_by(*UNIVERSITY_ORDERING)
+        )
+        return [{"stop": row["stop"], "students": row["students"]} for row in rows]
+
+    rows = (
+        votes.values(
+            stop=F("student__boarding_point"),
+            point_name=F("student__boarding_point__name"),
+            point_address_reference=F("student__boarding_point__address_reference"),
+            point_route_order=F("student__boarding_point__route_order"),
+        )
+        .annotate(students=students)
+        .order_by("point_route_order", "stop")
+    )
+    return [
+        {
+            "stop": row["stop"],
+            "point": {
+                "id": row["stop"],
+                "name": row["point_name"],
+                "address_reference": row["point_address_reference"],
+                "route_order": row["point_route_order"],
+            },
+            "students": row["students"],
+        }
+        for row in rows
+    ]
+
+
+def _riders_in_python(poll_id, trip_type):
+    fields = ["student_id", "student__name", "student__user_id"]
+    if trip_type == "outbound":
+        fields += [
+            "student__boarding_point",
+            "student__boarding_point__name",
+            "student__boarding_point__address_reference",
+            "student__boarding_point__route_order",
+        ]
+        ordering = ["student__boarding_point__route_order", "student__boarding_point"]
+    else:
+        fields.append("student__university")
+        ordering = UNIVERSITY_ORDERING
+
+    votes = (
+        _rider_votes(poll_id, trip_type)
+        .order_by(*ordering, "student__name", "student_id")
+        .values(*fields)
+    )
+
+    groups = {}
+    for vote in votes:
+        if trip_type == "outbound":
+            key = vote["student__boarding_point"]
+        else:
+            key = vote["student__university"]
+
+        if key not in groups:
+            groups[key] = {"stop": key, "students": []}
+            if trip_type == "outbound":
+                groups[key]["point"] = {
+                    "id": key,
+                    "name": vote["student__boarding_point__name"],
+                    "address_reference": vote[
+                        "student__boarding_point__address_reference"
+                    ],
+                    "route_order": vote["student__boarding_point__route_order"],
+                }
+        groups[key]["students"].append(
+            {
+                "id": vote["student_id"],
+                "name": vote["student__name"],
+                "user_id": vote["student__user_id"],
+            }
+        )
+
+    return list(groups.values())
+
+
+def freeze_poll_riders(poll, trip_type):
+    """Grava a lista de embarque atual da enquete como cópia congelada."""
+    groups = aggregate_riders(poll.id, trip_type)
+    BoardingListSnapshot.objects.update_or_create(
+        poll=poll, trip_type=trip_type, defaults={"groups": groups}
+    )
+    return groups
+
+
+def _groups_from_rows(groups, trip_type):
+    # Instâncias não salvas: os serializers e views seguem usando atributos
+    return [
+        {
+            "stop": (
+                BoardingPoint(**group["point"])
+                if trip_type == "outbound"
+                else group["stop"]
+            ),
+            "students": [Student(**student) for student in group["students"]],
+        }
+        for group in groups
+    ]
+
+
+def build_trip_manifest(trip):
+    """
+    Monta a lista de paradas da viagem com os alunos de cada uma.
+
+    Se a viagem já tem o plano de paradas congelado, a ordem das paradas segue
+    o plano; caso contrário é derivada dos próprios votos.
+    """
+    groups = get_poll_riders(trip.poll, trip.trip_type)
+
+    plan = trip.get_stop_plan()
+    if not plan:
+        return groups
+
+    if trip.trip_type == "outbound":
+        by_stop = {group["stop"].id: group for group in groups}
+    else:
+        by_stop = {group["stop"]: group for group in groups}
+
+    manifest = []
+    for planned in plan:
+        if trip.trip_type == "outbound":
+            group = by_stop.get(planned.boarding_point_id)
+            stop = group["stop"] if group else planned.boarding_point
+        else:
+            group = by_stop.get(planned.university)
+            stop = planned.university
+        manifest.append({"stop": stop, "students": group["students"] if group else []})
+    return manifest
+
+
+def get_current_manifest_stop(trip, manifest):
+    if trip.trip_type == "outbound":
+        if not trip.current_boarding_point_id:
+            return None
+        for entry in manifest:
+            if entry["stop"] and entry["stop"].id == trip.current_boarding_point_id:
+                return entry
+    else:
+        if not trip.current_university:
+            return None
+        for entry in manifest:
+            if entry["stop"] == trip.current_university:
+                return entry
+    return None
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.5 on 2026-10-18 18:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("boarding_points", "0001_initial"),
+        ("trips", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="trip",
+            name="current_stop_position",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="TripStop",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("position", models.PositiveIntegerField()),
+                ("university", models.CharField(blank=True, max_length=50, null=True)),
+                ("expected_riders", models.PositiveIntegerField(default=0)),
+                (
+                    "boarding_point",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="trip_stops",
+                        to="boarding_points.boardingpoint",
+                    ),
+                ),
+                (
+                    "trip",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="stops",
+                        to="trips.trip",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["position"],
+                "unique_together": {("trip", "position")},
+            },
+        ),
+    ]
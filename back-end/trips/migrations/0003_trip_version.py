@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trips", "0002_trip_stop_plan"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="trip",
+            name="version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
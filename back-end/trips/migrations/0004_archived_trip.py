@@ -0,0 +1,45 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("trips", "0003_trip_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedTrip",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("poll_id", models.BigIntegerField()),
+                ("poll_date", models.DateField(db_index=True)),
+                (
+                    "trip_type",
+                    models.CharField(
+                        choices=[("outbound", "Outbound"), ("return", "Return")],
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("in_progress", "In Progress"),
+                            ("completed", "Completed"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("stop_count", models.PositiveIntegerField(default=0)),
+                ("started_at", models.DateTimeField(blank=True, null=True)),
+                ("completed_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "ordering": ["poll_date", "trip_type"],
+            },
+        ),
+    ]
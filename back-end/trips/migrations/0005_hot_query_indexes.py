@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 19:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("boarding_points", "0001_initial"),
+        ("polls", "0008_hot_query_indexes"),
+        ("trips", "0004_archived_trip"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="trip",
+            index=models.Index(fields=["status", "-id"], name="trips_trip_status_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="trip",
+            index=models.Index(fields=["-created_at"], name="trips_trip_created_idx"),
+        ),
+    ]
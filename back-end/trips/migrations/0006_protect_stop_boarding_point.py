@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-18 21:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("boarding_points", "0002_list_cursor_indexes"),
+        ("trips", "0005_hot_query_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="tripstop",
+            name="boarding_point",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="trip_stops",
+                to="boarding_points.boardingpoint",
+            ),
+        ),
+    ]
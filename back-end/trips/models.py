@@ -1,7 +1,9 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count
 from django.utils import timezone
 from boarding_points.models import BoardingPoint
 from polls.models import Poll
+from .manifest import build_trip_manifest, get_current_manifest_stop
 
 
 TRIP_TYPE_CHOICES = (
@@ -15,12 +17,9 @@ TRIP_STATUS_CHOICES = (
     ("completed", "Completed"),
 )
 
-UNIVERSITY_ORDER = {
-    "IFPI": 0,
-    "CHRISFAPI": 1,
-    "UESPI": 2,
-    "ETC": 3,
-}
+
+class TripStateConflict(Exception):
+    """A viagem foi alterada por outra requisição desde que foi carregada."""
 
 
 class Trip(models.Model):
@@ -37,13 +36,20 @@ class Trip(models.Model):
         related_name="current_trips",
     )
     current_university = models.CharField(max_length=50, null=True, blank=True)
+    current_stop_position = models.PositiveIntegerField(null=True, blank=True)
     started_at = models.DateTimeField(null=True, blank=True)
     completed_at = models.DateTimeField(null=True, blank=True)
+    version = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         unique_together = ("poll", "trip_type")
         ordering = ["-created_at"]
+        indexes = [
+            # Filtro por status na listagem (paginada por -id) e ordem padrão
+            models.Index(fields=["status", "-id"], name="trips_trip_status_idx"),
+            models.Index(fields=["-created_at"], name="trips_trip_created_idx"),
+        ]
 
     def __str__(self):
         return f"Trip {self.trip_type} for {self.poll.date} - {self.status}"
@@ -52,38 +58,59 @@ class Trip(models.Model):
         if self.status != "pending":
             raise ValueError("Trip already started or completed")
 
-        if self.trip_type == "outbound":
-            points = self.get_boarding_points()
-            if not points:
+        # Plano congelado no fechamento da enquete; senão, calcula agora
+        frozen = self.get_stop_plan()
+        stops = frozen or self._compute_stop_plan()
+        if not stops:
+            if self.trip_type == "outbound":
                 raise ValueError("No boarding points for this trip")
-
-            first_point = points[0]
-            self.status = "in_progress"
-            self.current_boarding_point = first_point
-            self.started_at = timezone.now()
-            self.save()
-            return first_point
-        else:
-            universities = self.get_universities()
-            if not universities:
-                raise ValueError("No universities for this trip")
-
-            first_university = universities[0]
-            self.status = "in_progress"
-            self.current_university = first_university
-            self.started_at = timezone.now()
-            self.save()
-            return first_university
+            raise ValueError("No universities for this trip")
+
+        first_stop = stops[0]
+        with transaction.atomic():
+            self._transition(
+                status="in_progress",
+                current_stop_position=first_stop.position,
+                current_boarding_point=first_stop.boarding_point,
+                current_university=first_stop.university,
+                started_at=timezone.now(),
+            )
+            if not frozen:
+                self._save_stop_plan(stops)
+
+        return first_stop.stop
 
     def next_stop(self):
         if self.status != "in_progress":
             raise ValueError("Trip is not in progress")
 
+        if self.current_stop_position is not None:
+            return self._next_planned_stop()
+
         if self.trip_type == "outbound":
             return self._next_boarding_point()
         else:
             return self._next_university()
 
+    def _next_planned_stop(self):
+        current_position = self.current_stop_position
+        next_stop = (
+            TripStop.objects.select_related("boarding_point")
+            .filter(trip=self, position=current_position + 1)
+            .first()
+        )
+
+        if next_stop is None:
+            self.complete_trip()
+            return None
+
+        self._transition(
+            current_stop_position=next_stop.position,
+            current_boarding_point=next_stop.boarding_point,
+            current_university=next_stop.university,
+        )
+        return next_stop.stop
+
     def _next_boarding_point(self):
         if not self.current_boarding_point:
             raise ValueError("No current boarding point")
@@ -103,8 +130,7 @@ class Trip(models.Model):
 
         if current_index + 1 < len(boarding_points):
             next_point = boarding_points[current_index + 1]
-            self.current_boarding_point = next_point
-            self.save()
+            self._transition(current_boarding_point=next_point)
             return next_point
         else:
             self.complete_trip()
@@ -119,8 +145,7 @@ class Trip(models.Model):
 
         if current_index + 1 < len(universities):
             next_university = universities[current_index + 1]
-            self.current_university = next_university
-            self.save()
+            self._transition(current_university=next_university)
             return next_university
         else:
             self.complete_trip()
@@ -130,11 +155,88 @@ class Trip(models.Model):
         if self.status != "in_progress":
             raise ValueError("Trip is not in progress")
 
-        self.status = "completed"
-        self.completed_at = timezone.now()
-        self.current_boarding_point = None
-        self.current_university = None
-        self.save()
+        self._transition(
+            status="completed",
+            completed_at=timezone.now(),
+            current_boarding_point=None,
+            current_university=None,
+            current_stop_position=None,
+        )
+
+    def _transition(self, **changes):
+        """
+        Aplica a mudança de estado com um único UPDATE condicionado à versão
+        carregada. Se outra requisição alterou a viagem antes, nada é gravado
+        e TripStateConflict é lançada.
+        """
+        updated = Trip.objects.filter(pk=self.pk, version=self.version).update(
+            version=models.F("version") + 1, **changes
+        )
+        if not updated:
+            raise TripStateConflict("Trip was updated by another request")
+
+        for field, value in changes.items():
+            setattr(self, field, value)
+        self.version += 1
+
+    def build_stop_plan(self):
+        """
+        Congela a sequência de paradas da viagem a partir dos votos atuais.
+        Cada parada guarda sua posição e quantos alunos são esperados nela.
+        """
+        with transaction.atomic():
+            self._save_stop_plan(self._compute_stop_plan())
+        return self.get_stop_plan()
+
+    def _save_stop_plan(self, stops):
+        TripStop.objects.filter(trip=self).delete()
+        TripStop.objects.bulk_create(stops)
+
+    def _compute_stop_plan(self):
+        if self.trip_type == "outbound":
+            rows = (
+                self.poll.votes.filter(
+                    option__in=["round_trip", "one_way_outbound"],
+                    student__boarding_point__isnull=False,
+                )
+                .values(
+                    "student__boarding_point", "student__boarding_point__route_order"
+                )
+                .annotate(riders=Count("id"))
+                .order_by("student__boarding_point__route_order")
+            )
+            stops = [
+                TripStop(
+                    trip=self,
+                    position=position,
+                    boarding_point_id=row["student__boarding_point"],
+                    expected_riders=row["riders"],
+                )
+                for position, row in enumerate(rows)
+            ]
+        else:
+            rows = (
+                self.poll.votes.filter(option__in=["round_trip", "one_way_return"])
+                .values("student__university")
+                .annotate(riders=Count("id"))
+                .order_by("student__university__route_order", "student__university")
+            )
+            stops = [
+                TripStop(
+                    trip=self,
+                    position=position,
+                    university=row["student__university"],
+                    expected_riders=row["riders"],
+                )
+                for position, row in enumerate(rows)
+            ]
+
+        return stops
+
+    def get_stop_plan(self):
+        if "stops" in getattr(self, "_prefetched_objects_cache", {}):
+            return list(self.stops.all())
+        return list(self.stops.select_related("boarding_point"))
 
     def get_boarding_points(self):
         if self.trip_type != "outbound":
@@ -159,18 +261,13 @@ class Trip(models.Model):
             return []
 
         valid_options = ["round_trip", "one_way_return"]
-        votes = self.poll.votes.filter(option__in=valid_options).select_related(
-            "student"
-        )
-
-        university_set = set()
-        for vote in votes:
-            university_set.add(vote.student.university)
-
-        universities = sorted(
-            university_set, key=lambda u: UNIVERSITY_ORDER.get(u, 999)
+        rows = (
+            self.poll.votes.filter(option__in=valid_options)
+            .values("student__university")
+            .annotate(riders=Count("id"))
+            .order_by("student__university__route_order", "student__university")
         )
-        return universities
+        return [row["student__university"] for row in rows]
 
     def get_students_at_point(self, boarding_point):
         if self.trip_type != "outbound":
@@ -196,8 +293,56 @@ class Trip(models.Model):
         return sorted(students, key=lambda s: s.name)
 
     def get_current_students(self):
-        if self.trip_type == "outbound" and self.current_boarding_point:
-            return self.get_students_at_point(self.current_boarding_point)
-        elif self.trip_type == "return" and self.current_university:
-            return self.get_students_at_university(self.current_university)
-        return []
+        """
+        Alunos da parada atual, lidos da lista de embarque da enquete (cópia
+        congelada ou cache por versão) em vez de uma varredura dos votos.
+        """
+        current = get_current_manifest_stop(self, build_trip_manifest(self))
+        return current["students"] if current else []
+
+
+class TripStop(models.Model):
+    trip = models.ForeignKey(Trip, on_delete=models.CASCADE, related_name="stops")
+    position = models.PositiveIntegerField()
+    # O plano é congelado: um ponto em uso não pode sumir no meio da viagem
+    boarding_point = models.ForeignKey(
+        BoardingPoint,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="trip_stops",
+    )
+    university = models.CharField(max_length=50, null=True, blank=True)
+    expected_riders = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("trip", "position")
+        ordering = ["position"]
+
+    def __str__(self):
+        return f"Stop {self.position} of trip {self.trip_id}"
+
+    @property
+    def stop(self):
+        if self.boarding_point_id:
+            return self.boarding_point
+        return self.university
+
+
+class ArchivedTrip(models.Model):
+    """Histórico compacto de uma viagem de enquete arquivada."""
+
+    id = models.BigIntegerField(primary_key=True)
+    poll_id = models.BigIntegerField()
+    poll_date = models.DateField(db_index=True)
+    trip_type = models.CharField(max_length=20, choices=TRIP_TYPE_CHOICES)
+    status = models.CharField(max_length=20, choices=TRIP_STATUS_CHOICES)
+    stop_count = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["poll_date", "trip_type"]
+
+    def __str__(self):
+        return f"Archived {self.trip_type} trip for {self.poll_date}"
@@ -1,15 +1,9 @@
 from rest_framework import serializers
-from .models import Trip, UNIVERSITY_ORDER
+from .manifest import build_trip_manifest, get_current_manifest_stop
+from .models import Trip
 from boarding_points.serializers import BoardingPointSerializer
 from polls.serializers import StudentNestedSerializer
-
-
-UNIVERSITY_NAMES = {
-    "IFPI": "Instituto Federal do Piaui",
-    "CHRISFAPI": "Christus Faculdade do Piaui",
-    "UESPI": "Universidade Estadual do Piaui",
-    "ETC": "Other",
-}
+from students.universities import university_name
 
 
 class TripSerializer(serializers.ModelSerializer):
@@ -30,12 +24,14 @@ class TripSerializer(serializers.ModelSerializer):
             "current_university_name",
             "total_stops",
             "current_stop_index",
+            "version",
             "started_at",
             "completed_at",
             "created_at",
         ]
         read_only_fields = [
             "id",
+            "version",
             "current_boarding_point",
             "current_university",
             "started_at",
@@ -45,10 +41,14 @@ class TripSerializer(serializers.ModelSerializer):
 
     def get_current_university_name(self, obj):
         if obj.current_university:
-            return UNIVERSITY_NAMES.get(obj.current_university, obj.current_university)
+            return university_name(obj.current_university)
         return None
 
     def get_total_stops(self, obj):
+        plan = obj.get_stop_plan()
+        if plan:
+            return len(plan)
+
         if obj.trip_type == "outbound":
             return len(obj.get_boarding_points())
         else:
@@ -58,6 +58,9 @@ class TripSerializer(serializers.ModelSerializer):
         if obj.status != "in_progress":
             return None
 
+        if obj.current_stop_position is not None:
+            return obj.current_stop_position
+
         if obj.trip_type == "outbound":
             if not obj.current_boarding_point:
                 return None
@@ -83,40 +86,56 @@ class TripDetailSerializer(TripSerializer):
     class Meta(TripSerializer.Meta):
         fields = TripSerializer.Meta.fields + ["stops"]
 
+    def get_manifest(self, obj):
+        manifest = self.context.get("manifest")
+        if manifest is None:
+            manifest = build_trip_manifest(obj)
+            self.context["manifest"] = manifest
+        return manifest
+
+    def get_total_stops(self, obj):
+        return len(self.get_manifest(obj))
+
+    def get_current_stop_index(self, obj):
+        if obj.status != "in_progress":
+            return None
+
+        if obj.current_stop_position is not None:
+            return obj.current_stop_position
+
+        manifest = self.get_manifest(obj)
+        current_stop = get_current_manifest_stop(obj, manifest)
+        if current_stop is None:
+            return None
+        return manifest.index(current_stop)
+
     def get_stops(self, obj):
-        if obj.trip_type == "outbound":
-            points = obj.get_boarding_points()
-            result = []
+        result = []
 
-            for point in points:
-                students = obj.get_students_at_point(point)
+        for entry in self.get_manifest(obj):
+            stop = entry["stop"]
+            students = entry["students"]
+
+            if obj.trip_type == "outbound":
                 result.append(
                     {
-                        "boarding_point": BoardingPointSerializer(point).data,
+                        "boarding_point": BoardingPointSerializer(stop).data,
                         "students": StudentNestedSerializer(students, many=True).data,
                         "student_count": len(students),
-                        "is_current": (
-                            obj.current_boarding_point
-                            and obj.current_boarding_point.id == point.id
+                        "is_current": bool(
+                            stop and obj.current_boarding_point_id == stop.id
                         ),
                     }
                 )
-
-            return result
-        else:
-            universities = obj.get_universities()
-            result = []
-
-            for university in universities:
-                students = obj.get_students_at_university(university)
+            else:
                 result.append(
                     {
-                        "university": university,
-                        "university_name": UNIVERSITY_NAMES.get(university, university),
+                        "university": stop,
+                        "university_name": university_name(stop),
                         "students": StudentNestedSerializer(students, many=True).data,
                         "student_count": len(students),
-                        "is_current": obj.current_university == university,
+                        "is_current": obj.current_university == stop,
                     }
                 )
 
-            return result
+        return result
@@ -1,16 +1,25 @@
-from django.test import TestCase
+import asyncio
+import json
+import threading
+from django.test import TestCase, TransactionTestCase
 from django.contrib.auth.models import User
 from django.utils import timezone
 from django.urls import reverse
-from datetime import date
+from django.db import connection
+from django.db.models import ProtectedError
+from django.test.utils import CaptureQueriesContext
+from datetime import date, timedelta
+from unittest.mock import patch
 from rest_framework.exceptions import ValidationError
 from rest_framework import status
-from trips.models import Trip
+from trips.models import Trip, TripStateConflict
 from trips.serializers import TripSerializer, TripDetailSerializer
-from students.models import Student
+from students.models import Student, University
 from polls.models import Poll, Vote
 from boarding_points.models import BoardingPoint
 from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from trips.events import TripEventHub, hub
 
 
 class TripModelLogicTests(TestCase):
@@ -25,14 +34,14 @@ class TripModelLogicTests(TestCase):
         self.student1 = Student.objects.create(
             name="Aluno Ida",
             user=self.user,
-            university="UESPI",
+            university_id="UESPI",
             boarding_point=self.bp1,
         )
         self.user2 = User.objects.create(username="test_user2")
         self.student2 = Student.objects.create(
             name="Aluno Volta",
             user=self.user2,
-            university="IFPI",
+            university_id="IFPI",
             boarding_point=self.bp2,
         )
 
@@ -124,7 +133,7 @@ class TripSerializerTests(TestCase):
         self.student = Student.objects.create(
             name="Tony",
             user=self.user,
-            university="UESPI",
+            university_id="UESPI",
             boarding_point=self.bp1,
         )
 
@@ -146,7 +155,7 @@ class TripSerializerTests(TestCase):
         bp1 = BoardingPoint.objects.create(name="P1", route_order=0)
         bp2 = BoardingPoint.objects.create(name="P2", route_order=1)
         student = Student.objects.create(
-            name="S", user=user, boarding_point=bp2
+            name="S", user=user, university_id="UESPI", boarding_point=bp2
         )  # Aluno no ponto 2
         Vote.objects.create(student=student, poll=self.poll, option="round_trip")
 
@@ -193,7 +202,7 @@ class TestsTripView(APITestCase):
             user=User.objects.create(username="student1"),
             name="Vito",
             phone="999999999",
-            university="UESPI",
+            university_id="UESPI",
             boarding_point=self.bp1,
         )
 
@@ -201,7 +210,7 @@ class TestsTripView(APITestCase):
             user=User.objects.create(username="student2"),
             name="Connie",
             phone="9999994579",
-            university="IFPI",
+            university_id="IFPI",
             boarding_point=self.bp2,
         )
 
@@ -217,14 +226,14 @@ class TestsTripView(APITestCase):
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data["results"]), 2)
 
     def test_CT_15_list_filter_by_poll(self):
         url = reverse("trip-list") + f"?poll={self.poll.id}"
         response = self.client.get(url)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data["results"]), 2)
 
 
 class TestTripCreateView(TestsTripView):
@@ -241,7 +250,7 @@ class TestTripStartView(TestsTripView):
     def test_CT_17_start_outbound_trip(self):
         url = reverse("trip-start", args=[self.outbound_trip.id])
 
-        response = self.client.post(url)
+        response = self.client.post(url, {"version": self.outbound_trip.version})
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.outbound_trip.refresh_from_db()
@@ -251,7 +260,7 @@ class TestTripStartView(TestsTripView):
     def test_CT_18_start_return_trip(self):
         url = reverse("trip-start", args=[self.return_trip.id])
 
-        response = self.client.post(url)
+        response = self.client.post(url, {"version": self.return_trip.version})
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["message"], "Return trip started")
@@ -262,7 +271,7 @@ class TestTripCompleteView(TestsTripView):
     def test_CT_19_complete_outbound(self):
         self.outbound_trip.start_trip()
         url = reverse("trip-complete", args=[self.outbound_trip.id])
-        response = self.client.post(url)
+        response = self.client.post(url, {"version": self.outbound_trip.version})
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(
@@ -279,3 +288,351 @@ class TripCurrentStatusViewTests(TestsTripView):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertIn("current_students", res.data)
         self.assertGreaterEqual(res.data["current_student_count"], 1)
+
+
+class TripStopPlanTests(TestCase):
+    def setUp(self):
+        self.poll = Poll.objects.create(date=date.today())
+        self.bp1 = BoardingPoint.objects.create(name="Ponto 1", route_order=0)
+        self.bp2 = BoardingPoint.objects.create(name="Ponto 2", route_order=1)
+
+        for i, (point, university) in enumerate(
+            [(self.bp1, "UESPI"), (self.bp1, "IFPI"), (self.bp2, "IFPI")]
+        ):
+            student = Student.objects.create(
+                user=User.objects.create(username=f"aluno{i}"),
+                name=f"Aluno {i}",
+                university_id=university,
+                boarding_point=point,
+            )
+            Vote.objects.create(student=student, poll=self.poll, option="round_trip")
+
+        self.trip = Trip.objects.create(poll=self.poll, trip_type="outbound")
+
+    def test_CT_21_start_trip_freezes_stop_plan(self):
+        self.trip.start_trip()
+
+        plan = self.trip.get_stop_plan()
+        self.assertEqual([s.boarding_point for s in plan], [self.bp1, self.bp2])
+        self.assertEqual([s.expected_riders for s in plan], [2, 1])
+        self.assertEqual(self.trip.current_stop_position, 0)
+
+    def test_CT_22_return_plan_follows_university_order(self):
+        trip = Trip.objects.create(poll=self.poll, trip_type="return")
+        trip.start_trip()
+
+        plan = trip.get_stop_plan()
+        self.assertEqual([s.university for s in plan], ["IFPI", "UESPI"])
+        self.assertEqual([s.expected_riders for s in plan], [2, 1])
+
+    def test_CT_22_1_return_order_comes_from_university_table(self):
+        University.objects.filter(code="UESPI").update(route_order=0)
+        University.objects.filter(code="IFPI").update(route_order=5)
+        trip = Trip.objects.create(poll=self.poll, trip_type="return")
+
+        self.assertEqual(trip.get_universities(), ["UESPI", "IFPI"])
+        trip.start_trip()
+        self.assertEqual(
+            [s.university for s in trip.get_stop_plan()], ["UESPI", "IFPI"]
+        )
+
+    def test_CT_23_next_stop_reads_plan_without_scanning_votes(self):
+        self.trip.start_trip()
+
+        with self.assertNumQueries(2):
+            next_point = self.trip.next_stop()
+
+        self.assertEqual(next_point, self.bp2)
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.current_boarding_point, self.bp2)
+        self.assertEqual(self.trip.current_stop_position, 1)
+
+    def test_CT_24_plan_ignores_votes_after_start(self):
+        self.trip.start_trip()
+        Vote.objects.filter(student__boarding_point=self.bp2).delete()
+
+        self.assertEqual(self.trip.next_stop(), self.bp2)
+        self.assertEqual(TripSerializer(self.trip).data["total_stops"], 2)
+
+    def test_CT_25_next_stop_rejects_stale_position(self):
+        self.trip.start_trip()
+        stale = Trip.objects.get(pk=self.trip.pk)
+        self.trip.next_stop()
+
+        with self.assertRaises(TripStateConflict):
+            stale.next_stop()
+
+    def test_CT_25_1_current_students_come_from_boarding_list(self):
+        self.trip.start_trip()
+        self.trip.get_current_students()
+
+        with CaptureQueriesContext(connection) as ctx:
+            students = self.trip.get_current_students()
+
+        self.assertEqual([s.name for s in students], ["Aluno 0", "Aluno 1"])
+        self.assertFalse(any("polls_vote" in q["sql"] for q in ctx.captured_queries))
+
+    def test_CT_25_2_planned_point_cannot_be_deleted(self):
+        self.trip.start_trip()
+
+        with self.assertRaises(ProtectedError):
+            self.bp2.delete()
+        self.assertEqual(len(self.trip.get_stop_plan()), 2)
+
+
+class TripManifestQueryCountTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(user=User.objects.create(username="motorista"))
+
+    def create_trip_with_stops(self, stop_count, day_offset):
+        poll = Poll.objects.create(date=date.today() + timedelta(days=day_offset))
+        for i in range(stop_count):
+            point = BoardingPoint.objects.create(
+                name=f"Ponto {day_offset}-{i}", route_order=i
+            )
+            student = Student.objects.create(
+                user=User.objects.create(username=f"aluno-{day_offset}-{i}"),
+                name=f"Aluno {i}",
+                university_id="UESPI",
+                boarding_point=point,
+            )
+            Vote.objects.create(student=student, poll=poll, option="round_trip")
+        return Trip.objects.create(poll=poll, trip_type="outbound")
+
+    def count_detail_queries(self, trip):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("trip-detail", args=[trip.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries), response
+
+    def test_CT_26_detail_query_count_is_constant(self):
+        small = self.create_trip_with_stops(5, 1)
+        large = self.create_trip_with_stops(50, 2)
+
+        small_queries, small_response = self.count_detail_queries(small)
+        large_queries, large_response = self.count_detail_queries(large)
+
+        self.assertEqual(len(small_response.data["stops"]), 5)
+        self.assertEqual(len(large_response.data["stops"]), 50)
+        self.assertEqual(small_queries, large_queries)
+
+        small.start_trip()
+        large.start_trip()
+
+        self.assertEqual(
+            self.count_detail_queries(small)[0], self.count_detail_queries(large)[0]
+        )
+
+    def test_CT_27_status_uses_manifest_for_current_students(self):
+        trip = self.create_trip_with_stops(3, 1)
+        trip.start_trip()
+
+        response = self.client.get(reverse("trip-status", args=[trip.id]))
+
+        self.assertEqual(response.data["current_student_count"], 1)
+        self.assertEqual(response.data["current_students"][0]["name"], "Aluno 0")
+        self.assertTrue(response.data["trip"]["stops"][0]["is_current"])
+
+
+class TripConcurrentTransitionTests(TransactionTestCase):
+    def setUp(self):
+        # TransactionTestCase esvazia as tabelas, inclusive as universidades
+        University.objects.get_or_create(
+            code="UESPI", defaults={"name": "Universidade Estadual do Piaui"}
+        )
+        self.user = User.objects.create(username="motorista")
+        poll = Poll.objects.create(date=date.today())
+        for i in range(3):
+            point = BoardingPoint.objects.create(name=f"Ponto {i}", route_order=i)
+            student = Student.objects.create(
+                user=User.objects.create(username=f"aluno{i}"),
+                name=f"Aluno {i}",
+                university_id="UESPI",
+                boarding_point=point,
+            )
+            Vote.objects.create(student=student, poll=poll, option="round_trip")
+
+        self.trip = Trip.objects.create(poll=poll, trip_type="outbound")
+        self.trip.start_trip()
+
+    def test_CT_28_concurrent_next_stop_advances_once(self):
+        workers = 4
+        barrier = threading.Barrier(workers)
+        status_codes = []
+
+        def tap():
+            # Todos leem a mesma versão antes de avançar
+            trip = Trip.objects.get(pk=self.trip.pk)
+            try:
+                barrier.wait()
+                try:
+                    trip.next_stop()
+                    status_codes.append(status.HTTP_200_OK)
+                except TripStateConflict:
+                    status_codes.append(status.HTTP_409_CONFLICT)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=tap) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(status_codes.count(status.HTTP_200_OK), 1)
+        self.assertEqual(status_codes.count(status.HTTP_409_CONFLICT), workers - 1)
+
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.current_stop_position, 1)
+        self.assertEqual(self.trip.version, 2)
+
+    def test_CT_29_next_stop_view_returns_409_on_stale_version(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        Trip.objects.filter(pk=self.trip.pk).update(version=99)
+
+        with patch("trips.views.get_object_or_404", return_value=self.trip):
+            response = client.post(
+                reverse("trip-next-stop", args=[self.trip.id]),
+                {"version": self.trip.version},
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_CT_29_1_replayed_version_is_rejected(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        url = reverse("trip-next-stop", args=[self.trip.id])
+        version = self.trip.version
+
+        response = client.post(url, {"version": version})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["trip"]["version"], version + 1)
+
+        # O mesmo toque repetido (ex.: reenvio) não avança a viagem de novo
+        response = client.post(url, {"version": version})
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["trip"]["version"], version + 1)
+        self.trip.refresh_from_db()
+        self.assertEqual(self.trip.current_stop_position, 1)
+
+        # A ETag do detalhe serve de If-Match, e só vale uma vez
+        etag = client.get(reverse("trip-detail", args=[self.trip.id]))["ETag"]
+        response = client.post(url, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = client.post(url, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+        response = client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_428_PRECONDITION_REQUIRED)
+
+
+class TripEventTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="motorista")
+        poll = Poll.objects.create(date=date.today())
+        for i in range(2):
+            point = BoardingPoint.objects.create(name=f"Ponto {i}", route_order=i)
+            student = Student.objects.create(
+                user=User.objects.create(username=f"aluno{i}"),
+                name=f"Aluno {i}",
+                university_id="UESPI",
+                boarding_point=point,
+            )
+            Vote.objects.create(student=student, poll=poll, option="round_trip")
+
+        self.trip = Trip.objects.create(poll=poll, trip_type="outbound")
+        self.token = str(AccessToken.for_user(self.user))
+
+    def test_CT_30_transitions_publish_small_deltas(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        with patch("trips.events.hub.publish") as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                client.post(reverse("trip-start", args=[self.trip.id]), {"version": 0})
+            with self.captureOnCommitCallbacks(execute=True):
+                client.post(
+                    reverse("trip-next-stop", args=[self.trip.id]), {"version": 1}
+                )
+            with self.captureOnCommitCallbacks(execute=True):
+                client.post(
+                    reverse("trip-next-stop", args=[self.trip.id]), {"version": 2}
+                )
+
+        events = [call.args[1] for call in publish.call_args_list]
+        self.assertEqual(
+            [e["event"] for e in events], ["started", "next_stop", "completed"]
+        )
+        self.assertEqual(events[1]["current_stop_index"], 1)
+        self.assertEqual(events[2]["status"], "completed")
+        self.assertNotIn("stops", events[0])
+
+    async def test_CT_31_hub_delivers_events_published_from_threads(self):
+        local_hub = TripEventHub(max_queue_size=2)
+        queue = local_hub.subscribe(7)
+
+        for version in range(3):
+            thread = threading.Thread(
+                target=local_hub.publish, args=(7, {"version": version})
+            )
+            thread.start()
+            thread.join()
+
+        first = await asyncio.wait_for(queue.get(), timeout=1)
+        second = await asyncio.wait_for(queue.get(), timeout=1)
+        self.assertEqual([first["version"], second["version"]], [1, 2])
+
+        local_hub.unsubscribe(7, queue)
+        self.assertEqual(local_hub.subscriber_count(7), 0)
+
+    async def test_CT_32_stream_sends_snapshot_then_pushed_events(self):
+        url = reverse("trip-events", args=[self.trip.id])
+        response = await self.async_client.get(f"{url}?token={self.token}")
+
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        stream = response.streaming_content
+        self.assertEqual(await anext(stream), b"retry: 5000\n\n")
+        snapshot = await anext(stream)
+        self.assertIn(b"event: snapshot", snapshot)
+
+        hub.publish(self.trip.id, {"event": "completed", "status": "completed"})
+        pushed = await asyncio.wait_for(anext(stream), timeout=1)
+        self.assertEqual(json.loads(pushed.split(b"data: ")[1])["event"], "completed")
+
+        with self.assertRaises(StopAsyncIteration):
+            await anext(stream)
+        self.assertEqual(hub.subscriber_count(self.trip.id), 0)
+
+    async def test_CT_33_stream_requires_token(self):
+        response = await self.async_client.get(
+            reverse("trip-events", args=[self.trip.id])
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_CT_33_1_stream_is_unavailable_under_wsgi(self):
+        url = reverse("trip-events", args=[self.trip.id])
+        response = self.client.get(f"{url}?token={self.token}")
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertFalse(response.streaming)
+        self.assertEqual(hub.subscriber_count(self.trip.id), 0)
+
+
+class TripConditionalRequestTests(TestsTripView):
+    def test_CT_34_detail_and_status_return_304_until_trip_moves(self):
+        for name in ["trip-detail", "trip-status"]:
+            url = reverse(name, args=[self.outbound_trip.id])
+            etag = self.client.get(url)["ETag"]
+
+            with self.assertNumQueries(1):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        detail_url = reverse("trip-detail", args=[self.outbound_trip.id])
+        etag = self.client.get(detail_url)["ETag"]
+        self.outbound_trip.start_trip()
+
+        response = self.client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], "in_progress")
@@ -41,15 +41,15 @@ class TripAPITestCase(APITestCase):
         # Alunos 
         self.student_ana = Student.objects.create(
             user=self.student_user_1, name="Ana Silva", phone="111",
-            class_shift="M", university="UESPI", boarding_point=self.ponto_a
+            class_shift="M", university_id="UESPI", boarding_point=self.ponto_a
         )
         self.student_bruno = Student.objects.create(
             user=self.student_user_2, name="Bruno Costa", phone="222",
-            class_shift="A", university="IFPI", boarding_point=self.ponto_a
+            class_shift="A", university_id="IFPI", boarding_point=self.ponto_a
         )
         self.student_carla = Student.objects.create(
             user=self.student_user_3, name="Carla Dias", phone="333",
-            class_shift="N", university="IFPI", boarding_point=self.ponto_b
+            class_shift="N", university_id="IFPI", boarding_point=self.ponto_b
         )
         
         self.poll = Poll.objects.create(date=date.today())
@@ -107,20 +107,20 @@ class TripAPITestCase(APITestCase):
         
         response = self.client.get(url, {"status": "pending"})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 4)
+        self.assertEqual(len(response.data["results"]), 4)
         
         response = self.client.get(url, {"trip_type": "return"})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data["results"]), 2)
         
         response = self.client.get(url, {"poll_id": self.poll_empty.id})
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data["results"]), 2)
 
 
     def test_start_outbound_trip_successfully(self):
         self.authenticate_admin()
         url = reverse("trip-start", args=[self.trip_outbound.id])
-        response = self.client.post(url)
+        response = self.client.post(url, {"version": self.trip_outbound.version})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.trip_outbound.refresh_from_db()
         self.assertEqual(self.trip_outbound.status, "in_progress")
@@ -131,7 +131,7 @@ class TripAPITestCase(APITestCase):
         self.authenticate_admin()
         self.trip_outbound.start_trip() 
         url = reverse("trip-next-stop", args=[self.trip_outbound.id])
-        response = self.client.post(url) 
+        response = self.client.post(url, {"version": self.trip_outbound.version}) 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.trip_outbound.refresh_from_db()
         self.assertEqual(self.trip_outbound.current_boarding_point, self.ponto_b)
@@ -143,7 +143,7 @@ class TripAPITestCase(APITestCase):
         self.trip_outbound.start_trip()
         self.trip_outbound.next_stop() 
         url = reverse("trip-next-stop", args=[self.trip_outbound.id])
-        response = self.client.post(url) 
+        response = self.client.post(url, {"version": self.trip_outbound.version}) 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.trip_outbound.refresh_from_db()
         self.assertEqual(self.trip_outbound.status, "completed")
@@ -153,7 +153,7 @@ class TripAPITestCase(APITestCase):
     def test_start_return_trip_successfully(self):
         self.authenticate_admin()
         url = reverse("trip-start", args=[self.trip_return.id])
-        response = self.client.post(url)
+        response = self.client.post(url, {"version": self.trip_return.version})
         
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.trip_return.refresh_from_db()
@@ -172,7 +172,7 @@ class TripAPITestCase(APITestCase):
         self.authenticate_admin()
         self.trip_return.start_trip() 
         url = reverse("trip-next-stop", args=[self.trip_return.id])
-        response = self.client.post(url)
+        response = self.client.post(url, {"version": self.trip_return.version})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.trip_return.refresh_from_db()
         self.assertEqual(self.trip_return.current_university, "UESPI")
@@ -184,7 +184,7 @@ class TripAPITestCase(APITestCase):
         self.trip_return.start_trip()
         self.trip_return.next_stop() 
         url = reverse("trip-next-stop", args=[self.trip_return.id])
-        response = self.client.post(url) 
+        response = self.client.post(url, {"version": self.trip_return.version}) 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.trip_return.refresh_from_db()
         self.assertEqual(self.trip_return.status, "completed")
@@ -194,14 +194,14 @@ class TripAPITestCase(APITestCase):
     def test_start_trip_outbound_no_points(self):
         self.authenticate_admin()
         url = reverse("trip-start", args=[self.trip_outbound_empty.id])
-        response = self.client.post(url)
+        response = self.client.post(url, {"version": self.trip_outbound_empty.version})
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn("No boarding points", response.data["error"])
 
     def test_start_trip_return_no_universities(self):
         self.authenticate_admin()
         url = reverse("trip-start", args=[self.trip_return_empty.id])
-        response = self.client.post(url)
+        response = self.client.post(url, {"version": self.trip_return_empty.version})
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn("No universities", response.data["error"])
 
@@ -209,14 +209,14 @@ class TripAPITestCase(APITestCase):
         self.authenticate_admin()
         self.trip_outbound.start_trip() # Inicia
         url = reverse("trip-start", args=[self.trip_outbound.id])
-        response = self.client.post(url) # Tenta iniciar de novo
+        response = self.client.post(url, {"version": self.trip_outbound.version}) # Tenta iniciar de novo
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn("already started", response.data["error"])
 
     def test_cannot_advance_pending_trip(self):
         self.authenticate_admin()
         url = reverse("trip-next-stop", args=[self.trip_outbound.id])
-        response = self.client.post(url)
+        response = self.client.post(url, {"version": self.trip_outbound.version})
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn("not in progress", response.data["error"])
 
@@ -228,7 +228,7 @@ class TripAPITestCase(APITestCase):
         self.assertEqual(self.trip_outbound.status, "completed")
         
         url = reverse("trip-next-stop", args=[self.trip_outbound.id])
-        response = self.client.post(url)
+        response = self.client.post(url, {"version": self.trip_outbound.version})
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn("not in progress", response.data["error"])
 
@@ -236,7 +236,7 @@ class TripAPITestCase(APITestCase):
         self.authenticate_admin()
         self.trip_outbound.start_trip() 
         url = reverse("trip-complete", args=[self.trip_outbound.id])
-        response = self.client.post(url)
+        response = self.client.post(url, {"version": self.trip_outbound.version})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.trip_outbound.refresh_from_db()
         self.assertEqual(self.trip_outbound.status, "completed")
@@ -246,7 +246,7 @@ class TripAPITestCase(APITestCase):
         self.authenticate_admin()
         self.trip_return.start_trip() 
         url = reverse("trip-complete", args=[self.trip_return.id])
-        response = self.client.post(url)
+        response = self.client.post(url, {"version": self.trip_return.version})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.trip_return.refresh_from_db()
         self.assertEqual(self.trip_return.status, "completed")
@@ -255,7 +255,7 @@ class TripAPITestCase(APITestCase):
     def test_cannot_complete_pending_trip(self):
         self.authenticate_admin()
         url = reverse("trip-complete", args=[self.trip_outbound.id])
-        response = self.client.post(url)
+        response = self.client.post(url, {"version": self.trip_outbound.version})
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn("not in progress", response.data["error"])
 
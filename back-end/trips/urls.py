@@ -21,4 +21,5 @@ urlpatterns = [
         views.TripCurrentStatusView.as_view(),
         name="trip-status",
     ),
+    path("trips/<int:pk>/events/", views.trip_events, name="trip-events"),
 ]
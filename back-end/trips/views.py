@@ -1,20 +1,107 @@
-from rest_framework import generics, permissions, status
+import asyncio
+import json
+from rest_framework import generics, permissions, serializers, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Prefetch
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from .models import Trip
+from django.utils.decorators import method_decorator
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from .events import build_trip_event, hub, publish_trip_event
+from .manifest import build_trip_manifest, get_current_manifest_stop
+from .models import Trip, TripStateConflict, TripStop
 from .serializers import TripSerializer, TripDetailSerializer
 from polls.models import Poll
 from boarding_points.serializers import BoardingPointSerializer
 from polls.serializers import StudentNestedSerializer
-
-
-class TripListView(generics.ListAPIView):
+from common.pagination import KeysetCursorPagination
+from common.views import SparseFieldsetMixin
+
+
+def trip_etag(request, pk):
+    # Uma consulta indexada: versão da viagem + versões dos dados e votos da enquete
+    state = (
+        Trip.objects.filter(pk=pk)
+        .values(
+            "version", "poll_id", "poll__data_version", "poll__option_counts__version"
+        )
+        .first()
+    )
+    if state is None:
+        return None
+    return (
+        f"{request.path}-{state['version']}-"
+        f"{state['poll_id']}-{state['poll__data_version']}-"
+        f"{state['poll__option_counts__version']}"
+    )
+
+
+def expected_trip_version(request):
+    """
+    Versão da viagem que o cliente viu: o campo version do corpo ou a ETag
+    da viagem (trip_etag) enviada em If-Match. None se não veio nenhuma.
+    """
+    version = request.data.get("version") if hasattr(request.data, "get") else None
+    if version is None:
+        etag = request.headers.get("If-Match", "").strip().removeprefix("W/")
+        # "<caminho>-<versão da viagem>-<enquete>-<versões dos dados e votos>"
+        parts = etag.strip('"').rsplit("-", 4)
+        if len(parts) == 5:
+            version = parts[1]
+    try:
+        return int(version)
+    except (TypeError, ValueError):
+        return None
+
+
+def check_trip_version(request, trip):
+    """
+    Resposta de erro se a transição partiu de uma versão antiga da viagem
+    (409) ou não informou a versão (428); None para seguir. O UPDATE
+    condicionado de Trip._transition ainda cobre quem passar daqui junto.
+    """
+    expected = expected_trip_version(request)
+    if expected is None:
+        return Response(
+            {"error": "Trip version is required (If-Match or version)"},
+            status=status.HTTP_428_PRECONDITION_REQUIRED,
+        )
+    if expected != trip.version:
+        return Response(
+            {
+                "error": "Trip was updated by another request",
+                "trip": TripSerializer(trip).data,
+            },
+            status=status.HTTP_409_CONFLICT,
+        )
+    return None
+
+
+revalidate_with_trip_etag = [
+    cache_control(private=True, no_cache=True),
+    condition(etag_func=trip_etag),
+]
+
+
+class TripListView(SparseFieldsetMixin, generics.ListAPIView):
     serializer_class = TripSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetCursorPagination
+    cursor_ordering = "-id"
 
     def get_queryset(self):
-        queryset = Trip.objects.all()
+        queryset = Trip.objects.select_related(
+            "current_boarding_point"
+        ).prefetch_related(
+            Prefetch(
+                "stops", queryset=TripStop.objects.select_related("boarding_point")
+            )
+        )
         poll_id = self.request.query_params.get("poll_id")
         trip_type = self.request.query_params.get("trip_type")
         trip_status = self.request.query_params.get("status")
@@ -30,10 +117,16 @@ class TripListView(generics.ListAPIView):
 
 
 class TripDetailView(generics.RetrieveAPIView):
-    queryset = Trip.objects.all()
+    queryset = Trip.objects.select_related(
+        "poll__option_counts", "current_boarding_point"
+    )
     serializer_class = TripDetailSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    @method_decorator(revalidate_with_trip_etag)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
 
 class TripCreateView(generics.CreateAPIView):
     serializer_class = TripSerializer
@@ -48,7 +141,10 @@ class TripCreateView(generics.CreateAPIView):
                 f"Trip of type '{trip_type}' already exists for this poll"
             )
 
-        serializer.save()
+        trip = serializer.save()
+        # Fase já fechada: o plano sai agora, com os votos que não mudam mais
+        if poll.is_frozen(trip_type):
+            trip.build_stop_plan()
 
 
 class TripStartView(APIView):
@@ -56,12 +152,16 @@ class TripStartView(APIView):
 
     def post(self, request, pk):
         trip = get_object_or_404(Trip, pk=pk)
+        conflict = check_trip_version(request, trip)
+        if conflict is not None:
+            return conflict
 
         try:
             result = trip.start_trip()
+            publish_trip_event(trip, "started")
 
             if trip.trip_type == "outbound":
-                students = trip.get_students_at_point(result)
+                students = trip.get_current_students()
                 return Response(
                     {
                         "message": "Outbound trip started",
@@ -72,7 +172,7 @@ class TripStartView(APIView):
                     }
                 )
             else:
-                students = trip.get_students_at_university(result)
+                students = trip.get_current_students()
                 return Response(
                     {
                         "message": "Return trip started",
@@ -82,6 +182,8 @@ class TripStartView(APIView):
                         "student_count": len(students),
                     }
                 )
+        except TripStateConflict as e:
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
         except ValueError as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -91,9 +193,13 @@ class TripNextStopView(APIView):
 
     def post(self, request, pk):
         trip = get_object_or_404(Trip, pk=pk)
+        conflict = check_trip_version(request, trip)
+        if conflict is not None:
+            return conflict
 
         try:
             next_stop = trip.next_stop()
+            publish_trip_event(trip, "completed" if next_stop is None else "next_stop")
 
             if next_stop is None:
                 if trip.trip_type == "outbound":
@@ -121,7 +227,7 @@ class TripNextStopView(APIView):
                     )
             else:
                 if trip.trip_type == "outbound":
-                    students = trip.get_students_at_point(next_stop)
+                    students = trip.get_current_students()
                     return Response(
                         {
                             "message": "Moved to next stop",
@@ -137,7 +243,7 @@ class TripNextStopView(APIView):
                         }
                     )
                 else:
-                    students = trip.get_students_at_university(next_stop)
+                    students = trip.get_current_students()
                     return Response(
                         {
                             "message": "Moved to next university",
@@ -150,6 +256,8 @@ class TripNextStopView(APIView):
                             "completed": False,
                         }
                     )
+        except TripStateConflict as e:
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
         except ValueError as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -159,9 +267,13 @@ class TripCompleteView(APIView):
 
     def post(self, request, pk):
         trip = get_object_or_404(Trip, pk=pk)
+        conflict = check_trip_version(request, trip)
+        if conflict is not None:
+            return conflict
 
         try:
             trip.complete_trip()
+            publish_trip_event(trip, "completed")
 
             if trip.trip_type == "outbound":
                 return_trip, created = Trip.objects.get_or_create(
@@ -182,6 +294,8 @@ class TripCompleteView(APIView):
                         "trip": TripSerializer(trip).data,
                     }
                 )
+        except TripStateConflict as e:
+            return Response({"error": str(e)}, status=status.HTTP_409_CONFLICT)
         except ValueError as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -189,18 +303,111 @@ class TripCompleteView(APIView):
 class TripCurrentStatusView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    @method_decorator(revalidate_with_trip_etag)
     def get(self, request, pk):
-        trip = get_object_or_404(Trip, pk=pk)
+        trip = get_object_or_404(
+            Trip.objects.select_related(
+                "poll__option_counts", "current_boarding_point"
+            ),
+            pk=pk,
+        )
+        manifest = build_trip_manifest(trip)
 
         response_data = {
-            "trip": TripDetailSerializer(trip).data,
+            "trip": TripDetailSerializer(trip, context={"manifest": manifest}).data,
         }
 
         if trip.status == "in_progress":
-            students = trip.get_current_students()
+            current_stop = get_current_manifest_stop(trip, manifest)
+            students = current_stop["students"] if current_stop else []
             response_data["current_students"] = StudentNestedSerializer(
                 students, many=True
             ).data
             response_data["current_student_count"] = len(students)
 
         return Response(response_data)
+
+
+SSE_KEEPALIVE_SECONDS = 15
+
+
+def _has_valid_stream_token(request):
+    # EventSource não envia cabeçalhos, então o token também é aceito na query.
+    raw_token = request.GET.get("token")
+    if not raw_token:
+        header = request.headers.get("Authorization", "")
+        if header.startswith("Bearer "):
+            raw_token = header.split(" ", 1)[1]
+
+    if not raw_token:
+        return False
+
+    try:
+        JWTAuthentication().get_validated_token(raw_token)
+    except (InvalidToken, TokenError):
+        return False
+    return True
+
+
+def _format_sse(payload):
+    return f"event: {payload['event']}\ndata: {json.dumps(payload)}\n\n"
+
+
+async def _trip_event_stream(pk):
+    queue = hub.subscribe(pk)
+    try:
+        trip = await Trip.objects.aget(pk=pk)
+        yield "retry: 5000\n\n"
+        yield _format_sse(build_trip_event(trip, "snapshot"))
+        if trip.status == "completed":
+            return
+
+        while True:
+            try:
+                payload = await asyncio.wait_for(
+                    queue.get(), timeout=SSE_KEEPALIVE_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+
+            yield _format_sse(payload)
+            if payload["status"] == "completed":
+                return
+    finally:
+        hub.unsubscribe(pk, queue)
+
+
+async def trip_events(request, pk):
+    """
+    Canal Server-Sent Events com as mudanças de estado da viagem.
+
+    Envia um snapshot ao conectar e depois um evento pequeno a cada início,
+    avanço de parada ou conclusão. Precisa ser servido pelo app/asgi.py;
+    clientes sem suporte continuam usando trips/<pk>/ e trips/<pk>/status/.
+
+    Sob WSGI a resposta só seria enviada ao fim do stream e prenderia um
+    worker até a viagem terminar, então responde 503 e o cliente volta ao
+    polling na hora.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {"detail": "Live trip events require the ASGI server."},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+    if not _has_valid_stream_token(request):
+        return JsonResponse(
+            {"detail": "Authentication credentials were not provided."},
+            status=status.HTTP_401_UNAUTHORIZED,
+        )
+
+    if not await Trip.objects.filter(pk=pk).aexists():
+        return JsonResponse({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    response = StreamingHttpResponse(
+        _trip_event_stream(pk), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
@@ -24,7 +24,7 @@ describe('Gestão de Pontos de Embarque (Admin)', () => {
       statusCode: 200, body: {} 
     }).as('verifyToken');
 
-    cy.intercept('GET', '**/api/v1/boarding-points/', {
+    cy.intercept('GET', '**/api/v1/boarding-points/?paginate=false', {
       statusCode: 200,
       body: mockPoints
     }).as('getPoints');
@@ -55,7 +55,7 @@ describe('Gestão de Pontos de Embarque (Admin)', () => {
       body: newPoint
     }).as('createPoint');
 
-    cy.intercept('GET', '**/api/v1/boarding-points/', {
+    cy.intercept('GET', '**/api/v1/boarding-points/?paginate=false', {
       statusCode: 200,
       body: [...mockPoints, newPoint]
     }).as('getPointsUpdated');
@@ -84,7 +84,7 @@ describe('Gestão de Pontos de Embarque (Admin)', () => {
       body: updatedPoint
     }).as('updatePoint');
 
-    cy.intercept('GET', '**/api/v1/boarding-points/', {
+    cy.intercept('GET', '**/api/v1/boarding-points/?paginate=false', {
       statusCode: 200,
       body: [updatedPoint, mockPoints[1]]
     }).as('getPointsUpdated');
@@ -108,7 +108,7 @@ describe('Gestão de Pontos de Embarque (Admin)', () => {
       body: {}
     }).as('deletePoint');
 
-    cy.intercept('GET', '**/api/v1/boarding-points/', {
+    cy.intercept('GET', '**/api/v1/boarding-points/?paginate=false', {
       statusCode: 200,
       body: [mockPoints[1]]
     }).as('getPointsUpdated');
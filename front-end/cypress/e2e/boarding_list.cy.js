@@ -18,7 +18,7 @@ describe('Funcionalidade de Lista de Embarque', () => {
     cy.clock(now.getTime());
     const fixedDateString = '2025-11-24';
 
-    cy.intercept('GET', '**/api/v1/polls/', {
+    cy.intercept('GET', '**/api/v1/polls/?paginate=false', {
       statusCode: 200,
       body: [
         { id: 99, date: fixedDateString, status: 'open', votes: [] }
@@ -50,7 +50,7 @@ describe('Funcionalidade de Lista de Embarque', () => {
   // CT-13: Sem Enquete
   it('Deve exibir mensagem quando não houver enquete para o dia', () => {
     
-    cy.intercept('GET', '**/api/v1/polls/', {
+    cy.intercept('GET', '**/api/v1/polls/?paginate=false', {
       statusCode: 200,
       body: [] 
     }).as('getEmptyPolls');
@@ -64,7 +64,7 @@ describe('Funcionalidade de Lista de Embarque', () => {
 
   //CT-14: Erro na API
   it('Deve exibir erro se a API falhar', () => {
-    cy.intercept('GET', '**/api/v1/polls/', {
+    cy.intercept('GET', '**/api/v1/polls/?paginate=false', {
       statusCode: 500,
       body: { detail: 'Server Error' }
     }).as('getPollsError');
@@ -26,7 +26,7 @@ describe('RF 02 - Visualização de Enquetes Semanais', () => {
 
   //CT_10
   it('Deve exibir mensagem amigável quando não houver enquetes', () => {
-    cy.intercept('GET', '**/api/v1/polls/', {
+    cy.intercept('GET', '**/api/v1/polls/?paginate=false', {
       statusCode: 200,
       body: [] 
     }).as('getEmptyPolls');
@@ -41,7 +41,7 @@ describe('RF 02 - Visualização de Enquetes Semanais', () => {
 
   //CT_11
   it('Deve exibir alerta de erro quando a API falhar', () => {
-    cy.intercept('GET', '**/api/v1/polls/', {
+    cy.intercept('GET', '**/api/v1/polls/?paginate=false', {
       statusCode: 500,
       body: { detail: 'Erro interno do servidor' }
     }).as('getPollsError');
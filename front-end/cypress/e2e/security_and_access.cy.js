@@ -11,7 +11,7 @@ describe('Segurança e Controle de Acesso', () => {
   };
 
   beforeEach(() => {
-    cy.intercept('GET', '**/api/v1/polls/', { body: [] });
+    cy.intercept('GET', '**/api/v1/polls/?paginate=false', { body: [] });
     cy.intercept('GET', '**/api/v1/trips/?*', { body: [] });
   });
 
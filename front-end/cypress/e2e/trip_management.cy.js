@@ -50,7 +50,7 @@ describe('RF 11 - Gestão e Visualização de Viagens', () => {
   beforeEach(() => {
     cy.clock(NOW_TIMESTAMP); 
     cy.intercept('POST', '**/api/v1/authentication/token/verify', { statusCode: 200, body: {} }).as('verifyToken');
-    cy.intercept('GET', '**/api/v1/polls/', { statusCode: 200, body: [mockPoll] }).as('getPolls');
+    cy.intercept('GET', '**/api/v1/polls/?paginate=false', { statusCode: 200, body: [mockPoll] }).as('getPolls');
   });
 
   // set up do motorista
@@ -0,0 +1,56 @@
+import { ref, onUnmounted } from 'vue'
+
+const API_BASE_URL = import.meta.env.VITE_APP_API_URL
+const TRIP_EVENTS = ['started', 'next_stop', 'completed']
+
+export function useTripEvents(callback) {
+  const isConnected = ref(false)
+  let source = null
+
+  function subscribe(tripId) {
+    unsubscribe()
+
+    if (typeof EventSource === 'undefined' || !tripId) return false
+
+    const token = encodeURIComponent(localStorage.getItem('access') || '')
+    source = new EventSource(`${API_BASE_URL}trips/${tripId}/events/?token=${token}`)
+
+    source.onopen = () => {
+      isConnected.value = true
+    }
+
+    source.onerror = () => {
+      isConnected.value = false
+      // Respostas como 503 (servidor sem ASGI) encerram a conexão de vez
+      if (source.readyState === EventSource.CLOSED) {
+        unsubscribe()
+      }
+    }
+
+    TRIP_EVENTS.forEach((name) => {
+      source.addEventListener(name, (event) => {
+        callback(JSON.parse(event.data))
+      })
+    })
+
+    return true
+  }
+
+  function unsubscribe() {
+    if (source) {
+      source.close()
+      source = null
+    }
+    isConnected.value = false
+  }
+
+  onUnmounted(() => {
+    unsubscribe()
+  })
+
+  return {
+    isConnected,
+    subscribe,
+    unsubscribe,
+  }
+}
@@ -0,0 +1,13 @@
+/**
+ * Lê uma página de uma listagem paginada por cursor.
+ *
+ * Recebe a resposta já verificada com response.ok e devolve os itens da
+ * página e o link da próxima (`null` na última). Respostas no formato de
+ * lista simples viram uma página única.
+ */
+export async function readPage(response) {
+  const data = await response.json()
+  if (Array.isArray(data)) return { items: data, next: null }
+
+  return { items: data.results, next: data.next }
+}
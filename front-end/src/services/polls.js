@@ -6,7 +6,7 @@ export async function getTodaysPoll() {
     throw new Error('Usuário não autenticado.')
   }
 
-  const response = await fetch(API_URLS.POLLS, {
+  const response = await fetch(`${API_URLS.POLLS}?paginate=false`, {
     headers: { Authorization: `Bearer ${accessToken}` },
   })
 